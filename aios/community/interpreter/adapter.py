@@ -19,7 +19,7 @@ except ImportError:
     )
 
 logger = SDKLogger("Interpreter Adapter")
-send_request, _ = useSysCall()
+send_request, SysCallWrapper = useSysCall()
 
 @add_framework_adapter("Open-Interpreter")
 def prepare_interpreter():
@@ -54,11 +54,10 @@ def adapter_aios_completions(**params):
     """aios completions replace fixed_litellm_completions in interpreter
     """
 
-    if params.get("stream", False) is True:
-        # TODO: AIOS not supprt stream mode
-        logger.log("AIOS does not support stream mode currently."
-                   "The stream mode has been automatically set to False.", level="warn")
-        params["stream"] = False
+    # tool calls are parsed from the whole response, so only plain text is
+    # streamed
+    if params.get("stream", False) is True and not params.get("tools"):
+        return stream_aios_completions(params)
 
     # Run completion
     attempts = 2
@@ -66,13 +65,13 @@ def adapter_aios_completions(**params):
 
     for attempt in range(attempts):
         try:
-            response, _, _, _, _ = send_request(
+            response = send_request(
                 agent_name="Open-Interpreter",
                 query=LLMQuery(
                     messages=params['messages'],
                     tools=(params["tools"] if "tools" in params else None)
                 )
-            )
+            )["response"]
 
             # format similar to completion in interpreter
             comletion = {'choices':
@@ -99,6 +98,16 @@ def adapter_aios_completions(**params):
         raise first_error
 
 
+def stream_aios_completions(params):
+    """Yield the response chunks in the delta format of the interpreter"""
+    for item in SysCallWrapper.llm_stream(
+        agent_name="Open-Interpreter",
+        query=LLMQuery(messages=params['messages']),
+    ):
+        if isinstance(item, str):
+            yield {'choices': [{'delta': {'content': item}}]}
+
+
 def format_tool_calls_to_interpreter(tool_calls):
     name = tool_calls[0]["name"]
     arguments = tool_calls[0]["parameters"]
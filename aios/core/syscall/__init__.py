@@ -1,17 +1,26 @@
+from concurrent.futures import Future
 
-from threading import Event, Thread
+import asyncio
 
 from cerebrum.llm.communication import Request
 
+from aios.utils.id_generator import syscall_ids
+
+
+class Syscall:
+    """
+    A request from an agent to the kernel. The syscall is a plain completion
+    object: the agent enqueues it and waits on it (or awaits it) while a
+    scheduler thread executes it and calls ``complete`` with the response.
+    """
 
-class Syscall(Thread):
     def __init__(self, agent_name, query: Request):
-        super().__init__()
         self.agent_name = agent_name
         self.query = query
-        self.event = Event()
-        self.pid: int = None
+        self.future = Future()
+        self.pid: int = syscall_ids.next_int()
         self.status = None
+        self.priority = None
         self.response = None
         self.time_limit = None
         self.created_time = None
@@ -72,7 +81,16 @@ class Syscall(Thread):
     def set_time_limit(self, time_limit):
         self.time_limit = time_limit
 
-    def run(self):
-        self.set_pid(self.native_id)
-        self.event.wait()
+    def complete(self):
+        """Wake up the agent waiting on this syscall"""
+        self.future.set_result(self.response)
+
+    def done(self):
+        return self.future.done()
+
+    def wait(self, timeout=None):
+        """Block until the syscall is completed and return its response"""
+        return self.future.result(timeout)
 
+    def __await__(self):
+        return asyncio.wrap_future(self.future).__await__()
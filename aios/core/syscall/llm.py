@@ -1,4 +1,96 @@
 from aios.core.syscall import Syscall
 
+from collections import deque
+from threading import Condition
+
+import asyncio
+
+
+class ChunkStream:
+    """
+    Chunks of a streamed response. The scheduler thread puts the chunks as
+    they are generated and closes the stream when the syscall is completed;
+    the agent iterates over them, either blocking (``for``) or from an event
+    loop (``async for``).
+    """
+
+    def __init__(self):
+        self.chunks = deque()
+        self.closed = False
+        self.condition = Condition()
+        # futures of the event loops waiting for a chunk
+        self.waiters = []
+
+    def put(self, chunk: str):
+        with self.condition:
+            self.chunks.append(chunk)
+            self.wake_up()
+
+    def close(self):
+        with self.condition:
+            self.closed = True
+            self.wake_up()
+
+    def wake_up(self):
+        # caller holds the condition
+        self.condition.notify_all()
+        for loop, waiter in self.waiters:
+            loop.call_soon_threadsafe(self.set_waiter, waiter)
+        self.waiters.clear()
+
+    @staticmethod
+    def set_waiter(waiter):
+        if not waiter.done():
+            waiter.set_result(None)
+
+    def __iter__(self):
+        while True:
+            with self.condition:
+                while not self.chunks and not self.closed:
+                    self.condition.wait()
+                if not self.chunks:
+                    return
+                chunk = self.chunks.popleft()
+            yield chunk
+
+    async def __aiter__(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            with self.condition:
+                if self.chunks:
+                    chunk = self.chunks.popleft()
+                elif self.closed:
+                    return
+                else:
+                    waiter = loop.create_future()
+                    self.waiters.append((loop, waiter))
+                    chunk = None
+
+            if chunk is None:
+                await waiter
+            else:
+                yield chunk
+
+
 class LLMSyscall(Syscall):
-    pass
\ No newline at end of file
+    def __init__(self, agent_name, query, stream: bool = False):
+        super().__init__(agent_name, query)
+        # chunks of the response as they are generated, if streamed
+        self.stream = ChunkStream() if stream else None
+        # whether chunks were already forwarded to the agent
+        self.streamed = False
+        # whether the rate limiter charged the syscall to its agent's quota
+        self.admitted = False
+
+    def is_streaming(self):
+        return self.stream is not None
+
+    def put_chunk(self, chunk):
+        if self.stream is not None and chunk:
+            self.stream.put(chunk)
+            self.streamed = True
+
+    def complete(self):
+        super().complete()
+        if self.stream is not None:
+            self.stream.close()
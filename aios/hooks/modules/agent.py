@@ -1,16 +1,14 @@
 from concurrent.futures import ThreadPoolExecutor, Future
-from random import randint
 from typing import Any, Tuple, Callable, Dict
 from aios.hooks.syscall import useSysCall
 from aios.hooks.types.agent import AgentSubmitDeclaration, FactoryParams
 from aios.hooks.utils.validate import validate
 from aios.hooks.stores import queue as QueueStore, processes as ProcessStore
+from aios.utils.id_generator import execution_ids
 
 # from aios.hooks.utils import generate_random_string
 from cerebrum.manager.agent import AgentManager
 
-ids = []
-
 @validate(FactoryParams)
 def useFactory(
     params: FactoryParams,
@@ -64,15 +62,13 @@ def useFactory(
         )
 
         # Generate a unique process ID
-        random_code = randint(100000, 999999)
-        while random_code in ids:
-            random_code = randint(100000, 999999)
+        execution_id = execution_ids.next_int()
 
-        ProcessStore.addProcess(_submitted_agent, random_code)
+        ProcessStore.addProcess(_submitted_agent, execution_id)
 
         print(ProcessStore.AGENT_PROCESSES)
 
-        return random_code
+        return execution_id
 
     def awaitAgentExecution(process_id: str) -> Dict[str, Any]:
         """
@@ -18,6 +18,8 @@ from aios.hooks.utils.validate import validate
 from aios.hooks.stores import queue as QueueStore, processes as ProcessStore
 from aios.scheduler.fifo_scheduler import FIFOScheduler
 from aios.scheduler.npp_scheduler import NPPScheduler
+from aios.scheduler.sjf_scheduler import SJFScheduler
+from aios.scheduler.rr_scheduler import RRScheduler
 
 
 @validate(SchedulerParams)
@@ -53,6 +55,10 @@ def useScheduler(
         scheduler = FIFOScheduler(**params.model_dump())
     elif params.scheduler_type == "NPPS":
         scheduler = NPPScheduler(**params.model_dump())
+    elif params.scheduler_type == "SJF":
+        scheduler = SJFScheduler(**params.model_dump())
+    elif params.scheduler_type == "RR":
+        scheduler = RRScheduler(**params.model_dump())
     else:
         raise ValueError(f"Invalid scheduler type: {params.scheduler_type}")
 
@@ -96,6 +102,10 @@ def scheduler(params: SchedulerParams):
         scheduler = FIFOScheduler(**params.model_dump())
     elif params.scheduler_type == "NPPS":
         scheduler = NPPScheduler(**params.model_dump())
+    elif params.scheduler_type == "SJF":
+        scheduler = SJFScheduler(**params.model_dump())
+    elif params.scheduler_type == "RR":
+        scheduler = RRScheduler(**params.model_dump())
     else:
         raise ValueError(f"Invalid scheduler type: {params.scheduler_type}")
     
@@ -131,6 +141,10 @@ def scheduler_nonblock(params: SchedulerParams):
         scheduler = FIFOScheduler(**params.model_dump())
     elif params.scheduler_type == "NPPS":
         scheduler = NPPScheduler(**params.model_dump())
+    elif params.scheduler_type == "SJF":
+        scheduler = SJFScheduler(**params.model_dump())
+    elif params.scheduler_type == "RR":
+        scheduler = RRScheduler(**params.model_dump())
     else:
         raise ValueError(f"Invalid scheduler type: {params.scheduler_type}")
 
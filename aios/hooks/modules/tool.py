@@ -44,8 +44,8 @@ def useToolRequestQueue() -> (
     QueueStore.REQUEST_QUEUE[r_str] = _
 
     # Function to get messages from the queue
-    def getMessage():
-        return QueueStore.getMessage(_)
+    def getMessage(block: bool = True, timeout: float | None = None):
+        return QueueStore.getMessage(_, block, timeout)
 
     # Function to add messages to the queue
     def addMessage(message: str):
@@ -1,14 +1,66 @@
-from queue import Queue
+from queue import Queue, Empty
 
-REQUEST_QUEUE: dict[str, Queue] = {}
+import time
 
-def getMessage(q: Queue):
-    return q.get(block=True, timeout=0.1)
+class SyscallQueue(Queue):
+    """
+    FIFO queue of syscalls whose consumers sleep on the queue's condition
+    variable until a syscall is put, instead of polling with a timeout.
 
-def addMessage(q: Queue, message: str):
+    Closing the queue wakes every blocked consumer with ``Empty`` so that the
+    scheduler threads can exit; reopening it restores the blocking behaviour.
+    """
+
+    def __init__(self, maxsize: int = 0):
+        super().__init__(maxsize)
+        self.closed = False
+
+    def get(self, block: bool = True, timeout: float | None = None):
+        with self.not_empty:
+            if block and timeout is None:
+                while not self._qsize() and not self.closed:
+                    self.not_empty.wait()
+            elif block:
+                endtime = time.monotonic() + timeout
+                while not self._qsize() and not self.closed:
+                    remaining = endtime - time.monotonic()
+                    if remaining <= 0.0:
+                        break
+                    self.not_empty.wait(remaining)
+
+            if not self._qsize():
+                raise Empty
+
+            item = self._get()
+            self.not_full.notify()
+            return item
+
+    def close(self):
+        with self.not_empty:
+            self.closed = True
+            self.not_empty.notify_all()
+
+    def reopen(self):
+        with self.mutex:
+            self.closed = False
+
+REQUEST_QUEUE: dict[str, SyscallQueue] = {}
+
+def getMessage(q: SyscallQueue, block: bool = True, timeout: float | None = None):
+    return q.get(block=block, timeout=timeout)
+
+def addMessage(q: SyscallQueue, message: str):
     q.put(message)
 
     return None
 
-def isEmpty(q: Queue):
+def isEmpty(q: SyscallQueue):
     return q.empty()
+
+def openQueues():
+    for q in REQUEST_QUEUE.values():
+        q.reopen()
+
+def closeQueues():
+    for q in REQUEST_QUEUE.values():
+        q.close()
@@ -1,7 +1,7 @@
 import time
 
-from aios.core.syscall import Syscall
 from aios.core.syscall.llm import LLMSyscall
+from aios.core.syscall.memory import MemorySyscall
 from aios.core.syscall.storage import StorageSyscall
 from aios.core.syscall.tool import ToolSyscall
 from aios.hooks.stores._global import (
@@ -17,183 +17,76 @@ from cerebrum.storage.communication import StorageQuery
 from cerebrum.tool.communication import ToolQuery
 
 def useSysCall():
-    def storage_syscall_exec(agent_name, query):
-        syscall = StorageSyscall(agent_name, query)
+    def enqueue(syscall, add_message):
         syscall.set_status("active")
+        syscall.set_created_time(time.time())
+        syscall.set_response(None)
 
-        completed_response, start_times, end_times, waiting_times, turnaround_times = (
-            "",
-            [],
-            [],
-            [],
-            [],
-        )
-        while syscall.get_status() != "done":
-            current_time = time.time()
-            syscall.set_created_time(current_time)
-            syscall.set_response(None)
-
-            global_storage_req_queue_add_message(syscall)
-
-            syscall.start()
-            syscall.join()
-
-            completed_response = syscall.get_response()
-
-            if syscall.get_status() != "done":
-                pass
-            start_time = syscall.get_start_time()
-            end_time = syscall.get_end_time()
-            waiting_time = start_time - syscall.get_created_time()
-            turnaround_time = end_time - syscall.get_created_time()
-
-            start_times.append(start_time)
-            end_times.append(end_time)
-            waiting_times.append(waiting_time)
-            turnaround_times.append(turnaround_time)
+        add_message(syscall)
+
+    def syscall_result(syscall, completed_response):
+        start_time = syscall.get_start_time()
+        end_time = syscall.get_end_time()
+        waiting_time = start_time - syscall.get_created_time()
+        turnaround_time = end_time - syscall.get_created_time()
 
         return {
             "response": completed_response,
-            "start_times": start_times,
-            "end_times": end_times,
-            "waiting_times": waiting_times,
-            "turnaround_times": turnaround_times,
+            "start_times": [start_time],
+            "end_times": [end_time],
+            "waiting_times": [waiting_time],
+            "turnaround_times": [turnaround_time],
         }
 
+    def syscall_exec(syscall, add_message):
+        """
+        Enqueue the syscall and wait for the scheduler to complete it. The
+        calling thread sleeps on the syscall itself, no thread is spawned.
+        """
+        enqueue(syscall, add_message)
+        return syscall_result(syscall, syscall.wait())
+
+    async def syscall_exec_async(syscall, add_message):
+        """
+        Enqueue the syscall and await its completion without blocking the
+        event loop of the caller.
+        """
+        enqueue(syscall, add_message)
+        return syscall_result(syscall, await syscall)
 
-    def mem_syscall_exec(agent_name, query):
-        syscall = Syscall(agent_name, query)
-        syscall.set_status("active")
-
-        completed_response, start_times, end_times, waiting_times, turnaround_times = (
-            "",
-            [],
-            [],
-            [],
-            [],
-        )
-        while syscall.get_status() != "done":
-            current_time = time.time()
-            syscall.set_created_time(current_time)
-            syscall.set_response(None)
-
-            global_memory_req_queue_add_message(syscall)
-
-            syscall.start()
-            syscall.join()
-
-            completed_response = syscall.get_response()
-
-            if syscall.get_status() != "done":
-                pass
-            start_time = syscall.get_start_time()
-            end_time = syscall.get_end_time()
-            waiting_time = start_time - syscall.get_created_time()
-            turnaround_time = end_time - syscall.get_created_time()
-
-            start_times.append(start_time)
-            end_times.append(end_time)
-            waiting_times.append(waiting_time)
-            turnaround_times.append(turnaround_time)
-
-        return {
-            "response": completed_response,
-            "start_times": start_times,
-            "end_times": end_times,
-            "waiting_times": waiting_times,
-            "turnaround_times": turnaround_times,
-        }
+    def storage_syscall_exec(agent_name, query):
+        syscall = StorageSyscall(agent_name, query)
+        return syscall_exec(syscall, global_storage_req_queue_add_message)
 
+    def mem_syscall_exec(agent_name, query):
+        syscall = MemorySyscall(agent_name, query)
+        return syscall_exec(syscall, global_memory_req_queue_add_message)
 
     def tool_syscall_exec(agent_name, tool_calls):
         syscall = ToolSyscall(agent_name, tool_calls)
-        syscall.set_status("active")
-
-        completed_response, start_times, end_times, waiting_times, turnaround_times = (
-            "",
-            [],
-            [],
-            [],
-            [],
-        )
-        while syscall.get_status() != "done":
-            current_time = time.time()
-            syscall.set_created_time(current_time)
-            syscall.set_response(None)
-
-            global_tool_req_queue_add_message(syscall)
-
-            syscall.start()
-            syscall.join()
-
-            completed_response = syscall.get_response()
-
-            if syscall.get_status() != "done":
-                pass
-            start_time = syscall.get_start_time()
-            end_time = syscall.get_end_time()
-            waiting_time = start_time - syscall.get_created_time()
-            turnaround_time = end_time - syscall.get_created_time()
-
-            start_times.append(start_time)
-            end_times.append(end_time)
-            waiting_times.append(waiting_time)
-            turnaround_times.append(turnaround_time)
-
-        return {
-            "response": completed_response,
-            "start_times": start_times,
-            "end_times": end_times,
-            "waiting_times": waiting_times,
-            "turnaround_times": turnaround_times,
-        }
-
+        return syscall_exec(syscall, global_tool_req_queue_add_message)
 
     def llm_syscall_exec(agent_name, query):
         syscall = LLMSyscall(agent_name=agent_name, query=query)
-
-        syscall.set_status("active")
-
-        completed_response, start_times, end_times, waiting_times, turnaround_times = (
-            "",
-            [],
-            [],
-            [],
-            [],
-        )
-
-        while syscall.get_status() != "done":
-            current_time = time.time()
-            syscall.set_created_time(current_time)
-            syscall.set_response(None)
-
-            global_llm_req_queue_add_message(syscall)
-
-            syscall.start()
-            syscall.join()
-
-            completed_response = syscall.get_response()
-
-            if syscall.get_status() != "done":
-                pass
-            start_time = syscall.get_start_time()
-            end_time = syscall.get_end_time()
-            waiting_time = start_time - syscall.get_created_time()
-            turnaround_time = end_time - syscall.get_created_time()
-
-            start_times.append(start_time)
-            end_times.append(end_time)
-            waiting_times.append(waiting_time)
-            turnaround_times.append(turnaround_time)
-
-        return {
-            "response": completed_response,
-            "start_times": start_times,
-            "end_times": end_times,
-            "waiting_times": waiting_times,
-            "turnaround_times": turnaround_times,
-        }
-
+        return syscall_exec(syscall, global_llm_req_queue_add_message)
+
+    def llm_syscall_exec_stream(agent_name, query):
+        """
+        Enqueue a streamed LLM syscall. Yields the text chunks of the response
+        as they are generated, then the result of the syscall.
+        """
+        syscall = LLMSyscall(agent_name=agent_name, query=query, stream=True)
+        enqueue(syscall, global_llm_req_queue_add_message)
+        yield from syscall.stream
+        yield syscall_result(syscall, syscall.wait())
+
+    async def send_request_stream(agent_name, query):
+        """Asynchronous version of llm_syscall_exec_stream"""
+        syscall = LLMSyscall(agent_name=agent_name, query=query, stream=True)
+        enqueue(syscall, global_llm_req_queue_add_message)
+        async for chunk in syscall.stream:
+            yield chunk
+        yield syscall_result(syscall, await syscall)
 
     def send_request(agent_name, query):
         if isinstance(query, LLMQuery):
@@ -210,7 +103,8 @@ def useSysCall():
                 return tool_syscall_exec(agent_name, tool_calls)
 
             elif action_type == "operate_file":
-                return storage_syscall_exec(llm_syscall_exec(agent_name, query))
+                response = llm_syscall_exec(agent_name, query)["response"]
+                return storage_syscall_exec(agent_name, response)
 
         elif isinstance(query, ToolQuery):
             return tool_syscall_exec(agent_name, query)
@@ -221,10 +115,56 @@ def useSysCall():
         elif isinstance(query, StorageQuery):
             return storage_syscall_exec(agent_name, query)
 
+    async def send_request_async(agent_name, query):
+        if isinstance(query, LLMQuery):
+            action_type = query.action_type
+            llm_syscall = LLMSyscall(agent_name=agent_name, query=query)
+            if action_type == "chat":
+                return await syscall_exec_async(
+                    llm_syscall, global_llm_req_queue_add_message
+                )
+
+            elif action_type == "tool_use":
+                response = (await syscall_exec_async(
+                    llm_syscall, global_llm_req_queue_add_message
+                ))["response"]
+                return await syscall_exec_async(
+                    ToolSyscall(agent_name, response.tool_calls),
+                    global_tool_req_queue_add_message,
+                )
+
+            elif action_type == "operate_file":
+                response = (await syscall_exec_async(
+                    llm_syscall, global_llm_req_queue_add_message
+                ))["response"]
+                return await syscall_exec_async(
+                    StorageSyscall(agent_name, response),
+                    global_storage_req_queue_add_message,
+                )
+
+        elif isinstance(query, ToolQuery):
+            return await syscall_exec_async(
+                ToolSyscall(agent_name, query), global_tool_req_queue_add_message
+            )
+
+        elif isinstance(query, MemoryQuery):
+            return await syscall_exec_async(
+                MemorySyscall(agent_name, query), global_memory_req_queue_add_message
+            )
+
+        elif isinstance(query, StorageQuery):
+            return await syscall_exec_async(
+                StorageSyscall(agent_name, query), global_storage_req_queue_add_message
+            )
+
     class SysCallWrapper:
         llm = llm_syscall_exec
         storage = storage_syscall_exec
-        memory = memoryview
+        memory = mem_syscall_exec
         tool = tool_syscall_exec
+        llm_stream = llm_syscall_exec_stream
+
+    SysCallWrapper.send_request_async = send_request_async
+    SysCallWrapper.send_request_stream = send_request_stream
 
     return send_request, SysCallWrapper
@@ -1,10 +1,10 @@
 from pydantic import BaseModel
 from typing import Any, TypeAlias, Callable
-from queue import Queue
+from aios.hooks.stores.queue import SyscallQueue
 
-LLMRequestQueue: TypeAlias = Queue
+LLMRequestQueue: TypeAlias = SyscallQueue
 
-LLMRequestQueueGetMessage: TypeAlias = Callable[[], None]
+LLMRequestQueueGetMessage: TypeAlias = Callable[..., None]
 LLMRequestQueueAddMessage: TypeAlias = Callable[[str], None]
 LLMRequestQueueCheckEmpty: TypeAlias = Callable[[], bool]
 
@@ -16,3 +16,22 @@ class LLMParams(BaseModel):
     max_new_tokens: int = (256,)
     log_mode: str = ("console",)
     llm_backend: str | None = None
+    max_concurrency: int | list[int] | None = None
+    strategy: str = "simple"
+    max_batch_size: int = 8
+    cache_size: int = 0
+    cache_ttl: float | None = None
+    cache_path: str | None = None
+    max_retries: int = 2
+    retry_backoff: float = 0.5
+    breaker_threshold: int = 5
+    breaker_reset_timeout: float = 30.0
+    rate_limits: dict | None = None
+    agent_rpm: float | None = None
+    agent_tpm: float | None = None
+    agent_quotas: dict | None = None
+    dtype: str = "auto"
+    model_pool_memory_gb: float | None = None
+    decoding: str = "sample"
+    kv_cache_entries: int = 4
+    http_pool: dict | None = None
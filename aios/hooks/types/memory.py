@@ -1,14 +1,15 @@
 from pydantic import BaseModel
 from typing import Any, TypeAlias, Callable
-from queue import Queue
+from aios.hooks.stores.queue import SyscallQueue
 
-MemoryRequestQueue: TypeAlias = Queue
+MemoryRequestQueue: TypeAlias = SyscallQueue
 
-MemoryRequestQueueGetMessage: TypeAlias = Callable[[], None]
+MemoryRequestQueueGetMessage: TypeAlias = Callable[..., None]
 MemoryRequestQueueAddMessage: TypeAlias = Callable[[str], None]
 MemoryRequestQueueCheckEmpty: TypeAlias = Callable[[], bool]
 
 class MemoryManagerParams(BaseModel):
     memory_limit: int
     eviction_k: int
-    storage_manager: Any
\ No newline at end of file
+    storage_manager: Any
+    eviction_policy: str | None = None
\ No newline at end of file
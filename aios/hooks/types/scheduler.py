@@ -16,4 +16,5 @@ class SchedulerParams(BaseModel):
     get_memory_syscall: MemoryRequestQueueGetMessage | None
     get_storage_syscall: StorageRequestQueueGetMessage | None
     get_tool_syscall: ToolRequestQueueGetMessage | None
-    scheduler_type: str
\ No newline at end of file
+    scheduler_type: str
+    llm_workers: int | None = None
\ No newline at end of file
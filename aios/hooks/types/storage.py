@@ -1,10 +1,10 @@
 from pydantic import BaseModel
 from typing import Any, TypeAlias, Callable
-from queue import Queue
+from aios.hooks.stores.queue import SyscallQueue
 
-StorageRequestQueue: TypeAlias = Queue
+StorageRequestQueue: TypeAlias = SyscallQueue
 
-StorageRequestQueueGetMessage: TypeAlias = Callable[[], None]
+StorageRequestQueueGetMessage: TypeAlias = Callable[..., None]
 StorageRequestQueueAddMessage: TypeAlias = Callable[[str], None]
 StorageRequestQueueCheckEmpty: TypeAlias = Callable[[], bool]
 
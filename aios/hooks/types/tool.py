@@ -1,10 +1,10 @@
 from pydantic import BaseModel
 from typing import Any, TypeAlias, Callable
-from queue import Queue
+from aios.hooks.stores.queue import SyscallQueue
 
-ToolRequestQueue: TypeAlias = Queue
+ToolRequestQueue: TypeAlias = SyscallQueue
 
-ToolRequestQueueGetMessage: TypeAlias = Callable[[], None]
+ToolRequestQueueGetMessage: TypeAlias = Callable[..., None]
 ToolRequestQueueAddMessage: TypeAlias = Callable[[str], None]
 ToolRequestQueueCheckEmpty: TypeAlias = Callable[[], bool]
 
@@ -1,14 +1,32 @@
 from aios.context.simple_context import SimpleContextManager
-from aios.llm_core.strategy import RouterStrategy, SimpleStrategy
-from aios.llm_core.local import HfLocalBackend, VLLMLocalBackend, OllamaBackend
+from aios.llm_core.breaker import CircuitBreaker
+from aios.llm_core.cache import CompletionCache
+from aios.llm_core.rate_limiter import RateLimiter
+from aios.llm_core.tool_schema import CompiledTools, ToolSchemaRegistry, is_tool_call
+from aios.llm_core.strategy import (
+    RouterStrategy,
+    SimpleStrategy,
+    LeastOutstandingStrategy,
+    PowerOfTwoStrategy,
+    LatencyWeightedStrategy,
+    PrefixAffinityStrategy,
+)
+from aios.llm_core.local import HfLocalBackend, VLLMLocalBackend, OllamaBackend, stream_text
+from aios.llm_core.http_pool import http_clients
+from aios.llm_core.model_pool import model_pool
 from aios.utils.id_generator import generator_tool_call_id
+from aios.utils.json_scanner import JSONScanner, extract_json
 from cerebrum.llm.communication import Response
-from litellm import completion
+from litellm import completion, acompletion
+from litellm.exceptions import BadRequestError, RateLimitError
+import asyncio
 import json
 
+from contextlib import contextmanager
 from typing import Dict, Optional
+from threading import Lock
 import time
-import re
+import random
 import os
 from aios.config.config_manager import config
 
@@ -33,8 +51,83 @@ class LLMAdapter:
         llm_backend (str, optional)     : Backend to use for speeding up 
                                           open-source LLMs. Defaults to None.
                                           Choices are ["vllm", "ollama"]
+        max_concurrency (int or List[int], optional)
+                                        : Maximum number of in-flight requests
+                                          per endpoint. Defaults to a value
+                                          depending on the backend.
+        max_batch_size (int, optional)  : Maximum number of requests generated
+                                          in one batch by local backends that
+                                          support batching. Defaults to 8.
+        cache_size (int, optional)      : Maximum number of completions kept in
+                                          the in-memory cache. Defaults to 0
+                                          (no cache); the kernel configuration
+                                          defaults to 1024.
+        cache_ttl (float, optional)     : Seconds after which a cached
+                                          completion expires. Defaults to None.
+        cache_path (str, optional)      : SQLite file of the persistent cache
+                                          tier. Defaults to None.
+        max_retries (int, optional)     : Number of times a failed request is
+                                          sent again to another endpoint.
+                                          Defaults to 2.
+        retry_backoff (float, optional) : Base delay in seconds before a
+                                          retry, doubled at each retry.
+                                          Defaults to 0.5.
+        breaker_threshold (int, optional)
+                                        : Consecutive failures after which an
+                                          endpoint is taken out of rotation.
+                                          Defaults to 5.
+        breaker_reset_timeout (float, optional)
+                                        : Seconds before a failed endpoint is
+                                          probed again. Defaults to 30.
+        rate_limits (dict, optional)    : Requests and tokens per minute of
+                                          each provider, e.g.
+                                          {"openai": {"rpm": 500, "tpm": 30000}}.
+                                          Defaults to None (unlimited).
+        agent_rpm (float, optional)     : Requests per minute of each agent.
+                                          Defaults to None (unlimited).
+        agent_tpm (float, optional)     : Tokens per minute of each agent.
+                                          Defaults to None (unlimited).
+        agent_quotas (dict, optional)   : Requests and tokens per minute of
+                                          specific agents. Defaults to None.
+        dtype (str, optional)           : Data type of the weights of the
+                                          models loaded in process, e.g.
+                                          "float16". Defaults to "auto".
+        model_pool_memory_gb (float, optional)
+                                        : Memory the models loaded in process
+                                          may take in total, the least
+                                          recently used ones are unloaded
+                                          beyond it. Defaults to None.
+        decoding (str, optional)        : Decoding profile of the models
+                                          loaded in process: "greedy",
+                                          "sample" or "beam". Defaults to
+                                          "sample".
+        kv_cache_entries (int, optional): Number of conversations whose
+                                          attention keys and values are kept
+                                          by each model loaded in process,
+                                          so that their next round only
+                                          encodes the new tokens. Defaults
+                                          to 4, 0 disables it.
+        http_pool (dict, optional)      : Connection pool of the backends
+                                          served over HTTP (ollama, vllm,
+                                          hflocal with a hostname):
+                                          max_connections,
+                                          max_keepalive_connections,
+                                          keepalive_expiry, http2, and the
+                                          request timeouts in seconds of
+                                          each backend, e.g.
+                                          {"timeouts": {"ollama": 300}}.
+                                          Defaults to None.
     """
 
+    # In-flight request limits used when max_concurrency is not given. Hosted
+    # APIs (no local backend) default to HOSTED_MAX_CONCURRENCY.
+    DEFAULT_MAX_CONCURRENCY = {
+        "hflocal": 1,
+        "vllm": 32,
+        "ollama": 4,
+    }
+    HOSTED_MAX_CONCURRENCY = 32
+
     def __init__(
         self,
         llm_name: str | list[str],
@@ -44,9 +137,27 @@ class LLMAdapter:
         log_mode: str = "console",
         llm_backend: Optional[str | list[str]] = None,
         use_context_manager: bool = False,
-        strategy: Optional[RouterStrategy] = RouterStrategy.SIMPLE,
+        strategy: Optional[RouterStrategy | str] = RouterStrategy.SIMPLE,
         hostname: Optional[str | list[str]] = None,
         api_key: str | list[str] | None = None,
+        max_concurrency: Optional[int | list[int]] = None,
+        max_batch_size: int = 8,
+        cache_size: int = 0,
+        cache_ttl: Optional[float] = None,
+        cache_path: Optional[str] = None,
+        max_retries: int = 2,
+        retry_backoff: float = 0.5,
+        breaker_threshold: int = 5,
+        breaker_reset_timeout: float = 30.0,
+        rate_limits: Optional[dict] = None,
+        agent_rpm: Optional[float] = None,
+        agent_tpm: Optional[float] = None,
+        agent_quotas: Optional[dict] = None,
+        dtype: str = "auto",
+        model_pool_memory_gb: Optional[float] = None,
+        decoding: str = "sample",
+        kv_cache_entries: int = 4,
+        http_pool: Optional[dict] = None,
     ):
         """Initialize the LLM with the specified configuration.
         
@@ -59,15 +170,52 @@ class LLMAdapter:
             use_backend         : Specific backend to use (if None, inferred
                                   from model name)
             use_context_manager : Whether to use context manager
+            strategy            : Router strategy selecting the endpoint of
+                                  each request, a RouterStrategy or its name
             api_key             : DEPRECATED. This was originally used to store
                                   an API Key for the LLM, but LiteLLM uses keys
                                   directly from the process environment
                                   variables making this needless.
+            max_concurrency     : Maximum number of in-flight requests per
+                                  endpoint, either one value for all endpoints
+                                  or one value per endpoint
+            max_batch_size      : Maximum number of requests generated in one
+                                  batch by local backends
+            cache_size          : Maximum number of cached completions in
+                                  memory, 0 disables the cache
+            cache_ttl           : Lifetime of a cached completion in seconds
+            cache_path          : SQLite file keeping the cached completions
+                                  across restarts
+            max_retries         : Number of times a failed request is retried
+                                  on another endpoint
+            retry_backoff       : Base delay of the exponential backoff
+                                  between retries
+            breaker_threshold   : Consecutive failures opening the circuit
+                                  breaker of an endpoint
+            breaker_reset_timeout
+                                : Seconds before an open circuit breaker lets
+                                  a probe request through
+            rate_limits         : RPM/TPM limits of each provider
+            agent_rpm           : Requests per minute of each agent
+            agent_tpm           : Tokens per minute of each agent
+            agent_quotas        : RPM/TPM limits of specific agents
+            dtype               : Data type of the weights of the models
+                                  loaded in process
+            model_pool_memory_gb: Memory budget of the process-wide pool of
+                                  the models loaded in process
+            decoding            : Decoding profile of the models loaded in
+                                  process
+            kv_cache_entries    : Conversations whose past_key_values are
+                                  kept by each model loaded in process
+            http_pool           : Connection pool settings and timeouts of
+                                  the backends served over HTTP
         """
         if isinstance(llm_name, list) != isinstance(llm_backend, list):
             raise ValueError("llm_name and llm_backend do not be the same type")
-        elif isinstance(llm_backend, list) and len(llm_name) == len(llm_backend):
+        elif isinstance(llm_backend, list) and len(llm_name) != len(llm_backend):
             raise ValueError("llm_name and llm_backend do not have the same length")
+        elif isinstance(max_concurrency, list) and len(max_concurrency) != len(llm_name):
+            raise ValueError("llm_name and max_concurrency do not have the same length")
 
         self.llm_name            = llm_name if isinstance(llm_name, list) else [llm_name]
         self.max_gpu_memory      = max_gpu_memory
@@ -76,6 +224,26 @@ class LLMAdapter:
         self.log_mode            = log_mode
         self.llm_backend         = llm_backend if isinstance(llm_backend, list) else [llm_backend]
         self.context_manager     = SimpleContextManager() if use_context_manager else None
+        self.max_batch_size      = max_batch_size
+        self.cache               = CompletionCache(cache_size, cache_ttl, cache_path) if cache_size > 0 else None
+        # tool sets already described in a prompt
+        self.tool_schemas        = ToolSchemaRegistry()
+        self.max_retries         = max_retries
+        self.retry_backoff       = retry_backoff
+
+        rate_limiter             = RateLimiter(rate_limits, agent_rpm, agent_tpm, agent_quotas)
+        self.rate_limiter        = rate_limiter if rate_limiter.enabled() else None
+
+        # the models loaded in process are shared by the LLM cores and kept
+        # loaded when the LLM core is set up again
+        if model_pool_memory_gb is not None:
+            model_pool.set_max_memory(int(model_pool_memory_gb * 2**30))
+
+        # the backends served over HTTP keep their connections alive in
+        # clients shared by the LLM cores
+        http_pool                = dict(http_pool or {})
+        timeouts                 = http_pool.pop("timeouts", None) or {}
+        http_clients.configure(**http_pool)
         
 
         # Set all supported API keys
@@ -116,6 +284,9 @@ class LLMAdapter:
             if self.llm_backend[idx] is None:
                 continue
 
+            backend_hostname = hostname[idx] if isinstance(hostname, list) else hostname
+            timeout = timeouts.get(self.llm_backend[idx], 600.0)
+
             match self.llm_backend[idx]:
                 case "hflocal":
                     if "HUGGING_FACE_API_KEY" not in os.environ:
@@ -124,18 +295,25 @@ class LLMAdapter:
                     self.llm_name[idx] = HfLocalBackend(
                         self.llm_name[idx],
                         max_gpu_memory=max_gpu_memory,
-                        hostname=hostname
+                        hostname=backend_hostname,
+                        dtype=dtype,
+                        max_new_tokens=max_new_tokens,
+                        decoding=decoding,
+                        kv_cache_entries=kv_cache_entries,
+                        timeout=timeout,
                     )
                 case "vllm":
                     self.llm_name[idx] = VLLMLocalBackend(
                         self.llm_name[idx],
                         max_gpu_memory=max_gpu_memory,
-                        hostname=hostname
+                        hostname=backend_hostname,
+                        timeout=timeout,
                     )
                 case "ollama":
                     self.llm_name[idx] = OllamaBackend(
                         self.llm_name[idx],
-                        hostname=hostname
+                        hostname=backend_hostname,
+                        timeout=timeout,
                     )
                 case None:
                     continue
@@ -155,28 +333,255 @@ class LLMAdapter:
                     if not is_formatted:
                         self.llm_name[idx] = prefix + self.llm_name[idx]
         
+        if isinstance(strategy, str):
+            strategy = RouterStrategy[strategy.upper()]
+
         if strategy == RouterStrategy.SIMPLE:
             self.strategy = SimpleStrategy(self.llm_name)
+        elif strategy == RouterStrategy.LEAST_OUTSTANDING:
+            self.strategy = LeastOutstandingStrategy(self.llm_name)
+        elif strategy == RouterStrategy.POWER_OF_TWO:
+            self.strategy = PowerOfTwoStrategy(self.llm_name)
+        elif strategy == RouterStrategy.LATENCY_WEIGHTED:
+            self.strategy = LatencyWeightedStrategy(self.llm_name)
+        elif strategy == RouterStrategy.PREFIX_AFFINITY:
+            self.strategy = PrefixAffinityStrategy(self.llm_name)
+
+        # Per-endpoint in-flight limits, so that a busy local backend is
+        # skipped in favor of an endpoint that still has free slots. The
+        # requests in flight are counted by the strategy.
+        self.endpoint_lock = Lock()
+        self.concurrency = {}
+        for idx, endpoint in enumerate(self.llm_name):
+            if isinstance(max_concurrency, list):
+                limit = max_concurrency[idx]
+            elif max_concurrency is not None:
+                limit = max_concurrency
+            else:
+                limit = self.DEFAULT_MAX_CONCURRENCY.get(
+                    self.llm_backend[idx], self.HOSTED_MAX_CONCURRENCY
+                )
+            self.concurrency[endpoint] = limit
+
+        self.breakers = {
+            endpoint: CircuitBreaker(breaker_threshold, breaker_reset_timeout)
+            for endpoint in self.llm_name
+        }
+
+    def total_concurrency(self) -> int:
+        """Number of requests all the endpoints can serve at the same time"""
+        return sum(self.concurrency.values())
+
+    def batch_size(self) -> int:
+        """
+        Number of requests that can be generated in one batch. Batching is
+        only used when every endpoint is a local backend that supports it.
+        """
+        if all(getattr(endpoint, "supports_batching", False) for endpoint in self.llm_name):
+            return max(1, self.max_batch_size)
+        return 1
+
+    def acquire_endpoint(self, exclude=(), messages=None):
+        """
+        Select the next endpoint from the strategy among the endpoints that
+        have not reached their in-flight limit, skipping the endpoints whose
+        circuit breaker is open, the ones whose provider is over its rate
+        limits and the ones in exclude. The messages of the request are given
+        to the strategy and charged to the rate limits. If every endpoint is
+        saturated, the overflow endpoint of the strategy is used, by default
+        the one with the fewest in-flight requests.
+        Returns None if no endpoint can take the request.
+        """
+        stats = self.strategy.stats
+        with self.endpoint_lock:
+            healthy = [
+                endpoint for endpoint in self.llm_name
+                if endpoint not in exclude and self.breakers[endpoint].available()
+            ]
+            if self.rate_limiter and messages is not None:
+                tokens = self.rate_limiter.estimate_tokens(messages)
+                healthy = [
+                    endpoint for endpoint in healthy
+                    if self.rate_limiter.has_budget(endpoint, tokens)
+                ]
+
+            if not healthy:
+                return None
+
+            available = [
+                endpoint for endpoint in healthy
+                if stats[endpoint].in_flight < self.concurrency[endpoint]
+            ]
+            if available:
+                model = self.strategy(available, messages)
+            else:
+                model = self.strategy.overflow(healthy, messages)
+
+            self.breakers[model].acquire()
+            self.strategy.on_start(model)
+            if self.rate_limiter and messages is not None:
+                self.rate_limiter.charge_request(model, tokens)
+            return model
+
+    def release_endpoint(self, model, latency, error=False):
+        """Report the latency and outcome of a request sent to the endpoint"""
+        self.strategy.on_finish(model, latency, error)
+        self.breakers[model].record(error)
+
+    def wait_for_endpoint(self, messages):
+        """
+        Acquire an endpoint for a request with the messages, waiting until
+        the provider of a healthy endpoint has budget for it. Returns None if
+        the circuit breakers of all the endpoints are open.
+        """
+        while (model := self.acquire_endpoint(messages=messages)) is None:
+            if not self.has_healthy_endpoint():
+                return None
+            time.sleep(max(self.budget_wait_time(messages), 0.001))
+        return model
+
+    async def await_endpoint(self, messages):
+        """Asynchronous version of wait_for_endpoint"""
+        while (model := self.acquire_endpoint(messages=messages)) is None:
+            if not self.has_healthy_endpoint():
+                return None
+            await asyncio.sleep(max(self.budget_wait_time(messages), 0.001))
+        return model
+
+    def has_healthy_endpoint(self) -> bool:
+        return any(breaker.available() for breaker in self.breakers.values())
+
+    @staticmethod
+    def is_retriable(e: Exception) -> bool:
+        """
+        Whether the request may succeed if sent again, as opposed to a
+        request that no endpoint can serve (e.g. the context window is
+        exceeded)
+        """
+        return not isinstance(e, BadRequestError)
+
+    @classmethod
+    def is_endpoint_failure(cls, e: Exception) -> bool:
+        """
+        Whether the exception counts against the circuit breaker of the
+        endpoint. A rate limited endpoint is healthy, it is held back by the
+        rate limiter instead.
+        """
+        return cls.is_retriable(e) and not isinstance(e, RateLimitError)
+
+    @contextmanager
+    def endpoint_request(self, model):
+        """Release the endpoint with the latency and outcome of the request"""
+        start = time.time()
+        try:
+            yield
+        except Exception as e:
+            if isinstance(e, RateLimitError) and self.rate_limiter:
+                self.rate_limiter.exhaust(model)
+            self.release_endpoint(
+                model, time.time() - start, error=self.is_endpoint_failure(e)
+            )
+            raise
+        else:
+            self.release_endpoint(model, time.time() - start)
+
+    def budget_wait_time(self, messages) -> float:
+        """Seconds until the provider of an endpoint has budget for the messages"""
+        if self.rate_limiter is None:
+            return 0.0
+        tokens = self.rate_limiter.estimate_tokens(messages)
+        return self.rate_limiter.provider_wait_time(self.llm_name, tokens)
+
+    def charge_completion(self, llm_syscall, model, res):
+        """Charge the generated tokens to the rate limits"""
+        if self.rate_limiter and isinstance(res, str):
+            self.rate_limiter.charge_completion(
+                llm_syscall.agent_name,
+                model,
+                len(res) // self.rate_limiter.chars_per_token,
+            )
+
+    def retry_delay(self, attempt: int) -> float:
+        """Exponential backoff with jitter, so that retries do not line up"""
+        return self.retry_backoff * (2 ** attempt) * random.uniform(0.5, 1.5)
+
+    def next_endpoint(self, tried, messages=None):
+        """Endpoint of a retry: an endpoint not tried yet if one is healthy"""
+        return (
+            self.acquire_endpoint(exclude=tried, messages=messages)
+            or self.acquire_endpoint(messages=messages)
+        )
+
+    def call_with_failover(self, model, request, can_retry=lambda: True, messages=None):
+        """
+        Send the request to the endpoint. If the endpoint fails, the request
+        is sent again to the next healthy endpoint after a jittered backoff,
+        up to max_retries times. Returns the result of the request and the
+        endpoint that served it.
 
-    def tool_calling_input_format(self, messages: list, tools: list) -> list:
+        Args:
+            model                   : Endpoint acquired for the request
+            request (Callable)      : Function sending the request to the
+                                      endpoint it is given
+            can_retry (Callable)    : Whether the request can still be sent
+                                      again, e.g. not once part of a streamed
+                                      response was forwarded to the agent
+            messages (list)         : Messages of the request, for the
+                                      strategy and the rate limits
+        """
+        tried = []
+        for attempt in range(self.max_retries + 1):
+            try:
+                with self.endpoint_request(model):
+                    return request(model), model
+            except Exception as e:
+                tried.append(model)
+                if (
+                    attempt == self.max_retries
+                    or not self.is_retriable(e)
+                    or not can_retry()
+                ):
+                    raise
+                time.sleep(self.retry_delay(attempt))
+                model = self.next_endpoint(tried, messages)
+                if model is None:
+                    raise
+
+    async def acall_with_failover(self, model, request, can_retry=lambda: True, messages=None):
+        """Asynchronous version of call_with_failover, request is a coroutine function"""
+        tried = []
+        for attempt in range(self.max_retries + 1):
+            try:
+                with self.endpoint_request(model):
+                    return await request(model), model
+            except Exception as e:
+                tried.append(model)
+                if (
+                    attempt == self.max_retries
+                    or not self.is_retriable(e)
+                    or not can_retry()
+                ):
+                    raise
+                await asyncio.sleep(self.retry_delay(attempt))
+                model = self.next_endpoint(tried, messages)
+                if model is None:
+                    raise
+
+    def endpoint_health(self) -> dict:
+        """Statistics and circuit breaker state of every endpoint"""
+        stats = self.strategy.endpoint_stats()
+        return {
+            str(endpoint): {**stats[str(endpoint)], "circuit": breaker.to_dict()}
+            for endpoint, breaker in self.breakers.items()
+        }
+
+    def tool_calling_input_format(self, messages: list, tools: CompiledTools) -> list:
         """Integrate tool information into the messages for open-sourced LLMs
 
         Args:
             messages (list): messages with different roles
-            tools (list): tool information
+            tools (CompiledTools): tool information, compiled by pre_process_tools
         """
-        prefix_prompt = (
-            "In and only in current step, you need to call tools. Available tools are: "
-        )
-        tool_prompt = json.dumps(tools)
-        suffix_prompt = "".join(
-            [
-                "Must call functions that are available. To call a function, respond "
-                "immediately and only with a list of JSON object of the following format:"
-                '[{"name":"function_name_value","parameters":{"parameter_name1":"parameter_value1",'
-                '"parameter_name2":"parameter_value2"}}]'
-            ]
-        )
 
         # translate tool call message for models don't support tool call
         for message in messages:
@@ -191,43 +596,21 @@ class LLMAdapter:
                     f"The result of the execution of function(id :{tool_call_id}) is: {content}. "
                 )
 
-        messages[-1]["content"] += prefix_prompt + tool_prompt + suffix_prompt
+        messages[-1]["content"] += tools.prompt
         return messages
 
     def parse_json_format(self, message: str) -> str:
-        json_array_pattern = r"\[\s*\{.*?\}\s*\]"
-        json_object_pattern = r"\{\s*.*?\s*\}"
-
-        match_array = re.search(json_array_pattern, message)
+        """The first JSON array or object of the message, "[]" if there is none"""
+        value = extract_json(message)
+        if value is None:
+            return "[]"
+        return json.dumps(value)
 
-        if match_array:
-            json_array_substring = match_array.group(0)
-
-            try:
-                json_array_data = json.loads(json_array_substring)
-                return json.dumps(json_array_data)
-            except json.JSONDecodeError:
-                pass
-
-        match_object = re.search(json_object_pattern, message)
-
-        if match_object:
-            json_object_substring = match_object.group(0)
-
-            try:
-                json_object_data = json.loads(json_object_substring)
-                return json.dumps(json_object_data)
-            except json.JSONDecodeError:
-                pass
-        return "[]"
-
-    def parse_tool_calls(self, message):
+    def parse_tool_calls(self, message, tools: CompiledTools | None = None):
         # add tool call id and type for models don't support tool call
-        # if isinstance(message, dict):
-        #     message = [message]
-        tool_calls = json.loads(self.parse_json_format(message))
-        # breakpoint()
-        # tool_calls = json.loads(message)
+        tool_calls = extract_json(message, accept=is_tool_call)
+        if tool_calls is None:
+            return []
         if isinstance(tool_calls, dict):
             tool_calls = [tool_calls]
             
@@ -236,18 +619,285 @@ class LLMAdapter:
             # if "function" in tool_call:
             
             # else:
-            tool_call["name"] = tool_call["name"].replace("__", "/")
+            if tools is not None:
+                tool_call["name"] = tools.original_name(tool_call["name"])
+            else:
+                tool_call["name"] = tool_call["name"].replace("__", "/")
             # tool_call["type"] = "function"
         return tool_calls
     
-    def pre_process_tools(self, tools):
-        for tool in tools:
-            tool_name = tool["function"]["name"]
-            if "/" in tool_name:
-                tool_name = "__".join(tool_name.split("/"))
-                tool["function"]["name"] = tool_name
-        return tools
+    def pre_process_tools(self, tools) -> CompiledTools:
+        """
+        The tool set compiled into its prompt, once per distinct tool set.
+        The tools of the agent are not modified.
+        """
+        return self.tool_schemas.compile(tools)
     
+    def prepare_messages(self, llm_syscall):
+        """
+        Build the messages sent to the endpoint from the syscall query,
+        restoring the context of a suspended generation and describing the
+        tools for models without native tool calling.
+        """
+        # copy the messages, a preempted syscall is prepared again when it
+        # resumes and must not see the changes made below
+        messages = [dict(message) for message in llm_syscall.query.messages]
+        tools    = llm_syscall.query.tools
+        ret_type = llm_syscall.query.message_return_type
+
+        restored_context = None
+            
+        if self.context_manager:
+            pid = llm_syscall.get_pid()
+            if self.context_manager.check_restoration(pid):
+                restored_context = self.context_manager.gen_recover(pid)
+
+        if restored_context:
+            messages += [{
+                "role": "assistant",
+                "content": "" + restored_context,
+            }]
+
+        if tools:
+            tools = self.pre_process_tools(tools)
+            messages = self.tool_calling_input_format(messages, tools)
+
+        return messages, tools, ret_type, restored_context
+
+    def stream_completion(self, model, messages, temperature):
+        """Yield the generated text of the endpoint chunk by chunk"""
+        if isinstance(model, str):
+            yield from stream_text(completion(
+                model=model,
+                messages=messages,
+                temperature=temperature,
+                stream=True,
+            ))
+        else:
+            yield from model(
+                messages=messages,
+                temperature=temperature,
+                stream=True,
+            )
+
+    @staticmethod
+    def tool_call_scanner(llm_syscall):
+        """
+        Scanner of the streamed text of a syscall with tools: the generation
+        can stop as soon as the tool calls are complete
+        """
+        if llm_syscall.query.tools:
+            return JSONScanner(accept=is_tool_call)
+        return None
+
+    def stream_to_syscall(self, llm_syscall, stream):
+        """Forward the chunks of the stream to the syscall, return the whole text"""
+        chunks = []
+        scanner = self.tool_call_scanner(llm_syscall)
+        try:
+            for chunk in stream:
+                llm_syscall.put_chunk(chunk)
+                chunks.append(chunk)
+                if scanner is not None and scanner.feed(chunk) is not None:
+                    break
+        finally:
+            stream.close()
+        return "".join(chunks)
+
+    async def astream_to_syscall(self, llm_syscall, model, messages, temperature):
+        """Asynchronous version of stream_to_syscall for an endpoint"""
+        if not isinstance(model, str):
+            return await asyncio.to_thread(
+                self.stream_to_syscall,
+                llm_syscall,
+                self.stream_completion(model, messages, temperature),
+            )
+
+        chunks = []
+        scanner = self.tool_call_scanner(llm_syscall)
+        stream = await acompletion(
+            model=model,
+            messages=messages,
+            temperature=temperature,
+            stream=True,
+        )
+        try:
+            async for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    text = chunk.choices[0].delta.content
+                    llm_syscall.put_chunk(text)
+                    chunks.append(text)
+                    if scanner is not None and scanner.feed(text) is not None:
+                        break
+        finally:
+            # a stream left early keeps its connection until it is closed
+            if hasattr(stream, "aclose"):
+                await stream.aclose()
+        return "".join(chunks)
+
+    def generate_with_time_limit(self, model, messages, temperature, time_limit, llm_syscall):
+        """
+        Stream the response until it is complete or ``time_limit`` seconds
+        have passed. Returns the generated text and whether it is complete.
+        """
+        start = time.time()
+        chunks = []
+        scanner = self.tool_call_scanner(llm_syscall)
+        stream = self.stream_completion(model, messages, temperature)
+        try:
+            for chunk in stream:
+                llm_syscall.put_chunk(chunk)
+                chunks.append(chunk)
+                # complete tool calls end the generation
+                if scanner is not None and scanner.feed(chunk) is not None:
+                    return "".join(chunks), True
+                if time.time() - start >= time_limit:
+                    break
+            else:
+                return "".join(chunks), True
+        finally:
+            stream.close()
+
+        # the time limit may be hit on the last chunk
+        return "".join(chunks), False
+
+    def cache_key(self, model, llm_syscall, temperature):
+        """
+        Key of the syscall in the completion cache, or None if its completion
+        must not be cached: only deterministic requests are cached.
+        """
+        if self.cache is None or temperature != 0:
+            return None
+
+        query = llm_syscall.query
+        model_name = model if isinstance(model, str) else model.model_name
+        return self.cache.make_key(
+            model_name, query.messages, query.tools, query.message_return_type, temperature
+        )
+
+    def cached_completion(self, llm_syscall, temperature):
+        """
+        Key of the syscall in the completion cache and its cached completion,
+        looked up before an endpoint is acquired, so that a cached answer
+        neither waits for a slot or for the rate limits nor fails when all
+        the circuit breakers are open. A completion is cached under the model
+        that generated it, which the strategy picks when the request is sent,
+        so the completion of any model the healthy endpoints serve is looked
+        up, the model the strategy would pick now first.
+        """
+        if self.cache is None or temperature != 0:
+            return None, None
+
+        healthy = [
+            endpoint for endpoint in self.llm_name
+            if self.breakers[endpoint].available()
+        ] or self.llm_name
+        preferred = self.strategy.peek(healthy, llm_syscall.query.messages)
+        keys = list(dict.fromkeys(
+            self.cache_key(model, llm_syscall, temperature)
+            for model in [preferred, *healthy]
+        ))
+        return keys[0], self.cache.get_any(keys)
+
+    def format_response(self, res, tools, ret_type) -> Response:
+        if tools:
+            if tool_calls := self.parse_tool_calls(res, tools):
+                return Response(response_message=None,
+                                tool_calls=tool_calls,
+                                finished=True)
+
+        if ret_type == "json":
+            res = self.parse_json_format(res)
+
+        return Response(response_message=res, finished=True)
+
+    def error_response(self, e: Exception) -> Response:
+        error_msg = str(e)
+        # Mask API key in error message - only show first and last 2 chars
+        if "API key provided:" in error_msg:
+            key_start = error_msg.find("API key provided:") + len("API key provided: ")
+            key_end = error_msg.find(".", key_start)
+            if key_end == -1:  # If no period found, find next space
+                key_end = error_msg.find(" ", key_start)
+            if key_end != -1:  # If we found the end of the key
+                api_key = error_msg[key_start:key_end]
+                masked_key = f"{api_key[:2]}****{api_key[-2:]}" if len(api_key) > 4 else "****"
+                error_msg = error_msg[:key_start] + masked_key + error_msg[key_end:]
+
+        if "Invalid API key" in error_msg or "API key not found" in error_msg:
+            return Response(
+                response_message="Error: Invalid or missing API key for the selected model.",
+                error=error_msg,
+                finished=True,
+                status_code=402
+            )
+        return Response(
+            response_message=f"LLM Error: {error_msg}",
+            error=error_msg,
+            finished=True,
+            status_code=500
+        )
+
+    def unavailable_response(self) -> Response:
+        return Response(
+            response_message="LLM Error: no LLM endpoint is available, the circuit breakers of all endpoints are open.",
+            error="no LLM endpoint is available",
+            finished=True,
+            status_code=503
+        )
+
+    def generate(self, model, llm_syscall, messages, temperature):
+        """
+        Send the request to the endpoint. Returns the generated text and
+        whether it is complete, which is not the case when the generation is
+        suspended by the time limit of the syscall.
+        """
+        time_limit = llm_syscall.get_time_limit()
+
+        if time_limit is not None and self.context_manager:
+            return self.generate_with_time_limit(
+                model, messages, temperature, time_limit, llm_syscall
+            )
+        elif llm_syscall.is_streaming():
+            res = self.stream_to_syscall(
+                llm_syscall, self.stream_completion(model, messages, temperature)
+            )
+        elif isinstance(model, str):
+            # Extract content correctly when using litellm completion
+            completion_response = completion(
+                model=model,
+                messages=messages,
+                temperature=temperature,
+            )
+            res = completion_response.choices[0].message.content
+        else:
+            # Directly call the local backend model
+            res = model(
+                messages=messages,
+                temperature=temperature,
+            )
+        return res, True
+
+    async def agenerate(self, model, llm_syscall, messages, temperature):
+        """Asynchronous version of generate, for syscalls without time limit"""
+        if llm_syscall.is_streaming():
+            return await self.astream_to_syscall(
+                llm_syscall, model, messages, temperature
+            )
+        elif isinstance(model, str):
+            completion_response = await acompletion(
+                model=model,
+                messages=messages,
+                temperature=temperature,
+            )
+            return completion_response.choices[0].message.content
+        else:
+            return await asyncio.to_thread(
+                model,
+                messages=messages,
+                temperature=temperature,
+            )
+
     def address_syscall(
         self,
         llm_syscall,
@@ -261,87 +911,108 @@ class LLMAdapter:
                                             request sent from the agent
             temperature (float, optional) : Parameter to control the randomness
                                             of LLM output. Defaults to 0.0.
+
+        If the syscall is streamed, the chunks of the response are forwarded
+        to it as they are generated.
+
+        If the syscall has a time limit, the response is streamed and the
+        generation is suspended once the time limit is exceeded: the partial
+        response is saved in the context manager and returned with
+        ``finished=False``, and generation continues from it the next time
+        the syscall is addressed.
         """
         try:
-            messages = llm_syscall.query.messages
-            tools    = llm_syscall.query.tools
-            ret_type = llm_syscall.query.message_return_type
+            messages, tools, ret_type, restored_context = self.prepare_messages(llm_syscall)
 
-            llm_syscall.set_status("executing")
-            llm_syscall.set_start_time(time.time())
+            # a resumed generation continues a partial response
+            key, cached = (None, None) if restored_context else self.cached_completion(llm_syscall, temperature)
 
-            restored_context = None
-                
-            if self.context_manager:
-                pid = llm_syscall.get_pid()
-                if self.context_manager.check_restoration(pid):
-                    restored_context = self.context_manager.gen_recover(pid)
+            if cached is not None:
+                res = cached
+                llm_syscall.put_chunk(res)
+            else:
+                model = self.wait_for_endpoint(llm_syscall.query.messages)
+                if model is None:
+                    return self.unavailable_response()
+
+                try:
+                    (res, finished), model = self.call_with_failover(
+                        model,
+                        lambda model: self.generate(model, llm_syscall, messages, temperature),
+                        lambda: not llm_syscall.streamed,
+                        llm_syscall.query.messages,
+                    )
+                except Exception as e:
+                    return self.error_response(e)
+
+                self.charge_completion(llm_syscall, model, res)
+
+                if not finished:
+                    partial = (restored_context or "") + res
+                    self.context_manager.gen_snapshot(llm_syscall.get_pid(), partial)
+                    return Response(response_message=partial, finished=False)
+
+                if key:
+                    self.cache.put(self.cache_key(model, llm_syscall, temperature), res)
 
             if restored_context:
-                messages += [{
-                    "role": "assistant",
-                    "content": "" + restored_context,
-                }]
+                res = restored_context + res
+                self.context_manager.clear_restoration(llm_syscall.get_pid())
 
-            if tools:
-                tools = self.pre_process_tools(tools)
-                messages = self.tool_calling_input_format(messages, tools)
+            return self.format_response(res, tools, ret_type)
 
-            model = self.strategy()
+        except Exception as e:
+            # Handle system level errors
+            return Response(
+                response_message=f"System Error: {str(e)}",
+                error=str(e),
+                finished=True,
+                status_code=500
+            )
+
+    async def address_syscall_async(
+        self,
+        llm_syscall,
+        temperature=0.0
+    ):
+        """
+        Asynchronous version of address_syscall. Hosted endpoints are called
+        with litellm acompletion so that many requests can be in flight on one
+        event loop; local backends run in the default executor of the loop.
+        """
+        try:
+            messages, tools, ret_type, restored_context = self.prepare_messages(llm_syscall)
+
+            key, cached = (None, None) if restored_context else self.cached_completion(llm_syscall, temperature)
+
+            if cached is not None:
+                res = cached
+                llm_syscall.put_chunk(res)
+            else:
+                model = await self.await_endpoint(llm_syscall.query.messages)
+                if model is None:
+                    return self.unavailable_response()
 
-            if isinstance(model, (str, HfLocalBackend, VLLMLocalBackend, OllamaBackend)):
                 try:
-                    if isinstance(model, str):
-                        # Extract content correctly when using litellm completion
-                        completion_response = completion(
-                            model=model,
-                            messages=messages,
-                            temperature=temperature,
-                        )
-                        res = completion_response.choices[0].message.content
-                    else:
-                        # Directly call the local backend model
-                        res = model(
-                            messages=messages,
-                            temperature=temperature,
-                        )
-                except Exception as e:
-                    error_msg = str(e)
-                    # Mask API key in error message - only show first and last 2 chars
-                    if "API key provided:" in error_msg:
-                        key_start = error_msg.find("API key provided:") + len("API key provided: ")
-                        key_end = error_msg.find(".", key_start)
-                        if key_end == -1:  # If no period found, find next space
-                            key_end = error_msg.find(" ", key_start)
-                        if key_end != -1:  # If we found the end of the key
-                            api_key = error_msg[key_start:key_end]
-                            masked_key = f"{api_key[:2]}****{api_key[-2:]}" if len(api_key) > 4 else "****"
-                            error_msg = error_msg[:key_start] + masked_key + error_msg[key_end:]
-
-                    if "Invalid API key" in error_msg or "API key not found" in error_msg:
-                        return Response(
-                            response_message="Error: Invalid or missing API key for the selected model.",
-                            error=error_msg,
-                            finished=True,
-                            status_code=402
-                        )
-                    return Response(
-                        response_message=f"LLM Error: {error_msg}",
-                        error=error_msg,
-                        finished=True,
-                        status_code=500
+                    res, model = await self.acall_with_failover(
+                        model,
+                        lambda model: self.agenerate(model, llm_syscall, messages, temperature),
+                        lambda: not llm_syscall.streamed,
+                        llm_syscall.query.messages,
                     )
+                except Exception as e:
+                    return self.error_response(e)
+
+                self.charge_completion(llm_syscall, model, res)
 
-            if tools:
-                if tool_calls := self.parse_tool_calls(res):
-                    return Response(response_message=None,
-                                    tool_calls=tool_calls,
-                                    finished=True)
+                if key:
+                    self.cache.put(self.cache_key(model, llm_syscall, temperature), res)
 
-            if ret_type == "json":
-                res = self.parse_json_format(res)
+            if restored_context:
+                res = restored_context + res
+                self.context_manager.clear_restoration(llm_syscall.get_pid())
 
-            return Response(response_message=res, finished=True)
+            return self.format_response(res, tools, ret_type)
 
         except Exception as e:
             # Handle system level errors
@@ -351,3 +1022,105 @@ class LLMAdapter:
                 finished=True,
                 status_code=500
             )
+
+    def address_syscall_batch(
+        self,
+        llm_syscalls,
+        temperature=0.0
+    ):
+        """
+        Address a batch of requests with one generate call of a local
+        backend. Returns the responses in the order of the syscalls.
+
+        A batch of one syscall is addressed with address_syscall, which
+        generates it with the prompt and KV caches of the backend.
+
+        Args:
+            llm_syscalls (list[LLMSyscall]) : LLMSyscall objects that contain
+                                              the requests sent from the agents
+            temperature (float, optional)   : Parameter to control the
+                                              randomness of LLM output.
+                                              Defaults to 0.0.
+        """
+        if len(llm_syscalls) == 1:
+            return [self.address_syscall(llm_syscalls[0], temperature)]
+
+        responses = [None] * len(llm_syscalls)
+        prepared = []
+
+        for idx, llm_syscall in enumerate(llm_syscalls):
+            try:
+                prepared.append((idx, *self.prepare_messages(llm_syscall)))
+            except Exception as e:
+                responses[idx] = Response(
+                    response_message=f"System Error: {str(e)}",
+                    error=str(e),
+                    finished=True,
+                    status_code=500
+                )
+
+        if not prepared:
+            return responses
+
+        # answer the cached requests, generate the others
+        results = {}
+        keys = {}
+        to_generate = []
+        for idx, messages, _, _, restored_context in prepared:
+            key, cached = (None, None) if restored_context else self.cached_completion(llm_syscalls[idx], temperature)
+            if cached is not None:
+                results[idx] = cached
+            else:
+                keys[idx] = key
+                to_generate.append((idx, messages))
+
+        # the batch is one request to the endpoint, checked against and
+        # charged to the rate limits with the messages of all its syscalls
+        batch_messages = [
+            message for idx, _ in to_generate for message in llm_syscalls[idx].query.messages
+        ]
+        model = self.wait_for_endpoint(batch_messages) if to_generate else None
+        if to_generate and model is None:
+            for idx, _ in to_generate:
+                responses[idx] = self.unavailable_response()
+        elif to_generate:
+            try:
+                generated, model = self.call_with_failover(
+                    model,
+                    lambda model: model.batch_generate(
+                        [messages for _, messages in to_generate],
+                        temperature=temperature,
+                    ),
+                    messages=batch_messages,
+                )
+                for (idx, _), res in zip(to_generate, generated):
+                    results[idx] = res
+                    self.charge_completion(llm_syscalls[idx], model, res)
+                    if keys[idx]:
+                        self.cache.put(
+                            self.cache_key(model, llm_syscalls[idx], temperature), res
+                        )
+            except Exception as e:
+                for idx, _ in to_generate:
+                    responses[idx] = self.error_response(e)
+
+        for idx, _, tools, ret_type, restored_context in prepared:
+            if idx not in results:
+                continue
+            llm_syscall = llm_syscalls[idx]
+            res = results[idx]
+            llm_syscall.put_chunk(res)
+            try:
+                if restored_context:
+                    res = restored_context + res
+                    self.context_manager.clear_restoration(llm_syscall.get_pid())
+                responses[idx] = self.format_response(res, tools, ret_type)
+            except Exception as e:
+                responses[idx] = Response(
+                    response_message=f"System Error: {str(e)}",
+                    error=str(e),
+                    finished=True,
+                    status_code=500
+                )
+
+        return responses
@@ -0,0 +1,85 @@
+# Circuit breakers of the LLM endpoints. A breaker is closed while its
+# endpoint answers; after a number of consecutive failures it opens and the
+# router stops sending requests to the endpoint. Once the reset timeout has
+# passed, the breaker is half-open and a single probe request is let
+# through: the breaker closes again if it succeeds and reopens otherwise.
+
+from enum import Enum
+from threading import Lock
+
+import time
+
+
+class CircuitState(Enum):
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker of one endpoint.
+
+    Args:
+        failure_threshold (int)  : Consecutive failures after which the
+                                   circuit opens. Defaults to 5.
+        reset_timeout (float)    : Seconds the circuit stays open before a
+                                   probe request is let through. Defaults
+                                   to 30.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = CircuitState.CLOSED
+        self.failures = 0
+        self.opened_at = None
+        # whether the probe request of the half-open circuit is in flight
+        self.probing = False
+        self.lock = Lock()
+
+    def available(self) -> bool:
+        """Whether a request can be sent to the endpoint"""
+        with self.lock:
+            if self.state == CircuitState.CLOSED:
+                return True
+            elif self.state == CircuitState.OPEN:
+                return time.time() - self.opened_at >= self.reset_timeout
+            return not self.probing
+
+    def acquire(self):
+        """Called when a request is sent to the endpoint"""
+        with self.lock:
+            if self.state == CircuitState.OPEN:
+                self.state = CircuitState.HALF_OPEN
+            if self.state == CircuitState.HALF_OPEN:
+                self.probing = True
+
+    def record(self, error: bool):
+        """Called with the outcome of a request sent to the endpoint"""
+        with self.lock:
+            self.probing = False
+            if not error:
+                self.failures = 0
+                self.state = CircuitState.CLOSED
+                return
+
+            self.failures += 1
+            if (
+                self.state == CircuitState.HALF_OPEN
+                or self.failures >= self.failure_threshold
+            ):
+                self.state = CircuitState.OPEN
+                self.opened_at = time.time()
+
+    def to_dict(self):
+        with self.lock:
+            status = {
+                "state": self.state.value,
+                "consecutive_failures": self.failures,
+            }
+            if self.state == CircuitState.OPEN:
+                status["retry_in"] = max(
+                    0.0, self.opened_at + self.reset_timeout - time.time()
+                )
+            return status
@@ -0,0 +1,156 @@
+# Cache of LLM completions, addressed by the content of the request. Requests
+# are only cached when they are deterministic (temperature 0), so that an
+# identical prompt sent by another agent is answered without calling the
+# provider again.
+#
+# The cache has two tiers: a bounded in-memory LRU, and an optional SQLite
+# file that survives kernel restarts. Entries found on disk are promoted to
+# memory.
+
+from collections import OrderedDict
+from threading import Lock
+
+import hashlib
+import json
+import sqlite3
+import time
+
+
+class CompletionCache:
+    """
+    Two-tier completion cache.
+
+    Args:
+        max_entries (int)         : Maximum number of entries kept in memory.
+        ttl (float, optional)     : Seconds after which an entry expires.
+                                    Defaults to None (never).
+        db_path (str, optional)   : Path of the SQLite file of the on-disk
+                                    tier. Defaults to None (memory only).
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        ttl: float | None = None,
+        db_path: str | None = None,
+    ):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.entries = OrderedDict()  # key -> (response, expires_at)
+        self.lock = Lock()
+
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        self.db = None
+        if db_path is not None:
+            self.db = sqlite3.connect(db_path, check_same_thread=False)
+            self.db.execute(
+                "CREATE TABLE IF NOT EXISTS completions "
+                "(key TEXT PRIMARY KEY, response TEXT, expires_at REAL)"
+            )
+            self.db.commit()
+
+    @staticmethod
+    def make_key(model, messages, tools, ret_type, temperature) -> str:
+        """Hash of everything that determines the completion of a request"""
+        content = json.dumps(
+            [model, messages, tools or [], ret_type, temperature],
+            sort_keys=True,
+            default=str,
+        )
+        return hashlib.sha256(content.encode()).hexdigest()
+
+    def get(self, key: str) -> str | None:
+        return self.get_any([key])
+
+    def get_any(self, keys) -> str | None:
+        """Response of the first of the keys that is cached, as one lookup"""
+        now = time.time()
+        with self.lock:
+            for key in keys:
+                response = self.lookup(key, now)
+                if response is not None:
+                    self.hits += 1
+                    return response
+
+            self.misses += 1
+            return None
+
+    def lookup(self, key, now):
+        # caller holds the lock
+        entry = self.entries.get(key)
+        if entry is not None:
+            response, expires_at = entry
+            if expires_at is None or expires_at > now:
+                self.entries.move_to_end(key)
+                return response
+            del self.entries[key]
+
+        if self.db is not None:
+            row = self.db.execute(
+                "SELECT response, expires_at FROM completions WHERE key = ?",
+                (key,),
+            ).fetchone()
+            if row is not None:
+                response, expires_at = row
+                if expires_at is None or expires_at > now:
+                    self.store(key, response, expires_at)
+                    self.disk_hits += 1
+                    return response
+                self.db.execute("DELETE FROM completions WHERE key = ?", (key,))
+                self.db.commit()
+        return None
+
+    def put(self, key: str, response: str):
+        expires_at = time.time() + self.ttl if self.ttl is not None else None
+        with self.lock:
+            self.store(key, response, expires_at)
+            if self.db is not None:
+                self.db.execute(
+                    "INSERT OR REPLACE INTO completions VALUES (?, ?, ?)",
+                    (key, response, expires_at),
+                )
+                self.db.commit()
+
+    def store(self, key, response, expires_at):
+        # caller holds the lock
+        self.entries[key] = (response, expires_at)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def invalidate(self, key: str):
+        """Remove one entry from both tiers"""
+        with self.lock:
+            self.entries.pop(key, None)
+            if self.db is not None:
+                self.db.execute("DELETE FROM completions WHERE key = ?", (key,))
+                self.db.commit()
+
+    def clear(self):
+        """Remove every entry from both tiers"""
+        with self.lock:
+            self.entries.clear()
+            if self.db is not None:
+                self.db.execute("DELETE FROM completions")
+                self.db.commit()
+
+    def stats(self) -> dict:
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "entries": len(self.entries),
+                "max_entries": self.max_entries,
+            }
+
+    def close(self):
+        with self.lock:
+            if self.db is not None:
+                self.db.close()
+                self.db = None
@@ -0,0 +1,99 @@
+# Process-wide pool of the HTTP clients of the backends served over HTTP
+# (Ollama, vLLM and Hugging Face servers). Each api_base gets one client
+# keeping its connections alive, shared by every backend and LLM core that
+# sends requests to it, so that a request does not open a new TCP (and TLS)
+# connection.
+
+from threading import Lock
+
+import httpx
+from litellm.llms.custom_httpx.http_handler import HTTPHandler
+
+
+class HttpClientPool:
+    """
+    Clients keyed by api_base and connection settings.
+
+    Args:
+        max_connections (int)           : Connections open at once to an
+                                          api_base.
+        max_keepalive_connections (int) : Idle connections kept open.
+        keepalive_expiry (float)        : Seconds an idle connection is kept.
+        http2 (bool)                    : Use HTTP/2 with the servers that
+                                          support it, needs the h2 package.
+    """
+
+    def __init__(
+        self,
+        max_connections: int = 64,
+        max_keepalive_connections: int = 32,
+        keepalive_expiry: float = 60.0,
+        http2: bool = False,
+    ):
+        self.max_connections = max_connections
+        self.max_keepalive_connections = max_keepalive_connections
+        self.keepalive_expiry = keepalive_expiry
+        self.http2 = http2
+        self.clients = {}  # (api_base, settings) -> HTTPHandler
+        self.lock = Lock()
+
+    def configure(self, **settings):
+        """Change the settings of the clients created from now on"""
+        with self.lock:
+            for name, value in settings.items():
+                if value is not None:
+                    setattr(self, name, value)
+
+    def settings(self):
+        return (
+            self.max_connections,
+            self.max_keepalive_connections,
+            self.keepalive_expiry,
+            self.http2,
+        )
+
+    def get(self, api_base: str, timeout: float = 600.0) -> HTTPHandler:
+        """The client of api_base, given to litellm as ``client``"""
+        with self.lock:
+            key = (api_base, timeout) + self.settings()
+            client = self.clients.get(key)
+            if client is None:
+                limits = httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_keepalive_connections,
+                    keepalive_expiry=self.keepalive_expiry,
+                )
+                client = HTTPHandler(
+                    timeout=timeout,
+                    client=httpx.Client(
+                        limits=limits,
+                        http2=self.http2,
+                        timeout=timeout,
+                        follow_redirects=True,
+                    ),
+                )
+                self.clients[key] = client
+            return client
+
+    def close(self):
+        with self.lock:
+            for client in self.clients.values():
+                client.close()
+            self.clients.clear()
+
+    def stats(self) -> dict:
+        with self.lock:
+            return {
+                "clients": [
+                    {"api_base": api_base, "timeout": timeout}
+                    for api_base, timeout, *_ in self.clients
+                ],
+                "max_connections": self.max_connections,
+                "max_keepalive_connections": self.max_keepalive_connections,
+                "keepalive_expiry": self.keepalive_expiry,
+                "http2": self.http2,
+            }
+
+
+# shared by all the LLM cores of the process
+http_clients = HttpClientPool()
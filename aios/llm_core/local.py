@@ -1,48 +1,217 @@
-from transformers import AutoTokenizer, AutoModelForCausalLM
+from transformers import AutoTokenizer, AutoModelForCausalLM, StoppingCriteria, TextIteratorStreamer
 from litellm import completion
 
+from threading import Event, Thread
+
 import os
 
 from aios.config.config_manager import config
+from aios.llm_core.http_pool import http_clients
+from aios.llm_core.model_pool import model_pool
+from aios.llm_core.prefix_cache import KVCacheStore, PromptTokenCache
+
+def stream_text(response):
+    """Yield the text chunks of a streamed litellm completion"""
+    for chunk in response:
+        if chunk.choices and chunk.choices[0].delta.content:
+            yield chunk.choices[0].delta.content
+
+class StopOnEvent(StoppingCriteria):
+    """Stop a generation running in another thread once the event is set"""
+    def __init__(self, event):
+        self.event = event
+
+    def __call__(self, input_ids, scores, **kwargs):
+        return self.event.is_set()
+
+# Decoding of the models loaded in process. "beam" is the beam search the
+# backend used to run for every request, several times slower than a single
+# beam on CPU; streamed generations always use a single beam.
+DECODING_PROFILES = {
+    "greedy": {"num_beams": 1, "do_sample": False},
+    "sample": {"num_beams": 1, "do_sample": True, "top_k": 10},
+    "beam": {"num_beams": 4, "do_sample": True, "top_k": 10, "early_stopping": True},
+}
 
 class HfLocalBackend:
-    def __init__(self, model_name, device="auto", max_gpu_memory=None, hostname=None):
+    def __init__(
+        self,
+        model_name,
+        device="auto",
+        max_gpu_memory=None,
+        hostname=None,
+        dtype="auto",
+        max_new_tokens=256,
+        decoding="sample",
+        kv_cache_entries=4,
+        timeout=600.0,
+    ):
         print("\n=== HfLocalBackend Initialization ===")
         print(f"Model name: {model_name}")
         print(f"Checking HF API key:")
         print(f"HUGGING_FACE_API_KEY in env: {'Yes' if 'HUGGING_FACE_API_KEY' in os.environ else 'No'}")
         print(f"HF_AUTH_TOKEN in env: {'Yes' if 'HF_AUTH_TOKEN' in os.environ else 'No'}")
         
+        if decoding not in DECODING_PROFILES:
+            raise ValueError(
+                f"Unknown decoding profile {decoding}, expected one of {list(DECODING_PROFILES)}"
+            )
+
         self.model_name = model_name
         self.device = device
         self.max_gpu_memory = max_gpu_memory
         self.hostname = hostname
+        self.dtype = dtype
+        self.max_new_tokens = max_new_tokens
+        self.decoding = decoding
+        self.kv_cache_entries = kv_cache_entries
+        self.timeout = timeout
+
+        # Only the model loaded in process generates in batches
+        self.supports_batching = self.hostname is None
 
         # If a hostname is given, then this HF instance is hosted as a web server.
-        # Therefore, do not start the AIOS-based HF instance.
-        if self.hostname is not None:
-            return
-        
-        self.model = AutoModelForCausalLM.from_pretrained(
-            model_name,
-            device_map=device,
+        # Therefore, do not start the AIOS-based HF instance. Otherwise the
+        # model is loaded from the process-wide model pool when the first
+        # request is generated.
+
+    def load_model(self):
+        """Load the weights and the tokenizer, called by the model pool"""
+        if self.dtype == "auto":
+            torch_dtype = "auto"
+        else:
+            import torch
+
+            torch_dtype = getattr(torch, self.dtype)
+
+        model = AutoModelForCausalLM.from_pretrained(
+            self.model_name,
+            device_map=self.device,
             max_memory=self.max_gpu_memory,
+            torch_dtype=torch_dtype,
             use_auth_token=os.environ["HUGGING_FACE_API_KEY"],
         )
-        self.tokenizer = AutoTokenizer.from_pretrained(
-            model_name,
-            device_map=device,
+        tokenizer = AutoTokenizer.from_pretrained(
+            self.model_name,
+            device_map=self.device,
             use_auth_token=os.environ["HUGGING_FACE_API_KEY"]
         )
-        self.tokenizer.chat_template = "{% for message in messages %}{% if message['role'] == 'user' %}{{ ' ' }}{% endif %}{{ message['content'] }}{% if not loop.last %}{{ ' ' }}{% endif %}{% endfor %}{{ eos_token }}"
+        tokenizer.chat_template = "{% for message in messages %}{% if message['role'] == 'user' %}{{ ' ' }}{% endif %}{{ message['content'] }}{% if not loop.last %}{{ ' ' }}{% endif %}{% endfor %}{{ eos_token }}"
+        return model, tokenizer
+
+    def loaded(self):
+        """The model and tokenizer from the pool, kept loaded while in use"""
+        return model_pool.lease(self.model_name, self.dtype, self.load_model)
+
+    @staticmethod
+    def prompt_cache(pooled):
+        return pooled.caches.setdefault("prompt_tokens", PromptTokenCache())
+
+    def kv_cache(self, pooled):
+        """The past_key_values kept for the model, None if disabled"""
+        if not self.kv_cache_entries:
+            return None
+        return pooled.caches.setdefault("kv", KVCacheStore(self.kv_cache_entries))
+
+    def generation_kwargs(self, pooled, temperature, stream=False):
+        kwargs = dict(DECODING_PROFILES[self.decoding])
+        # beam search cannot be streamed
+        if stream and kwargs["num_beams"] > 1:
+            kwargs = dict(DECODING_PROFILES["sample"])
+        if kwargs["do_sample"]:
+            kwargs["temperature"] = temperature if temperature > 0.5 else 0.5
+        kwargs.update(
+            max_new_tokens=self.max_new_tokens,
+            num_return_sequences=1,
+            eos_token_id=pooled.tokenizer.eos_token_id,
+            pad_token_id=pooled.tokenizer.pad_token_id
+            if pooled.tokenizer.pad_token_id is not None
+            else pooled.tokenizer.eos_token_id,
+        )
+        return kwargs
+
+    def encode(self, pooled, messages):
+        """Token ids of the prompt of the conversation"""
+        prompt = pooled.tokenizer.apply_chat_template(messages,
+                                                      tokenize=False,
+                                                      add_generation_prompt=True)
+        return self.prompt_cache(pooled).encode(pooled.tokenizer, prompt)
+
+    @staticmethod
+    def model_inputs(pooled, input_ids):
+        import torch
+
+        ids = torch.tensor([input_ids], device=pooled.model.device)
+        return {"input_ids": ids, "attention_mask": torch.ones_like(ids)}
+
+    @staticmethod
+    def padded_inputs(pooled, ids_list, pad_token_id):
+        """
+        Model inputs of several prompts, padded on the left so that every
+        prompt ends right before the generated tokens. The padding is done
+        here rather than by the tokenizer, which is shared with the other
+        requests to the pooled model and must not change its padding side.
+        """
+        import torch
+
+        length = max(len(ids) for ids in ids_list)
+        input_ids = [[pad_token_id] * (length - len(ids)) + ids for ids in ids_list]
+        mask = [[0] * (length - len(ids)) + [1] * len(ids) for ids in ids_list]
+        return {
+            "input_ids": torch.tensor(input_ids, device=pooled.model.device),
+            "attention_mask": torch.tensor(mask, device=pooled.model.device),
+        }
 
     def inference_online(self, messages, temperature, stream=False):
-        return completion(
+        response = completion(
             model="huggingface/" + self.model_name,
             messages=messages,
             temperature=temperature,
             api_base=self.hostname,
-        ).choices[0].message.content
+            stream=stream,
+            client=http_clients.get(self.hostname, self.timeout),
+            timeout=self.timeout,
+        )
+        if stream:
+            return stream_text(response)
+        return response.choices[0].message.content
+
+    def generate_stream(self, input_ids, temperature):
+        """
+        Yield the decoded text while the model generates it in a background
+        thread. The generation stops early if the consumer stops iterating.
+        """
+        with self.loaded() as pooled:
+            yield from self.stream_generation(pooled, input_ids, temperature)
+
+    def stream_generation(self, pooled, input_ids, temperature):
+        streamer = TextIteratorStreamer(pooled.tokenizer,
+                                        skip_prompt=True,
+                                        skip_special_tokens=True)
+        stop = Event()
+        kv_cache = self.kv_cache(pooled)
+        past_key_values = kv_cache.take(input_ids) if kv_cache else None
+
+        def run():
+            output = pooled.model.generate(**self.model_inputs(pooled, input_ids),
+                                           streamer=streamer,
+                                           stopping_criteria=[StopOnEvent(stop)],
+                                           past_key_values=past_key_values,
+                                           return_dict_in_generate=True,
+                                           **self.generation_kwargs(pooled, temperature, stream=True))
+            # a generation stopped early still leaves a valid cache
+            if kv_cache:
+                kv_cache.put(output.sequences[0].tolist(), output.past_key_values)
+
+        thread = Thread(target=run)
+        thread.start()
+        try:
+            for text in streamer:
+                if text:
+                    yield text
+        finally:
+            stop.set()
+            thread.join()
     
     def __call__(
         self,
@@ -52,41 +221,59 @@ class HfLocalBackend:
     ):
         if self.hostname is not None:
             return self.inference_online(messages, temperature, stream=stream)
-        
-        if stream:
-            raise NotImplemented
-
-        inputs = self.tokenizer.apply_chat_template(messages,
-                                                       tokenize=True,
-                                                       add_generation_prompt=True,
-                                                       return_dict=True,
-                                                       return_tensors="pt")
-        inputs = {k: v.to(self.model.device) for k, v in inputs.items()}
-        temperature = temperature if temperature > 0.5 else 0.5
-        response  = self.model.generate(**inputs,
-                                        temperature=temperature,
-                                        max_length=4096,
-                                        top_k=10,
-                                        num_beams=4,
-                                        early_stopping=True,
-                                        do_sample=True,
-                                        num_return_sequences=1,
-                                        eos_token_id=self.tokenizer.eos_token_id)
-        length    = inputs["input_ids"].shape[1]
-        result    = self.tokenizer.decode(response[0][length:])
+
+        with self.loaded() as pooled:
+            input_ids = self.encode(pooled, messages)
+
+            if stream:
+                return self.generate_stream(input_ids, temperature)
+
+            return self.generate(pooled, input_ids, temperature)
+
+    def generate(self, pooled, input_ids, temperature):
+        kwargs    = self.generation_kwargs(pooled, temperature)
+        # the cache of a conversation holds a single sequence, not the beams
+        kv_cache  = self.kv_cache(pooled) if kwargs["num_beams"] == 1 else None
+        past_key_values = kv_cache.take(input_ids) if kv_cache else None
+
+        output    = pooled.model.generate(**self.model_inputs(pooled, input_ids),
+                                          past_key_values=past_key_values,
+                                          return_dict_in_generate=True,
+                                          **kwargs)
+        sequence  = output.sequences[0]
+        if kv_cache:
+            kv_cache.put(sequence.tolist(), output.past_key_values)
+
+        result    = pooled.tokenizer.decode(sequence[len(input_ids):],
+                                            skip_special_tokens=True)
 
         return result
 
+    def batch_generate(self, messages_list, temperature):
+        """Generate the responses of several conversations in one padded batch"""
+        with self.loaded() as pooled:
+            ids_list  = [self.encode(pooled, messages) for messages in messages_list]
+            kwargs    = self.generation_kwargs(pooled, temperature)
+            inputs    = self.padded_inputs(pooled, ids_list, kwargs["pad_token_id"])
+            response  = pooled.model.generate(**inputs, **kwargs)
+            length    = inputs["input_ids"].shape[1]
+            results   = [
+                pooled.tokenizer.decode(output[length:], skip_special_tokens=True)
+                for output in response
+            ]
+
+            return results
+
 class VLLMLocalBackend:
-    def __init__(self, model_name, device="auto", max_gpu_memory=None, hostname=None):
+    def __init__(self, model_name, device="auto", max_gpu_memory=None, hostname=None, timeout=600.0):
         print("\n=== VLLMLocalBackend Initialization ===")
         print(f"Model name: {model_name}")
         
         self.model_name = model_name
         self.device = device
         self.max_gpu_memory = max_gpu_memory
-        # self.hostname = hostname
-        self.hostname = "http://localhost:8001"
+        self.hostname = hostname or "http://localhost:8001"
+        self.timeout = timeout
 
         # If a hostname is given, then this vLLM instance is hosted as a web server.
         # Therefore, do not start the AIOS-based vLLM instance.
@@ -101,7 +288,7 @@ class VLLMLocalBackend:
                 tensor_parallel_size=1 if max_gpu_memory is None else len(max_gpu_memory)
             )
             self.tokenizer = AutoTokenizer.from_pretrained(model_name)
-            self.sampling_params = vllm.SamplingParams(temperature=temperature)
+            self.sampling_params = vllm.SamplingParams()
             
         except ImportError:
             raise ImportError("Could not import vllm Python package"
@@ -110,13 +297,18 @@ class VLLMLocalBackend:
             print("Error loading vllm model:", err)
 
     def inference_online(self, messages, temperature, stream=False):
-        breakpoint()
-        return completion(
+        response = completion(
             model="hosted_vllm/" + self.model_name,
             messages=messages,
             temperature=temperature,
             api_base=self.hostname,
-        ).choices[0].message.content
+            stream=stream,
+            client=http_clients.get(self.hostname, self.timeout),
+            timeout=self.timeout,
+        )
+        if stream:
+            return stream_text(response)
+        return response.choices[0].message.content
 
     def __call__(
         self,
@@ -129,9 +321,6 @@ class VLLMLocalBackend:
         
         assert self.model
         assert self.sampling_params
-        # breakpoint()
-        if stream:
-            raise NotImplemented
 
         # parameters = vllm.SamplingParams(temperature=temperature)
         prompt     = self.tokenizer.apply_chat_template(messages,
@@ -139,16 +328,20 @@ class VLLMLocalBackend:
         response   = self.model.generate(prompt, self.sampling_params)
         result     = response[0].outputs[0].text
 
+        # the offline engine returns whole responses, sent as a single chunk
+        if stream:
+            return iter([result])
         return result
 
 class OllamaBackend:
-    def __init__(self, model_name, device="auto", max_gpu_memory=None, hostname=None):
+    def __init__(self, model_name, device="auto", max_gpu_memory=None, hostname=None, timeout=600.0):
         print("\n=== OllamaBackend Initialization ===")
         print(f"Model name: {model_name}")
         print(f"Hostname: {hostname or 'http://localhost:11434'}")
         
         self.model_name = model_name
         self.hostname = hostname or "http://localhost:11434"
+        self.timeout = timeout
         
     def __call__(
         self,
@@ -162,7 +355,12 @@ class OllamaBackend:
             messages=messages,
             temperature=temperature,
             # tools=tools,
-            api_base=self.hostname
-        ).choices[0].message.content
+            api_base=self.hostname,
+            stream=stream,
+            client=http_clients.get(self.hostname, self.timeout),
+            timeout=self.timeout,
+        )
+        if stream:
+            return stream_text(res)
         # breakpoint()
-        return res
+        return res.choices[0].message.content
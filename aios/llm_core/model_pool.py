@@ -0,0 +1,174 @@
+# Process-wide pool of the models loaded in process by the local backends.
+# Loading the weights of a model takes minutes, so the models are loaded on
+# first use and shared by every backend that asks for the same model, and
+# they stay loaded when the LLM core is set up again (/core/llm/setup,
+# /core/refresh). Under a memory budget, the least recently used models are
+# unloaded to make room for a new one.
+
+from collections import OrderedDict
+from contextlib import contextmanager
+from threading import Lock
+
+import gc
+
+
+class PooledModel:
+    """A loaded model and its tokenizer"""
+
+    def __init__(self, model, tokenizer):
+        self.model = model
+        self.tokenizer = tokenizer
+        self.size = self.memory_footprint(model)
+        # number of generations using the model, which cannot be unloaded
+        self.leases = 0
+        # caches derived from the model by the backends (prompt tokens,
+        # attention keys and values), unloaded with it
+        self.caches = {}
+
+    @staticmethod
+    def memory_footprint(model) -> int:
+        """Bytes taken by the parameters and buffers of the model"""
+        if hasattr(model, "get_memory_footprint"):
+            return model.get_memory_footprint()
+        if hasattr(model, "parameters"):
+            return sum(p.numel() * p.element_size() for p in model.parameters())
+        return 0
+
+
+class ModelPool:
+    """
+    Models keyed by name and dtype, in least recently used order.
+
+    Args:
+        max_memory (int, optional) : Bytes the loaded models may take in
+                                     total. Defaults to None (no limit).
+    """
+
+    def __init__(self, max_memory: int | None = None):
+        self.max_memory = max_memory
+        self.models = OrderedDict()  # (name, dtype) -> PooledModel
+        self.lock = Lock()
+        # one lock per key, so that a model is loaded once while the other
+        # models stay available
+        self.load_locks = {}
+
+        self.hits = 0
+        self.loads = 0
+        self.evictions = 0
+
+    def get(self, name: str, dtype: str, loader, lease: bool = False) -> PooledModel:
+        """
+        Return the model, loading it with ``loader()`` -> (model, tokenizer)
+        if it is not in the pool. With ``lease``, the lease count is raised
+        under the same lock the model is taken with, so it cannot be evicted
+        in between.
+        """
+        key = (name, dtype)
+
+        def take(entry):
+            # caller holds the lock
+            if lease:
+                entry.leases += 1
+            return entry
+
+        with self.lock:
+            if key in self.models:
+                self.models.move_to_end(key)
+                self.hits += 1
+                return take(self.models[key])
+            load_lock = self.load_locks.setdefault(key, Lock())
+
+        with load_lock:
+            # another thread may have loaded the model in the meantime
+            with self.lock:
+                if key in self.models:
+                    self.models.move_to_end(key)
+                    self.hits += 1
+                    return take(self.models[key])
+
+            entry = PooledModel(*loader())
+
+            with self.lock:
+                self.models[key] = entry
+                self.loads += 1
+                take(entry)
+                self.evict(keep=key)
+                return entry
+
+    @contextmanager
+    def lease(self, name: str, dtype: str, loader):
+        """The model, which is not unloaded until the block exits"""
+        entry = self.get(name, dtype, loader, lease=True)
+        try:
+            yield entry
+        finally:
+            with self.lock:
+                entry.leases -= 1
+
+    def memory_used(self) -> int:
+        return sum(entry.size for entry in self.models.values())
+
+    def evict(self, keep=None):
+        # caller holds the lock
+        if self.max_memory is None:
+            return
+
+        evicted = False
+        for key in list(self.models):
+            if self.memory_used() <= self.max_memory:
+                break
+            if key == keep or self.models[key].leases > 0:
+                continue
+            del self.models[key]
+            self.evictions += 1
+            evicted = True
+
+        if evicted:
+            self.free_memory()
+
+    @staticmethod
+    def free_memory():
+        gc.collect()
+        try:
+            import torch
+
+            if torch.cuda.is_available():
+                torch.cuda.empty_cache()
+        except ImportError:
+            pass
+
+    def set_max_memory(self, max_memory: int | None):
+        with self.lock:
+            self.max_memory = max_memory
+            self.evict()
+
+    def unload(self, name: str, dtype: str):
+        with self.lock:
+            if self.models.pop((name, dtype), None) is not None:
+                self.free_memory()
+
+    def stats(self) -> dict:
+        with self.lock:
+            return {
+                "models": [
+                    {
+                        "name": name,
+                        "dtype": dtype,
+                        "size": entry.size,
+                        "leases": entry.leases,
+                        "caches": {
+                            kind: cache.stats() for kind, cache in entry.caches.items()
+                        },
+                    }
+                    for (name, dtype), entry in self.models.items()
+                ],
+                "memory_used": self.memory_used(),
+                "max_memory": self.max_memory,
+                "hits": self.hits,
+                "loads": self.loads,
+                "evictions": self.evictions,
+            }
+
+
+# shared by all the LLM cores of the process
+model_pool = ModelPool()
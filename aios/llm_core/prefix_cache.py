@@ -0,0 +1,184 @@
+# Caches of the models loaded in process that make the next round of a
+# conversation cheaper than the previous one. A round sends the whole
+# conversation again, of which only the last messages are new:
+#
+# - PromptTokenCache keeps the token ids of the recent prompts, so that a
+#   prompt sharing a prefix with one of them only has its new text
+#   tokenized.
+# - KVCacheStore keeps the attention keys and values (past_key_values) of
+#   the recent generations, so that the model only encodes the tokens that
+#   follow the longest prefix it has already seen.
+
+from bisect import bisect_right
+from collections import OrderedDict
+from threading import Lock
+
+
+def common_prefix_length(a, b) -> int:
+    """Length of the common prefix of two strings or lists"""
+    # binary search comparing slices, which runs in C
+    low, high = 0, min(len(a), len(b))
+    while low < high:
+        middle = (low + high + 1) // 2
+        if a[:middle] == b[:middle]:
+            low = middle
+        else:
+            high = middle - 1
+    return low
+
+
+class PromptTokenCache:
+    """
+    Token ids of the recently tokenized prompts.
+
+    A new prompt keeps the tokens of the cached prompt it shares the
+    longest text prefix with, up to a few tokens (``backoff``) before the
+    end of that prefix, and only the rest of its text is tokenized. The
+    tokens near the end of the prefix are tokenized again since they may
+    merge with the new text, e.g. the end of sequence token closing the
+    previous prompt is followed by the new messages. The character offsets
+    of the tokens come from the fast tokenizers; with a tokenizer that has
+    none the prompts are tokenized in full.
+    """
+
+    backoff = 8
+
+    def __init__(self, max_entries: int = 16):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()  # text -> (ids, ends)
+        self.lock = Lock()
+        self.supported = True
+
+        self.hits = 0
+        self.misses = 0
+
+    def encode(self, tokenizer, text: str) -> list[int]:
+        if not self.supported:
+            return tokenizer(text, add_special_tokens=False)["input_ids"]
+
+        with self.lock:
+            best, best_length = None, 0
+            for cached in self.entries:
+                length = common_prefix_length(cached, text)
+                if length > best_length:
+                    best, best_length = cached, length
+            if best is not None:
+                self.entries.move_to_end(best)
+                ids, ends = self.entries[best]
+                # tokens that end within the common prefix
+                keep = bisect_right(ends, best_length) - self.backoff
+
+        try:
+            if best == text:
+                self.hits += 1
+                return list(ids)
+            elif best is not None and keep > 0:
+                self.hits += 1
+                cut = ends[keep - 1]
+                suffix_ids, suffix_ends = self.tokenize(tokenizer, text[cut:])
+                ids = ids[:keep] + suffix_ids
+                ends = ends[:keep] + [cut + end for end in suffix_ends]
+            else:
+                self.misses += 1
+                ids, ends = self.tokenize(tokenizer, text)
+        except NotImplementedError:
+            # slow tokenizers do not return offsets
+            self.supported = False
+            return tokenizer(text, add_special_tokens=False)["input_ids"]
+
+        with self.lock:
+            self.entries[text] = (ids, ends)
+            self.entries.move_to_end(text)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+        return list(ids)
+
+    @staticmethod
+    def tokenize(tokenizer, text):
+        encoding = tokenizer(
+            text, add_special_tokens=False, return_offsets_mapping=True
+        )
+        ends = [end for _, end in encoding["offset_mapping"]]
+        return list(encoding["input_ids"]), ends
+
+    def stats(self) -> dict:
+        with self.lock:
+            return {
+                "entries": len(self.entries),
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+class KVCacheStore:
+    """
+    past_key_values of the recent generations, with the token ids they were
+    computed from. A generation takes the entry sharing the longest prefix
+    with its prompt, cropped to that prefix, and puts back the cache extended
+    with its own tokens. An entry is only used by one generation at a time.
+
+    Args:
+        max_entries (int) : Number of caches kept, each one takes the memory
+                            of the keys and values of a whole conversation.
+        min_prefix (int)  : Shortest common prefix worth reusing a cache.
+    """
+
+    def __init__(self, max_entries: int = 4, min_prefix: int = 16):
+        self.max_entries = max_entries
+        self.min_prefix = min_prefix
+        self.entries = OrderedDict()  # id -> (token ids, cache)
+        self.next_id = 0
+        self.lock = Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.reused_tokens = 0
+
+    def take(self, input_ids: list[int]):
+        """The cache to continue from, or None"""
+        with self.lock:
+            best, best_length = None, 0
+            for entry_id, (ids, _) in self.entries.items():
+                length = common_prefix_length(ids, input_ids)
+                if length > best_length:
+                    best, best_length = entry_id, length
+
+            if best is None or best_length < self.min_prefix:
+                self.misses += 1
+                return None
+            _, cache = self.entries.pop(best)
+
+        # the last token of the prompt is encoded again to get the logits of
+        # the first generated token
+        length = min(best_length, len(input_ids) - 1)
+        if length < cache.get_seq_length():
+            if not hasattr(cache, "crop"):
+                with self.lock:
+                    self.misses += 1
+                return None
+            cache.crop(length)
+
+        with self.lock:
+            self.hits += 1
+            self.reused_tokens += length
+        return cache
+
+    def put(self, token_ids: list[int], cache):
+        """Keep the cache computed over the first tokens of token_ids"""
+        if cache is None or not hasattr(cache, "get_seq_length"):
+            return
+        ids = token_ids[:cache.get_seq_length()]
+        with self.lock:
+            self.entries[self.next_id] = (ids, cache)
+            self.next_id += 1
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def stats(self) -> dict:
+        with self.lock:
+            return {
+                "entries": len(self.entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "reused_tokens": self.reused_tokens,
+            }
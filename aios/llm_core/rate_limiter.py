@@ -0,0 +1,276 @@
+# Rate limiting of the LLM requests. Hosted providers limit the requests and
+# the tokens per minute (RPM/TPM) of an API key; the limiter keeps a token
+# bucket of each limit so that the requests are held back before the
+# provider starts answering 429. Agents can also get their own quota, so
+# that a single agent cannot use up the budget shared by all the agents.
+#
+# The scheduler asks the limiter whether a syscall can be admitted, and
+# skips the syscalls of the agents that are over their quota. The LLM
+# adapter routes the admitted syscalls to the endpoints whose provider still
+# has budget, and charges the provider.
+
+from threading import Lock
+
+import time
+
+
+class TokenBucket:
+    """
+    Bucket holding up to ``capacity`` units, refilled by ``rate`` units per
+    second. It starts full. The level can go below zero when more units are
+    charged than were available (e.g. the completion tokens of a request),
+    which holds back the next requests until the debt is refilled.
+    """
+
+    def __init__(self, capacity: float, rate: float):
+        self.capacity = capacity
+        self.rate = rate
+        self.level = capacity
+        self.updated = time.monotonic()
+
+    def refill(self, now):
+        # now may predate the bucket, e.g. read before the quota of a new
+        # agent was created, and must not drain it
+        if now <= self.updated:
+            return
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def available(self, amount, now) -> bool:
+        self.refill(now)
+        # a request larger than the bucket waits for a full bucket
+        return self.level >= min(amount, self.capacity)
+
+    def charge(self, amount, now):
+        self.refill(now)
+        self.level = min(self.capacity, self.level - amount)
+
+    def wait_time(self, amount, now) -> float:
+        """Seconds until ``amount`` units are available"""
+        self.refill(now)
+        missing = min(amount, self.capacity) - self.level
+        return max(0.0, missing / self.rate) if self.rate > 0 else float("inf")
+
+
+class Quota:
+    """
+    Requests and tokens per minute, either limit can be None (unlimited).
+    The buckets hold ``burst`` seconds of budget: a minute by default, less
+    for providers that enforce their limits over shorter windows.
+    """
+
+    def __init__(
+        self, rpm: float | None = None, tpm: float | None = None, burst: float = 60
+    ):
+        self.requests = TokenBucket(rpm * burst / 60, rpm / 60) if rpm else None
+        self.tokens = TokenBucket(tpm * burst / 60, tpm / 60) if tpm else None
+
+    def buckets(self, tokens):
+        if self.requests is not None:
+            yield self.requests, 1
+        if self.tokens is not None:
+            yield self.tokens, tokens
+
+    def available(self, tokens, now) -> bool:
+        return all(bucket.available(amount, now) for bucket, amount in self.buckets(tokens))
+
+    def charge(self, tokens, now):
+        for bucket, amount in self.buckets(tokens):
+            bucket.charge(amount, now)
+
+    def charge_tokens(self, tokens, now):
+        if self.tokens is not None:
+            self.tokens.charge(tokens, now)
+
+    def wait_time(self, tokens, now) -> float:
+        return max(
+            (bucket.wait_time(amount, now) for bucket, amount in self.buckets(tokens)),
+            default=0.0,
+        )
+
+    def exhaust(self, now):
+        for bucket, _ in self.buckets(0):
+            bucket.refill(now)
+            bucket.level = min(bucket.level, 0.0)
+
+    def to_dict(self, now):
+        status = {}
+        if self.requests is not None:
+            self.requests.refill(now)
+            status["requests_available"] = self.requests.level
+        if self.tokens is not None:
+            self.tokens.refill(now)
+            status["tokens_available"] = self.tokens.level
+        return status
+
+
+class RateLimiter:
+    """
+    Request and token rate limits of the LLM providers and of the agents.
+
+    Args:
+        provider_limits (dict, optional) : Limits of each provider, e.g.
+                                           {"openai": {"rpm": 500, "tpm": 30000}},
+                                           with an optional "burst" in
+                                           seconds. The provider of an
+                                           endpoint is the prefix of its
+                                           model name.
+        agent_rpm (float, optional)      : Requests per minute of each agent.
+        agent_tpm (float, optional)      : Tokens per minute of each agent.
+        agent_quotas (dict, optional)    : Limits of specific agents,
+                                           overriding agent_rpm and
+                                           agent_tpm, e.g.
+                                           {"example/academic_agent": {"rpm": 10}}.
+    """
+
+    # rough number of characters per token, used to estimate the size of a
+    # request before it is sent
+    chars_per_token = 4
+
+    def __init__(
+        self,
+        provider_limits: dict | None = None,
+        agent_rpm: float | None = None,
+        agent_tpm: float | None = None,
+        agent_quotas: dict | None = None,
+    ):
+        self.providers = {
+            provider: Quota(limits.get("rpm"), limits.get("tpm"), limits.get("burst", 60))
+            for provider, limits in (provider_limits or {}).items()
+        }
+        self.agent_rpm = agent_rpm
+        self.agent_tpm = agent_tpm
+        self.agent_quotas = agent_quotas or {}
+        self.agents = {}
+        self.lock = Lock()
+
+        self.admitted = 0
+        self.rate_limited = 0
+
+    def enabled(self) -> bool:
+        return bool(
+            self.providers or self.agent_rpm or self.agent_tpm or self.agent_quotas
+        )
+
+    @staticmethod
+    def provider_of(endpoint) -> str:
+        if isinstance(endpoint, str):
+            return endpoint.split("/", 1)[0]
+        return type(endpoint).__name__
+
+    def estimate_tokens(self, messages) -> int:
+        chars = sum(len(str(message.get("content") or "")) for message in messages)
+        return chars // self.chars_per_token + 4 * len(messages)
+
+    def agent_quota(self, agent_name):
+        # caller holds the lock
+        quota = self.agents.get(agent_name)
+        if quota is None:
+            limits = self.agent_quotas.get(agent_name, {})
+            quota = Quota(
+                limits.get("rpm", self.agent_rpm),
+                limits.get("tpm", self.agent_tpm),
+                limits.get("burst", 60),
+            )
+            self.agents[agent_name] = quota
+        return quota
+
+    def provider_quota(self, endpoint):
+        return self.providers.get(self.provider_of(endpoint))
+
+    def try_admit(self, syscall, endpoints) -> bool:
+        """
+        Whether the syscall can be sent now: its agent is within its quota
+        and at least one of the endpoints has budget left. An admitted
+        syscall is charged to the quota of its agent, once, even if it is
+        fetched again after a preemption.
+        """
+        if syscall.admitted:
+            return True
+
+        tokens = self.estimate_tokens(syscall.query.messages)
+        now = time.monotonic()
+        with self.lock:
+            agent = self.agent_quota(syscall.agent_name)
+            if not agent.available(tokens, now) or not any(
+                quota is None or quota.available(tokens, now)
+                for quota in map(self.provider_quota, endpoints)
+            ):
+                return False
+
+            agent.charge(tokens, now)
+            self.admitted += 1
+            syscall.admitted = True
+            return True
+
+    def wait_time(self, syscalls, endpoints) -> float:
+        """Seconds until one of the syscalls may be admitted"""
+        now = time.monotonic()
+        with self.lock:
+            wait = float("inf")
+            for syscall in syscalls:
+                tokens = self.estimate_tokens(syscall.query.messages)
+                provider_wait = min(
+                    quota.wait_time(tokens, now) if quota is not None else 0.0
+                    for quota in map(self.provider_quota, endpoints)
+                )
+                agent_wait = self.agent_quota(syscall.agent_name).wait_time(tokens, now)
+                wait = min(wait, max(provider_wait, agent_wait))
+            return wait
+
+    def has_budget(self, endpoint, tokens) -> bool:
+        quota = self.provider_quota(endpoint)
+        if quota is None:
+            return True
+        with self.lock:
+            return quota.available(tokens, time.monotonic())
+
+    def provider_wait_time(self, endpoints, tokens) -> float:
+        """Seconds until one of the endpoints has budget for the request"""
+        now = time.monotonic()
+        with self.lock:
+            return min(
+                quota.wait_time(tokens, now) if quota is not None else 0.0
+                for quota in map(self.provider_quota, endpoints)
+            )
+
+    def charge_request(self, endpoint, tokens):
+        """Charge a request sent to the endpoint to its provider"""
+        quota = self.provider_quota(endpoint)
+        if quota is not None:
+            with self.lock:
+                quota.charge(tokens, time.monotonic())
+
+    def charge_completion(self, agent_name, endpoint, tokens):
+        """Charge the tokens generated for the agent by the endpoint"""
+        now = time.monotonic()
+        with self.lock:
+            self.agent_quota(agent_name).charge_tokens(tokens, now)
+            quota = self.provider_quota(endpoint)
+            if quota is not None:
+                quota.charge_tokens(tokens, now)
+
+    def exhaust(self, endpoint):
+        """The provider of the endpoint answered 429: its budget is used up"""
+        quota = self.provider_quota(endpoint)
+        if quota is not None:
+            with self.lock:
+                quota.exhaust(time.monotonic())
+                self.rate_limited += 1
+
+    def stats(self) -> dict:
+        now = time.monotonic()
+        with self.lock:
+            return {
+                "admitted": self.admitted,
+                "rate_limited": self.rate_limited,
+                "providers": {
+                    provider: quota.to_dict(now)
+                    for provider, quota in self.providers.items()
+                },
+                "agents": {
+                    agent_name: quota.to_dict(now)
+                    for agent_name, quota in self.agents.items()
+                    if quota.requests is not None or quota.tokens is not None
+                },
+            }
@@ -1,4 +1,10 @@
 from enum import Enum
+from threading import Lock
+
+import hashlib
+import json
+import math
+import random
 
 """
 Load balancing strategies. Each class represents a strategy which returns the
@@ -6,26 +12,279 @@ next endpoint that the router should use.
 
 Each strategy must implement the following:
     __init__(self, llm_name: list[str])
-    __call__(self)
+    __call__(self, candidates: list[str] | None = None, messages: list | None = None)
 
 The llm_name list contains all the endpoints that the router was initialized
 with. It is the strategy's job to then calculate which endpoint should be
 used whenever the strategy is called in __call__, and then return the name of
-the specific LLM endpoint.
+the specific LLM endpoint. When candidates is given, the endpoint must be one
+of them (the router passes the endpoints that still have free slots). The
+messages of the request are given so that a strategy can route on their
+content. When every endpoint is saturated, the router calls
+overflow(candidates, messages) instead, which defaults to the endpoint with
+the fewest requests in flight.
+
+peek(candidates, messages) returns the endpoint that __call__ would return,
+without updating the state of the strategy, so that the router can resolve
+the model of a request (e.g. to look up its cached completion) without
+taking a slot of the endpoint.
+
+The router reports every request with on_start(endpoint) when it is sent and
+on_finish(endpoint, latency, error) when it returns, so that the strategies
+can keep statistics of the endpoints. The strategies are called from several
+threads at once.
 """
 
 class RouterStrategy(Enum):
     SIMPLE = 0,
+    LEAST_OUTSTANDING = 1,
+    POWER_OF_TWO = 2,
+    LATENCY_WEIGHTED = 3,
+    PREFIX_AFFINITY = 4,
+
+class EndpointStats:
+    """
+    Statistics of an endpoint: number of requests in flight, and exponentially
+    weighted moving averages of the latency (seconds) and of the error rate.
+    """
+    # weight of the latest request in the moving averages
+    alpha = 0.2
+
+    def __init__(self):
+        self.in_flight = 0
+        self.latency = None
+        self.error_rate = 0.0
+        self.requests = 0
+
+    def record(self, latency, error):
+        self.requests += 1
+        self.error_rate += self.alpha * (float(error) - self.error_rate)
+        # failed requests often return early, their latency is not
+        # representative
+        if latency is not None and not error:
+            if self.latency is None:
+                self.latency = latency
+            else:
+                self.latency += self.alpha * (latency - self.latency)
+
+    def to_dict(self):
+        return {
+            "in_flight": self.in_flight,
+            "latency": self.latency,
+            "error_rate": self.error_rate,
+            "requests": self.requests,
+        }
 
 class SimpleStrategy:
+    """Round robin over the endpoints"""
     def __init__(self, llm_name: list[str]):
         self.endpoints = llm_name
         self.idx = 0
+        self.lock = Lock()
+        self.stats = {endpoint: EndpointStats() for endpoint in llm_name}
+
+    def __call__(self, candidates=None, messages=None):
+        return self.get(candidates, messages)
+
+    def get(self, candidates=None, messages=None):
+        with self.lock:
+            for _ in range(len(self.endpoints)):
+                current  = self.endpoints[self.idx]
+                self.idx = (self.idx + 1) % len(self.endpoints)
+                if candidates is None or current in candidates:
+                    return current
+            return candidates[0]
+
+    def peek(self, candidates=None, messages=None):
+        with self.lock:
+            for i in range(len(self.endpoints)):
+                current = self.endpoints[(self.idx + i) % len(self.endpoints)]
+                if candidates is None or current in candidates:
+                    return current
+            return candidates[0]
+
+    def overflow(self, candidates, messages=None):
+        with self.lock:
+            return min(candidates, key=lambda endpoint: self.stats[endpoint].in_flight)
+
+    def on_start(self, endpoint):
+        with self.lock:
+            self.stats[endpoint].in_flight += 1
+
+    def on_finish(self, endpoint, latency=None, error=False):
+        with self.lock:
+            stats = self.stats[endpoint]
+            stats.in_flight -= 1
+            stats.record(latency, error)
+
+    def endpoint_stats(self):
+        with self.lock:
+            return {str(endpoint): stats.to_dict() for endpoint, stats in self.stats.items()}
+
+class LeastOutstandingStrategy(SimpleStrategy):
+    """
+    The endpoint with the fewest requests in flight. Ties are broken in round
+    robin order so that idle endpoints share the load.
+    """
+    def get(self, candidates=None, messages=None):
+        with self.lock:
+            endpoint = self.least_outstanding(candidates)
+            self.idx = (self.idx + 1) % len(self.endpoints)
+            return endpoint
+
+    def peek(self, candidates=None, messages=None):
+        with self.lock:
+            return self.least_outstanding(candidates)
+
+    def least_outstanding(self, candidates=None):
+        # caller holds the lock
+        candidates = candidates or self.endpoints
+        order = {
+            endpoint: (i - self.idx) % len(self.endpoints)
+            for i, endpoint in enumerate(self.endpoints)
+        }
+        return min(
+            candidates,
+            key=lambda endpoint: (self.stats[endpoint].in_flight, order[endpoint]),
+        )
+
+class PowerOfTwoStrategy(SimpleStrategy):
+    """
+    Power of two choices: sample two endpoints at random and take the one
+    with fewer requests in flight, then the lower latency. Close to the least
+    outstanding strategy without all the routers herding to the same
+    endpoint.
+    """
+    def get(self, candidates=None, messages=None):
+        candidates = candidates or self.endpoints
+        if len(candidates) == 1:
+            return candidates[0]
+
+        with self.lock:
+            choices = random.sample(candidates, 2)
+            return min(choices, key=self.load)
+
+    def peek(self, candidates=None, messages=None):
+        # the sample is random, the best of all the candidates stands for it
+        candidates = candidates or self.endpoints
+        with self.lock:
+            return min(candidates, key=self.load)
+
+    def load(self, endpoint):
+        # caller holds the lock
+        return (self.stats[endpoint].in_flight, self.stats[endpoint].latency or 0.0)
+
+class LatencyWeightedStrategy(SimpleStrategy):
+    """
+    The endpoint with the lowest expected completion time: its average
+    latency times the requests it will serve (the ones in flight plus this
+    one), inflated by its error rate since a failed request has to be sent
+    again. An endpoint that has not served any request yet gets one probe
+    request, and is counted as the slowest endpoint until it answers.
+    """
+    def cost(self, endpoint, default_latency):
+        stats = self.stats[endpoint]
+        latency = stats.latency if stats.latency is not None else default_latency
+        return (
+            latency * (stats.in_flight + 1)
+            / max(1.0 - stats.error_rate, 0.05)
+        )
+
+    def get(self, candidates=None, messages=None):
+        candidates = candidates or self.endpoints
+        with self.lock:
+            for endpoint in candidates:
+                stats = self.stats[endpoint]
+                if stats.requests == 0 and stats.in_flight == 0:
+                    return endpoint
+
+            default_latency = max(
+                (self.stats[e].latency for e in candidates if self.stats[e].latency is not None),
+                default=1.0,
+            )
+            return min(candidates, key=lambda endpoint: self.cost(endpoint, default_latency))
+
+    def peek(self, candidates=None, messages=None):
+        # get only reads the statistics
+        return self.get(candidates, messages)
+
+class PrefixAffinityStrategy(LeastOutstandingStrategy):
+    """
+    Routes the requests of a conversation to the same endpoint, so that the
+    prefix cache of a local server (vLLM, Ollama) is reused from one round to
+    the next. The conversation is identified by a hash of its leading
+    messages: the system prompts and the first prefix_turns other messages,
+    which stay the same while the conversation grows.
+
+    Each conversation ranks the endpoints by rendezvous hashing and is sent
+    to the first one in its ranking that is not loaded more than load_factor
+    times the average load (consistent hashing with bounded loads), so a
+    popular endpoint spills over to an endpoint where the conversation is
+    also sent every time it spills. Requests without a conversation are sent
+    to the endpoint with the fewest requests in flight.
+    """
+    prefix_turns = 1
+    load_factor = 2.0
+
+    def __init__(self, llm_name: list[str]):
+        super().__init__(llm_name)
+        self.affinity_hits = 0
+        self.affinity_misses = 0
+
+    def prefix_key(self, messages) -> bytes | None:
+        leading = []
+        turns = 0
+        for message in messages:
+            if message.get("role") != "system":
+                if turns == self.prefix_turns:
+                    break
+                turns += 1
+            leading.append([message.get("role"), message.get("content")])
+
+        if turns == 0:
+            return None
+        return json.dumps(leading, default=str).encode()
+
+    @staticmethod
+    def weight(key: bytes, endpoint) -> bytes:
+        return hashlib.blake2b(key + str(endpoint).encode(), digest_size=8).digest()
+
+    def get(self, candidates=None, messages=None):
+        key = self.prefix_key(messages) if messages else None
+        if key is None:
+            return super().get(candidates)
+
+        with self.lock:
+            endpoint, preferred = self.affinity(key, candidates)
+            if preferred:
+                self.affinity_hits += 1
+            else:
+                self.affinity_misses += 1
+            return endpoint
+
+    def peek(self, candidates=None, messages=None):
+        key = self.prefix_key(messages) if messages else None
+        if key is None:
+            return super().peek(candidates)
+        with self.lock:
+            return self.affinity(key, candidates)[0]
+
+    def affinity(self, key, candidates=None):
+        """
+        The endpoint of the conversation, and whether it is the first one of
+        its ranking. The caller holds the lock.
+        """
+        candidates = candidates or self.endpoints
+        ranking = sorted(
+            self.endpoints, key=lambda endpoint: self.weight(key, endpoint), reverse=True
+        )
+        total = sum(stats.in_flight for stats in self.stats.values())
+        bound = math.ceil(self.load_factor * (total + 1) / len(self.endpoints))
 
-    def __call__(self):
-        return self.get()
+        for endpoint in ranking:
+            if endpoint in candidates and self.stats[endpoint].in_flight < bound:
+                return endpoint, endpoint == ranking[0]
+        return min(candidates, key=lambda endpoint: self.stats[endpoint].in_flight), False
 
-    def get(self):
-        current  = self.endpoints[self.idx]
-        self.idx = (self.idx + 1) % len(self.endpoints)
-        return current
+    def overflow(self, candidates, messages=None):
+        return self.get(candidates, messages)
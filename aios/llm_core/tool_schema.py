@@ -0,0 +1,113 @@
+# Tool sets described in the prompt of the models without native tool calling.
+# Agents send the same tools on every round of a conversation, so each
+# distinct tool set is compiled once into its prompt and the map of the tool
+# names the model sees back to the names of the agent, and reused by the
+# next syscalls sending it.
+
+from collections import OrderedDict
+from threading import Lock
+
+import hashlib
+import json
+
+TOOL_PREFIX_PROMPT = (
+    "In and only in current step, you need to call tools. Available tools are: "
+)
+TOOL_SUFFIX_PROMPT = (
+    "Must call functions that are available. To call a function, respond "
+    "immediately and only with a list of JSON object of the following format:"
+    '[{"name":"function_name_value","parameters":{"parameter_name1":"parameter_value1",'
+    '"parameter_name2":"parameter_value2"}}]'
+)
+
+
+class CompiledTools:
+    """
+    A tool set with the "/" of the tool names replaced by "__", which the
+    models handle better, and the prompt describing it. The tools of the
+    agent are copied, not modified.
+    """
+
+    def __init__(self, tools: list):
+        self.tools = []
+        self.names = {}  # name seen by the model -> name of the agent
+        for tool in tools:
+            name = tool["function"]["name"]
+            if "/" in name:
+                renamed = "__".join(name.split("/"))
+                tool = {**tool, "function": {**tool["function"], "name": renamed}}
+            self.names[tool["function"]["name"]] = name
+            self.tools.append(tool)
+
+        self.prompt = TOOL_PREFIX_PROMPT + json.dumps(self.tools) + TOOL_SUFFIX_PROMPT
+
+    def original_name(self, name: str) -> str:
+        """Name of the agent of a tool called by the model"""
+        if name in self.names:
+            return self.names[name]
+        # a tool the model made up, or renamed differently
+        return name.replace("__", "/")
+
+    def __len__(self):
+        return len(self.tools)
+
+
+def is_tool_call(value) -> bool:
+    """Whether a JSON value of a response is a tool call or a list of them"""
+    if isinstance(value, dict):
+        return "name" in value
+    return (
+        isinstance(value, list)
+        and len(value) > 0
+        and all(isinstance(call, dict) and "name" in call for call in value)
+    )
+
+
+class ToolSchemaRegistry:
+    """
+    Compiled tool sets keyed by a hash of their content, in least recently
+    used order.
+
+    Args:
+        max_entries (int) : Number of tool sets kept, 0 compiles the tools
+                            of every syscall.
+    """
+
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()  # digest -> CompiledTools
+        self.lock = Lock()
+
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def digest(tools: list) -> bytes:
+        # repr is cheaper than json.dumps and as exact for JSON values
+        return hashlib.blake2b(repr(tools).encode(), digest_size=16).digest()
+
+    def compile(self, tools: list) -> CompiledTools:
+        key = self.digest(tools)
+        with self.lock:
+            compiled = self.entries.get(key)
+            if compiled is not None:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return compiled
+            self.misses += 1
+
+        compiled = CompiledTools(tools)
+        if self.max_entries > 0:
+            with self.lock:
+                self.entries[key] = compiled
+                while len(self.entries) > self.max_entries:
+                    self.entries.popitem(last=False)
+        return compiled
+
+    def stats(self) -> dict:
+        with self.lock:
+            return {
+                "entries": len(self.entries),
+                "hits": self.hits,
+                "misses": self.misses,
+            }
@@ -0,0 +1,111 @@
+# Allocator of the ranges of a memory arena (aios.memory.base.Memory), like
+# malloc(3) with segregated free lists: the free ranges are kept in size
+# classes of powers of two, each sorted by size, and a bitmap tells which
+# classes have free ranges. An allocation takes the smallest free range that
+# fits (best fit) in O(log n), and a freed range is merged with the free
+# ranges next to it at once, so the arena does not fragment under churn.
+
+from bisect import bisect_left, insort
+
+
+class SegregatedFreeLists:
+    def __init__(self, size):
+        self.size = size
+        # free ranges by start and by end (exclusive), to find the
+        # neighbours of a freed range
+        self.free_starts = {}
+        self.free_ends = {}
+        # class k holds the free ranges of size in [2 ** (k - 1), 2 ** k),
+        # as sorted (size, start)
+        self.classes = [[] for _ in range(size.bit_length() + 1)]
+        # bit k is set when class k has free ranges
+        self.bitmap = 0
+        # allocated ranges, start -> size
+        self.allocated = {}
+        self.used = 0
+
+        if size > 0:
+            self.insert(0, size)
+
+    def insert(self, start, size):
+        self.free_starts[start] = size
+        self.free_ends[start + size] = start
+        size_class = size.bit_length()
+        insort(self.classes[size_class], (size, start))
+        self.bitmap |= 1 << size_class
+
+    def remove(self, start, size):
+        del self.free_starts[start]
+        del self.free_ends[start + size]
+        size_class = size.bit_length()
+        ranges = self.classes[size_class]
+        ranges.pop(bisect_left(ranges, (size, start)))
+        if not ranges:
+            self.bitmap &= ~(1 << size_class)
+
+    def alloc(self, size):
+        """ start of a free range of size bytes """
+        if size <= 0:
+            raise ValueError(f"Cannot allocate {size} bytes.")
+
+        size_class = size.bit_length()
+        found = None
+        if size_class < len(self.classes):
+            # the smallest range of the class that fits
+            ranges = self.classes[size_class]
+            i = bisect_left(ranges, (size, -1))
+            if i < len(ranges):
+                found = ranges[i]
+            else:
+                # any range of a larger class fits, take the smallest
+                larger = self.bitmap >> (size_class + 1)
+                if larger:
+                    next_class = size_class + 1 + (larger & -larger).bit_length() - 1
+                    found = self.classes[next_class][0]
+        if found is None:
+            raise MemoryError("No sufficient memory available.")
+
+        free_size, start = found
+        self.remove(start, free_size)
+        if free_size > size:
+            self.insert(start + size, free_size - size)
+        self.allocated[start] = size
+        self.used += size
+        return start
+
+    def free(self, start, size):
+        """ free the range and merge it with the free ranges next to it """
+        if self.allocated.get(start) != size:
+            raise MemoryError(f"[{start}, {start + size}) is not an allocated range.")
+        del self.allocated[start]
+        self.used -= size
+
+        end = start + size
+        if end in self.free_starts:
+            next_size = self.free_starts[end]
+            self.remove(end, next_size)
+            end += next_size
+        if start in self.free_ends:
+            previous_start = self.free_ends[start]
+            self.remove(previous_start, start - previous_start)
+            start = previous_start
+        self.insert(start, end - start)
+
+    def largest_free_block(self):
+        if not self.bitmap:
+            return 0
+        return self.classes[self.bitmap.bit_length() - 1][-1][0]
+
+    def stats(self):
+        free = self.size - self.used
+        largest = self.largest_free_block()
+        return {
+            "size": self.size,
+            "used": self.used,
+            "free": free,
+            "free_blocks": len(self.free_starts),
+            "largest_free_block": largest,
+            # share of the free memory that the largest possible allocation
+            # cannot use
+            "external_fragmentation": 1 - largest / free if free else 0.0,
+        }
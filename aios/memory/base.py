@@ -1,10 +1,9 @@
 # This file provides a wrapper on memory access, similarly to working with
 # pointers in low level languages
-# The memory is organized in blocks of a single byte
+# The memory is organized in blocks of a single byte, in a bytearray arena:
+# writes are slice assignments and reads are zero-copy views on the arena
 
-
-# use C compatible data types for maximum memory efficiency
-import ctypes
+from aios.memory.allocator import SegregatedFreeLists
 
 class MemoryRequest:
     def __init__(self, agent_id: int, round_id: int, operation_type: str, content: str = None):
@@ -17,40 +16,54 @@ class Memory:
     def __init__(self, size=1024):
         self.size = size
         """ makes an array of bytes, typically how memory is organized """
-        self.memory = (ctypes.c_ubyte * size)()
-        self.free_blocks = [(0, size - 1)]
+        self.memory = bytearray(size)
+        # read-only view of the whole arena, sliced without copying
+        self.view = memoryview(self.memory).toreadonly()
+        self.allocator = SegregatedFreeLists(size)
+
+    @property
+    def free_blocks(self):
+        """ free ranges as (start, end), end included """
+        return sorted(
+            (start, start + size - 1)
+            for start, size in self.allocator.free_starts.items()
+        )
 
     # malloc(3) implementation
     def mem_alloc(self, size):
-        for i, (start, end) in enumerate(self.free_blocks):
-            block_size = end - start + 1
-            if block_size >= size:
-                allocated_start = start
-                allocated_end = start + size - 1
-                if allocated_end == end:
-                    self.free_blocks.pop(i)
-                else:
-                    self.free_blocks[i] = (allocated_end + 1, end)
-                return allocated_start
-        raise MemoryError("No sufficient memory available.")
+        return self.allocator.alloc(size)
 
+    # free(3) implementation, the range is merged with its free neighbours
     def mem_clear(self, start, size):
-        allocated_end = start + size - 1
-        self.free_blocks.append((start, allocated_end))
-        self.free_blocks.sort()
+        self.allocator.free(start, size)
+
+    def stats(self):
+        """ usage and fragmentation of the memory """
+        return self.allocator.stats()
+
+    def check_range(self, address, size):
+        if address < 0 or size < 0 or address + size > self.size:
+            raise MemoryError(
+                f"Not enough space to access [{address}, {address + size}) in a memory of size {self.size}."
+            )
 
     # memcpy(3) implementation
     def mem_write(self, address, data):
+        """ copy data (bytes, bytearray or memoryview) to the address """
         size = len(data)
-        if address + size > self.size:
-            raise MemoryError("Not enough space to write data.")
-        for i in range(size):
-            self.memory[address + i] = data[i]
+        self.check_range(address, size)
+        # both sides have the same length, the arena is never resized
+        self.memory[address:address + size] = data
 
     # similar to dereferencing pointers
     def mem_read(self, address, size):
-        data = self.memory[address:address + size]
-        return data
+        """
+        read-only memoryview of the bytes at the address, without copying
+        them: it reflects later writes to the same range, call bytes() on it
+        to keep the data
+        """
+        self.check_range(address, size)
+        return self.view[address:address + size]
 
 # abstract implementation of memory utilities for thread safe access
 class BaseMemoryManager:
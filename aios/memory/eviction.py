@@ -0,0 +1,315 @@
+from collections import OrderedDict
+from enum import Enum
+from typing import Hashable, Optional
+
+from aios.memory.lru_k_replacer import LRU_K_Replacer
+
+"""
+Eviction policies of the memory manager. Each class decides which block of
+the memory, an (agent, round) pair, is spilled to storage next.
+
+Each policy must implement the following, like LRU_K_Replacer:
+    __init__(self, capacity: int | None = None, k: int = 2)
+    update_access_history(self, block_id)
+    set_evictable(self, block_id, set_evictable: bool)
+    evict(self) -> block_id | None
+    remove(self, block_id)
+    size(self) -> int
+
+The memory manager calls update_access_history on every read and write of a
+block, including the first write of a block and the writes and reads of a
+block that was spilled before, which brings it back into memory. evict()
+removes and returns the block to spill, or None when no block is evictable.
+The blocks in use are pinned with set_evictable(block_id, False) and are
+never returned by evict() until they are unpinned. remove() forgets a block
+that left the memory without being evicted (e.g. its agent finished).
+size() is the number of evictable blocks.
+
+capacity bounds the number of blocks tracked (None for no limit) and k is
+the eviction_k of the memory manager, used by the policies that count the
+accesses of a block.
+"""
+
+class EvictionPolicy(Enum):
+    LRU = 0,
+    LRU_K = 1,
+    ARC = 2,
+    W_TINYLFU = 3,
+
+def check_capacity(tracked, capacity, block_id):
+    if capacity is not None and tracked >= capacity:
+        raise ValueError(f"Invalid block_id {block_id}, the replacer is full")
+
+class LRUPolicy:
+    """Least recently used block first"""
+    def __init__(self, capacity: Optional[int] = None, k: int = 2):
+        self.replacer_size = capacity
+        # evictable blocks, most recently used last
+        self.blocks = OrderedDict()
+        self.pinned = set()
+
+    def update_access_history(self, block_id):
+        if block_id in self.blocks:
+            self.blocks.move_to_end(block_id)
+        elif block_id not in self.pinned:
+            check_capacity(len(self.blocks) + len(self.pinned), self.replacer_size, block_id)
+            self.blocks[block_id] = None
+
+    def set_evictable(self, block_id, set_evictable: bool) -> None:
+        if set_evictable and block_id in self.pinned:
+            self.pinned.remove(block_id)
+            self.blocks[block_id] = None
+        elif not set_evictable and block_id in self.blocks:
+            self.blocks.pop(block_id)
+            self.pinned.add(block_id)
+
+    def evict(self) -> Optional[Hashable]:
+        if not self.blocks:
+            return None
+        return self.blocks.popitem(last=False)[0]
+
+    def remove(self, block_id) -> None:
+        if block_id in self.pinned:
+            raise ValueError(f"Invalid frame {block_id}")
+        self.blocks.pop(block_id, None)
+
+    def size(self) -> int:
+        return len(self.blocks)
+
+class ARCPolicy:
+    """
+    Adaptive replacement cache (Megiddo and Modha): t1 holds the blocks used
+    once recently and t2 those used at least twice, and the ghost lists b1
+    and b2 remember the blocks recently evicted from each. A block that comes
+    back through b1 means t1 was evicted too early, through b2 that t2 was,
+    and the target size p of t1 moves accordingly. The size of the cache is
+    the number of blocks in memory, which varies with their sizes.
+    """
+    def __init__(self, capacity: Optional[int] = None, k: int = 2):
+        self.replacer_size = capacity
+        # most recently used last
+        self.t1 = OrderedDict()
+        self.t2 = OrderedDict()
+        self.b1 = OrderedDict()
+        self.b2 = OrderedDict()
+        self.p = 0.0
+        # pinned block -> the list it goes back to
+        self.pinned = {}
+
+    def resident(self) -> int:
+        return len(self.t1) + len(self.t2) + len(self.pinned)
+
+    def update_access_history(self, block_id):
+        if block_id in self.pinned:
+            self.pinned[block_id] = self.t2
+            return
+        if block_id in self.t1:
+            self.t1.pop(block_id)
+            self.t2[block_id] = None
+            return
+        if block_id in self.t2:
+            self.t2.move_to_end(block_id)
+            return
+
+        check_capacity(self.resident(), self.replacer_size, block_id)
+        if block_id in self.b1:
+            self.p = min(self.resident() + 1, self.p + max(len(self.b2) / len(self.b1), 1))
+            self.b1.pop(block_id)
+            self.t2[block_id] = None
+        elif block_id in self.b2:
+            self.p = max(0.0, self.p - max(len(self.b1) / len(self.b2), 1))
+            self.b2.pop(block_id)
+            self.t2[block_id] = None
+        else:
+            self.t1[block_id] = None
+        self.trim_ghosts()
+
+    def trim_ghosts(self):
+        c = self.resident()
+        while self.b1 and len(self.t1) + len(self.b1) > c:
+            self.b1.popitem(last=False)
+        while self.b2 and c + len(self.b1) + len(self.b2) > 2 * c:
+            self.b2.popitem(last=False)
+
+    def set_evictable(self, block_id, set_evictable: bool) -> None:
+        if set_evictable and block_id in self.pinned:
+            self.pinned.pop(block_id)[block_id] = None
+        elif not set_evictable:
+            for blocks in (self.t1, self.t2):
+                if block_id in blocks:
+                    blocks.pop(block_id)
+                    self.pinned[block_id] = blocks
+
+    def evict(self) -> Optional[Hashable]:
+        if self.t1 and (len(self.t1) > self.p or not self.t2):
+            block_id = self.t1.popitem(last=False)[0]
+            self.b1[block_id] = None
+        elif self.t2:
+            block_id = self.t2.popitem(last=False)[0]
+            self.b2[block_id] = None
+        else:
+            return None
+        self.trim_ghosts()
+        return block_id
+
+    def remove(self, block_id) -> None:
+        if block_id in self.pinned:
+            raise ValueError(f"Invalid frame {block_id}")
+        for blocks in (self.t1, self.t2, self.b1, self.b2):
+            blocks.pop(block_id, None)
+
+    def size(self) -> int:
+        return len(self.t1) + len(self.t2)
+
+class FrequencySketch:
+    """
+    Count-min sketch of the access frequencies: depth rows of width counters
+    up to 15, all halved every 10 * width accesses so that old popularity
+    fades.
+    """
+    seeds = (0x9E3779B97F4A7C15, 0xC2B2AE3D27D4EB4F, 0x165667B19E3779F9, 0x27D4EB2F165667C5)
+
+    def __init__(self, width: int = 16384, depth: int = 4):
+        self.mask = (1 << (width - 1).bit_length()) - 1
+        self.rows = [[0] * (self.mask + 1) for _ in range(depth)]
+        self.sample_size = 10 * (self.mask + 1)
+        self.additions = 0
+
+    def indexes(self, key):
+        h = hash(key)
+        return [((h * seed) >> 17) & self.mask for seed in self.seeds[:len(self.rows)]]
+
+    def increment(self, key):
+        indexes = self.indexes(key)
+        counts = [row[i] for row, i in zip(self.rows, indexes)]
+        least = min(counts)
+        if least < 15:
+            # conservative update: only the smallest counters grow
+            for row, i, count in zip(self.rows, indexes, counts):
+                if count == least:
+                    row[i] += 1
+        self.additions += 1
+        if self.additions >= self.sample_size:
+            for row in self.rows:
+                row[:] = [count >> 1 for count in row]
+            self.additions //= 2
+
+    def estimate(self, key) -> int:
+        return min(row[i] for row, i in zip(self.rows, self.indexes(key)))
+
+class WTinyLFUPolicy:
+    """
+    Window TinyLFU (Einziger, Friedman and Manes): new blocks enter a small
+    LRU window (window_share of the blocks), the rest of the memory is a
+    segmented LRU (probation, then protected once used again, at most
+    protected_share of it). A block pushed out of the window waits for
+    admission, and only displaces the victim of the main segments when it
+    was accessed more often, as estimated by a frequency sketch, so blocks
+    used once do not flush the popular ones.
+    """
+    window_share = 0.01
+    protected_share = 0.8
+
+    def __init__(self, capacity: Optional[int] = None, k: int = 2):
+        self.replacer_size = capacity
+        # most recently used last
+        self.window = OrderedDict()
+        self.admission = OrderedDict()
+        self.probation = OrderedDict()
+        self.protected = OrderedDict()
+        # pinned block -> the segment it goes back to
+        self.pinned = {}
+        self.sketch = FrequencySketch()
+
+    def segments(self):
+        return (self.window, self.admission, self.probation, self.protected)
+
+    def update_access_history(self, block_id):
+        self.sketch.increment(block_id)
+        if block_id in self.pinned:
+            if self.pinned[block_id] is not self.window:
+                self.pinned[block_id] = self.protected
+            return
+        if block_id in self.window:
+            self.window.move_to_end(block_id)
+        elif block_id in self.protected:
+            self.protected.move_to_end(block_id)
+        elif block_id in self.probation or block_id in self.admission:
+            # used again, admitted without waiting
+            self.probation.pop(block_id, None)
+            self.admission.pop(block_id, None)
+            self.protected[block_id] = None
+            self.balance_protected()
+        else:
+            check_capacity(self.size() + len(self.pinned), self.replacer_size, block_id)
+            self.window[block_id] = None
+            if len(self.window) > max(1, int(self.window_share * self.size())):
+                self.admission[self.window.popitem(last=False)[0]] = None
+
+    def balance_protected(self):
+        limit = max(1, int(self.protected_share * (len(self.probation) + len(self.protected))))
+        while len(self.protected) > limit:
+            block_id = self.protected.popitem(last=False)[0]
+            self.probation[block_id] = None
+
+    def set_evictable(self, block_id, set_evictable: bool) -> None:
+        if set_evictable and block_id in self.pinned:
+            self.pinned.pop(block_id)[block_id] = None
+            self.balance_protected()
+        elif not set_evictable:
+            for blocks in self.segments():
+                if block_id in blocks:
+                    blocks.pop(block_id)
+                    self.pinned[block_id] = blocks
+
+    def evict(self) -> Optional[Hashable]:
+        while self.admission:
+            candidate = self.admission.popitem(last=False)[0]
+            main = self.probation or self.protected
+            if not main:
+                self.probation[candidate] = None
+                continue
+            victim = next(iter(main))
+            if self.sketch.estimate(candidate) > self.sketch.estimate(victim):
+                main.pop(victim)
+                self.probation[candidate] = None
+                return victim
+            return candidate
+        for blocks in (self.probation, self.protected, self.window):
+            if blocks:
+                return blocks.popitem(last=False)[0]
+        return None
+
+    def remove(self, block_id) -> None:
+        if block_id in self.pinned:
+            raise ValueError(f"Invalid frame {block_id}")
+        for blocks in self.segments():
+            blocks.pop(block_id, None)
+
+    def size(self) -> int:
+        return sum(len(blocks) for blocks in self.segments())
+
+def get_eviction_policy(policy: Optional[EvictionPolicy | str], capacity: Optional[int] = None, k: int = 2):
+    """
+    Build an eviction policy from an EvictionPolicy or its name, LRU-K when
+    None.
+    """
+    if policy is None:
+        policy = EvictionPolicy.LRU_K
+    if isinstance(policy, str):
+        try:
+            policy = EvictionPolicy[policy.upper().replace("-", "_")]
+        except KeyError:
+            raise ValueError(
+                f"Unknown eviction policy {policy}, one of "
+                + ", ".join(name.lower() for name in EvictionPolicy.__members__)
+            )
+
+    if policy == EvictionPolicy.LRU:
+        return LRUPolicy(capacity, k)
+    elif policy == EvictionPolicy.LRU_K:
+        return LRU_K_Replacer(capacity, k)
+    elif policy == EvictionPolicy.ARC:
+        return ARCPolicy(capacity, k)
+    elif policy == EvictionPolicy.W_TINYLFU:
+        return WTinyLFUPolicy(capacity, k)
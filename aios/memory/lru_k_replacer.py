@@ -1,9 +1,14 @@
 # Implementation of the LRU_K_Replacer algorithm
 # It keeps track of when each buffer to the disk was last used and removes
 # the least used buffer when a new buffer is needed
+#
+# Only the evictable blocks are kept in hit_list and cache_list: a pinned
+# block is taken out of its list and put back, as if just accessed, when it
+# is unpinned, so evict() takes the back of a list in O(1) instead of
+# scanning past the pinned blocks.
 
 from collections import OrderedDict
-from typing import Optional, Dict
+from typing import Hashable, Optional, Dict
 
 
 class Block_Entry:
@@ -14,80 +19,83 @@ class Block_Entry:
 
 
 class LRU_K_Replacer:
-    def __init__(self, capacity, k):
-        """ initialize the blocks being managed by the LRU_K_Replacer """
+    def __init__(self, capacity: Optional[int], k):
+        """ initialize the blocks being managed by the LRU_K_Replacer,
+        at most capacity of them (None for no limit) """
+        if k < 1:
+            raise ValueError(f"Invalid k {k}, a block is used at least once")
         self.replacer_size = capacity
         self.k = k
         self.curr_size = 0
-        self.entries: Dict[int, Block_Entry] = {}
+        self.entries: Dict[Hashable, Block_Entry] = {}
 
-        """ counts the amount of times a block has been used in the cache """
+        """ blocks used fewer than k times, most recently added first """
         self.hit_list = OrderedDict()
 
-        """ holds the memory block that is being cached by id """
+        """ blocks used at least k times, most recently used first """
         self.cache_list = OrderedDict()
 
-    def evict(self) -> Optional[int]:
+    def evict(self) -> Optional[Hashable]:
         """ delete the least used block from the cache """
-        if self.curr_size == 0:
-            return None
-
-        for block_id in reversed(self.hit_list):
-            if self.entries[block_id].evictable:
-                self.hit_list.pop(block_id)
-                self.entries.pop(block_id)
-                self.curr_size -= 1
-                return block_id
-
-        for block_id in reversed(self.cache_list):
-            if self.entries[block_id].evictable:
-                self.cache_list.pop(block_id)
+        for blocks in (self.hit_list, self.cache_list):
+            if blocks:
+                block_id, _ = blocks.popitem(last=True)
                 self.entries.pop(block_id)
                 self.curr_size -= 1
                 return block_id
         return None
 
-    def update_access_history(self, block_id):
-        if block_id > self.replacer_size:
-            raise ValueError(f"Invalid block_id {block_id}")
+    def list_of(self, block_id) -> OrderedDict:
+        if self.entries[block_id].hit_count < self.k:
+            return self.hit_list
+        return self.cache_list
 
+    def update_access_history(self, block_id):
         if block_id not in self.entries:
+            if self.replacer_size is not None and len(self.entries) >= self.replacer_size:
+                raise ValueError(f"Invalid block_id {block_id}, the replacer is full")
             self.entries[block_id] = Block_Entry()
             self.curr_size += 1
 
         """ update the amount of times a block has been used in the cache """
-        self.entries[block_id].hit_count += 1
+        entry = self.entries[block_id]
+        entry.hit_count += 1
+
+        if not entry.evictable:
+            return
 
         """ cache this value in this script """
-        new_count = self.entries[block_id].hit_count
+        new_count = entry.hit_count
 
-        if new_count == 1:
-            self.hit_list[block_id] = None
-            self.hit_list.move_to_end(block_id, last=False)
+        if new_count < self.k:
+            if new_count == 1:
+                self.hit_list[block_id] = None
+                self.hit_list.move_to_end(block_id, last=False)
         else:
             if new_count == self.k:
-                self.hit_list.pop(block_id)
-                self.cache_list[block_id] = None
-                self.cache_list.move_to_end(block_id, last=False)
-            elif new_count > self.k:
-                self.cache_list.move_to_end(block_id, last=False)
-
-    def set_evictable(self, block_id: int, set_evictable: bool) -> None:
-        if block_id > self.replacer_size:
-            raise ValueError(f"Invalid frame {block_id}")
+                # with k = 1, the block was in no list yet
+                self.hit_list.pop(block_id, None)
+            self.cache_list[block_id] = None
+            self.cache_list.move_to_end(block_id, last=False)
 
+    def set_evictable(self, block_id, set_evictable: bool) -> None:
         if block_id not in self.entries:
             return
 
         """ modify the amount of blocks that can be evicted accordingly """
-        if set_evictable and not self.entries[block_id].evictable:
+        entry = self.entries[block_id]
+        if set_evictable and not entry.evictable:
             self.curr_size += 1
-        elif self.entries[block_id].evictable and not set_evictable:
+            blocks = self.list_of(block_id)
+            blocks[block_id] = None
+            blocks.move_to_end(block_id, last=False)
+        elif entry.evictable and not set_evictable:
             self.curr_size -= 1
+            self.list_of(block_id).pop(block_id)
 
-        self.entries[block_id].evictable = set_evictable
+        entry.evictable = set_evictable
 
-    def remove(self, block_id: int) -> None:
+    def remove(self, block_id) -> None:
         """ remove and modify size of entries dict accordingly """
         if block_id not in self.entries:
             return
@@ -95,10 +103,7 @@ class LRU_K_Replacer:
         if not self.entries[block_id].evictable:
             raise ValueError(f"Invalid frame {block_id}")
 
-        if self.entries[block_id].hit_count < self.k:
-            self.hit_list.pop(block_id)
-        else:
-            self.cache_list.pop(block_id)
+        self.list_of(block_id).pop(block_id)
 
         self.curr_size -= 1
         self.entries.pop(block_id)
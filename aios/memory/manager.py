@@ -8,11 +8,13 @@ class MemoryManager:
         eviction_k,
         storage_manager,
         log_mode: str = "console",
+        eviction_policy: str | None = None,
     ):
         self.memory_manager = SingleMemoryManager(
             memory_limit,
             eviction_k,
-            storage_manager
+            storage_manager,
+            eviction_policy
         )
 
     def address_request(
@@ -20,3 +22,6 @@ class MemoryManager:
         agent_request,
     ) -> None:
         return self.memory_manager.address_request(agent_request)
+
+    def stats(self) -> dict:
+        return self.memory_manager.stats()
@@ -2,8 +2,9 @@ from aios.memory.base import (
     MemoryRequest,
     BaseMemoryManager
 )
+from aios.memory.eviction import get_eviction_policy
 
-from typing import Dict, OrderedDict
+from typing import Dict
 
 import pickle
 import zlib
@@ -11,15 +12,32 @@ import zlib
 from threading import Thread
 
 class SingleMemoryManager:
-    def __init__(self, 
-                 memory_limit, 
-                 eviction_k, 
-                 storage_manager):
+    def __init__(self,
+                 memory_limit,
+                 eviction_k,
+                 storage_manager,
+                 eviction_policy=None):
         self.memory_blocks = dict()
         self.memory_limit = memory_limit
         self.eviction_k = eviction_k
         self.storage_manager = storage_manager
-        
+        # kernel-wide policy over the (agent, round) blocks of all agents,
+        # LRU-K by default (see aios.memory.eviction)
+        self.eviction_policy = eviction_policy or "lru_k"
+        self.replacer = get_eviction_policy(eviction_policy, k=eviction_k)
+
+        # bytes of the compressed rounds in memory, per agent and in total,
+        # updated on every write, clear and eviction instead of recounted
+        self.agent_bytes = dict()
+        self.total_bytes = 0
+        self.rounds = 0
+        self.reads = 0
+        self.read_hits = 0
+        self.evicted_rounds = 0
+        self.evicted_bytes = 0
+        # rounds of each agent spilled to storage, one file per round
+        self.spilled = dict()
+
     def address_request(self, agent_request):
         operation_type = agent_request.operation_type
         if operation_type == "allocate":
@@ -27,40 +45,103 @@ class SingleMemoryManager:
 
     def mem_alloc(self, aid):
         if aid not in self.memory_blocks:
-            self.memory_blocks[aid] = OrderedDict()
+            self.memory_blocks[aid] = dict()
+            self.agent_bytes[aid] = 0
+            self.spilled[aid] = set()
             self.storage_manager.sto_create(aid)
 
     def mem_read(self, aid, rid):
+        self.reads += 1
         if aid in self.memory_blocks and rid in self.memory_blocks[aid]:
-            compressed_data = self.memory_blocks[aid].pop(rid)
-            self.memory_blocks[aid][rid] = compressed_data
-            return pickle.loads(zlib.decompress(compressed_data))
+            self.read_hits += 1
+            self.replacer.update_access_history((aid, rid))
+            return pickle.loads(zlib.decompress(self.memory_blocks[aid][rid]))
         else:
-            return self.storage_manager.sto_read(aid, rid)
+            s = self.storage_manager.sto_read(aid, aid=aid, rid=rid)
+            if s is not None and aid in self.memory_blocks:
+                # the round is used again, bring it back into memory
+                self.mem_write(aid, rid, s)
+            return s
 
     def mem_write(self, aid, rid, s):
         self.mem_alloc(aid)
         serialized_data = pickle.dumps(s)
         compressed_data = zlib.compress(serialized_data)
-        
-        if rid in self.memory_blocks[aid]:
-            self.memory_blocks[aid].pop(rid)
-        self.memory_blocks[aid][rid] = compressed_data
 
-        if self._total_memory_count() > self.memory_limit:
-            self._evict_memory(aid)
+        blocks = self.memory_blocks[aid]
+        if rid in blocks:
+            self._account(aid, -len(blocks.pop(rid)))
+        else:
+            self.rounds += 1
+        if rid in self.spilled[aid]:
+            # the copy in memory supersedes the one in storage
+            self.spilled[aid].remove(rid)
+            self.storage_manager.sto_clear(aid, aid=aid, rid=rid)
+        blocks[rid] = compressed_data
+        self._account(aid, len(compressed_data))
+        self.replacer.update_access_history((aid, rid))
+
+        if self.total_bytes > self.memory_limit:
+            # the round being written is in use, the others go first
+            self.replacer.set_evictable((aid, rid), False)
+            self._evict_memory()
+            self.replacer.set_evictable((aid, rid), True)
+            if self.total_bytes > self.memory_limit:
+                # the round alone does not fit in memory_limit
+                self._evict_memory()
 
     def mem_clear(self, aid):
         if aid in self.memory_blocks:
-            del self.memory_blocks[aid]
+            blocks = self.memory_blocks.pop(aid)
+            for rid in blocks:
+                self.replacer.remove((aid, rid))
+            self.rounds -= len(blocks)
+            self.total_bytes -= self.agent_bytes.pop(aid)
+            for rid in self.spilled.pop(aid):
+                self.storage_manager.sto_clear(aid, aid=aid, rid=rid)
             self.storage_manager.sto_clear(aid)
 
+    def _account(self, aid, size):
+        self.agent_bytes[aid] += size
+        self.total_bytes += size
+
     def _total_memory_count(self):
-        return sum(len(blocks) for blocks in self.memory_blocks.values())
+        return self.total_bytes
 
-    def _evict_memory(self, aid):
-        if aid in self.memory_blocks:
-            for _ in range(min(self.eviction_k,
-                           len(self.memory_blocks[aid]))):
-                rid, compressed_data = self.memory_blocks[aid].popitem(last=False)
-                self.storage_manager.sto_write(aid, rid, pickle.loads(zlib.decompress(compressed_data)))
+    def _evict_memory(self):
+        """
+        Spill the rounds that the eviction policy picks, across all agents,
+        to storage until the memory fits in memory_limit again
+        """
+        while self.total_bytes > self.memory_limit:
+            victim = self.replacer.evict()
+            if victim is None:
+                break
+            self._spill(*victim)
+
+    def _spill(self, aid, rid):
+        compressed_data = self.memory_blocks[aid].pop(rid)
+        self._account(aid, -len(compressed_data))
+        self.rounds -= 1
+        self.evicted_rounds += 1
+        self.evicted_bytes += len(compressed_data)
+        # sto_write appends, a round spilled again must not keep its old copy
+        self.storage_manager.sto_clear(aid, aid=aid, rid=rid)
+        self.spilled[aid].add(rid)
+        self.storage_manager.sto_write(
+            aid, pickle.loads(zlib.decompress(compressed_data)), aid=aid, rid=rid
+        )
+
+    def stats(self):
+        return {
+            "eviction_policy": self.eviction_policy,
+            "memory_limit": self.memory_limit,
+            "used_bytes": self.total_bytes,
+            "agents": len(self.memory_blocks),
+            "rounds": self.rounds,
+            "reads": self.reads,
+            "read_hits": self.read_hits,
+            "agent_bytes": dict(self.agent_bytes),
+            "evicted_rounds": self.evicted_rounds,
+            "evicted_bytes": self.evicted_bytes,
+        }
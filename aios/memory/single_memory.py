@@ -13,7 +13,7 @@ import heapq
 # FIFO queue for whichever thread stops blocking first
 from queue import Queue, Empty
 
-from utils.compressor import (
+from aios.utils.compressor import (
     ZLIBCompressor
 )
 
@@ -36,7 +36,8 @@ class UniformedMemoryManager(BaseMemoryManager):
         self.aid_to_memory = dict() # map agent id to memory block id, address, size
         # {
         #    agent_id: {
-        #       round_id: {"memory_block_id": int, "address": int, size: int}
+        #       "memory_block_id": int,
+        #       "rounds": {round_id: {"address": int, "size": int}}
         #    }
         # }
 
@@ -63,7 +64,9 @@ class UniformedMemoryManager(BaseMemoryManager):
         operation_type = memory_request.operation_type
         if operation_type == "write":
             self.mem_write(
-                agent_id=memory_request.agent_id, content=memory_request.content
+                agent_id=memory_request.agent_id,
+                round_id=memory_request.round_id,
+                content=memory_request.content,
             )
         elif operation_type == "read":
             self.mem_read(
@@ -77,32 +80,54 @@ class UniformedMemoryManager(BaseMemoryManager):
 
     def mem_write(self, agent_id, round_id: str, content: str):
         """ write to memory given agent id """
+        if agent_id not in self.aid_to_memory:
+            self.mem_alloc(agent_id)
+        agent_memory = self.aid_to_memory[agent_id]
+        memory_block = self.memory_blocks[agent_memory["memory_block_id"]]
+
         compressed_content = self.compressor.compress(content)
         size = len(compressed_content)
-        address = self.memory_blocks[
-            self.aid_to_memory[agent_id][round_id]["memory_block_id"]
-        ].mem_alloc(size)
 
-        self.memory_blocks[
-            self.aid_to_memory[agent_id][round_id]["memory_block_id"]
-        ].mem_write(address, compressed_content)
+        """
+        a round written again replaces its previous content, which is freed
+        only once the new content is written: if the allocation or the write
+        fails, the round keeps its previous content
+        """
+        address = memory_block.mem_alloc(size)
+        try:
+            memory_block.mem_write(address, compressed_content)
+        except BaseException:
+            memory_block.mem_clear(address, size)
+            raise
+
+        previous = agent_memory["rounds"].get(round_id)
+        agent_memory["rounds"][round_id] = {"address": address, "size": size}
+        if previous is not None:
+            memory_block.mem_clear(previous["address"], previous["size"])
 
     def mem_read(self, agent_id, round_id):
         """ read memory given agent id """
-        memory_block_id = self.aid_to_memory[agent_id][round_id]
-        data = self.memory_blocks[memory_block_id].mem_read(
-            self.aid_to_memory[agent_id][round_id]["address"],
-            self.aid_to_memory[agent_id][round_id]["size"]
+        agent_memory = self.aid_to_memory[agent_id]
+        round_memory = agent_memory["rounds"][round_id]
+        """ decompress straight from the view on the memory block """
+        data = self.memory_blocks[agent_memory["memory_block_id"]].mem_read(
+            round_memory["address"],
+            round_memory["size"]
         )
-        return data
+        return self.compressor.decompress(data)
 
     def mem_alloc(self, agent_id):
         memory_block_id = heapq.heappop(self.free_memory_blocks)
         self.aid_to_memory[agent_id] = {
-            "memory_block_id": memory_block_id
+            "memory_block_id": memory_block_id,
+            "rounds": {}
         }
 
     def mem_clear(self, agent_id):
         memory_block = self.aid_to_memory.pop(agent_id)
         memory_block_id = memory_block['memory_block_id']
+        for round_memory in memory_block["rounds"].values():
+            self.memory_blocks[memory_block_id].mem_clear(
+                round_memory["address"], round_memory["size"]
+            )
         heapq.heappush(self.free_memory_blocks, memory_block_id)
@@ -3,11 +3,18 @@ from aios.hooks.types.memory import MemoryRequestQueueGetMessage
 from aios.hooks.types.tool import ToolRequestQueueGetMessage
 from aios.hooks.types.storage import StorageRequestQueueGetMessage
 
+from aios.hooks.stores import queue as QueueStore
 from aios.utils.logger import SchedulerLogger
 
 from abc import ABC, abstractmethod
 
-from threading import Thread
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+from queue import Empty
+from threading import BoundedSemaphore, Thread
+
+import traceback
+import time
 
 from aios.memory.manager import MemoryManager
 from aios.storage.storage import StorageManager
@@ -26,6 +33,7 @@ class Scheduler:
         get_memory_syscall: MemoryRequestQueueGetMessage,
         get_storage_syscall: StorageRequestQueueGetMessage,
         get_tool_syscall: ToolRequestQueueGetMessage,
+        llm_workers: int | None = None,
     ):
         # self.agent_process_queue = Queue()
         self.get_llm_syscall = get_llm_syscall
@@ -46,15 +54,32 @@ class Scheduler:
         self.storage_manager = storage_manager
         self.tool_manager = tool_manager
 
+        # number of LLM syscalls executed concurrently, by default as many as
+        # the LLM endpoints accept in total
+        if llm_workers is None:
+            llm_workers = (
+                llm.total_concurrency() if hasattr(llm, "total_concurrency") else 1
+            )
+        self.llm_workers = max(1, llm_workers)
+
+        # seconds to wait for more syscalls to join a batch
+        self.batch_window = 0.01
+        # streamed syscall fetched while a batch was collected, it starts
+        # the next batch
+        self.next_batch = []
+
     def start(self):
         """start the scheduler"""
         self.active = True
+        QueueStore.openQueues()
         for name, thread_value in self.request_processors.items():
             thread_value.start()
 
     def stop(self):
         """stop the scheduler"""
         self.active = False
+        # wake up the processors that are sleeping on an empty queue
+        QueueStore.closeQueues()
         for name, thread_value in self.request_processors.items():
             thread_value.join()
 
@@ -62,6 +87,263 @@ class Scheduler:
         logger = SchedulerLogger("Scheduler", self.log_mode)
         return logger
 
+    def run_processor(self, fetch_syscall, address_syscall, execute_syscall=None):
+        """
+        Dispatch loop shared by all the syscall processors. ``fetch_syscall``
+        blocks until a syscall is available (or the queues are closed on
+        stop, which raises Empty) so that an idle processor does not poll.
+
+        Args:
+            fetch_syscall   : Returns the next syscall to be executed
+            address_syscall : Executes the syscall and returns the response
+            execute_syscall : Runs address_syscall on what fetch_syscall
+                              returned, defaults to self.execute_syscall
+        """
+        execute_syscall = execute_syscall or self.execute_syscall
+        while self.active:
+            try:
+                syscall = fetch_syscall()
+                execute_syscall(syscall, address_syscall)
+
+            except Empty:
+                pass
+
+            except Exception:
+                traceback.print_exc()
+
+    def run_processor_pool(
+        self, fetch_syscall, address_syscall, max_workers, execute_syscall=None
+    ):
+        """
+        Same as run_processor, but executes up to ``max_workers`` syscalls at
+        the same time. A syscall is only fetched once a worker is free, so the
+        syscalls waiting for a worker stay in the order of the scheduler.
+        """
+        if max_workers == 1:
+            return self.run_processor(fetch_syscall, address_syscall, execute_syscall)
+
+        execute_syscall = execute_syscall or self.execute_syscall
+        slots = BoundedSemaphore(max_workers)
+
+        def execute(syscall):
+            try:
+                execute_syscall(syscall, address_syscall)
+            except Exception:
+                traceback.print_exc()
+            finally:
+                slots.release()
+
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            while self.active:
+                slots.acquire()
+                try:
+                    syscall = fetch_syscall()
+                except Exception as e:
+                    slots.release()
+                    if not isinstance(e, Empty):
+                        traceback.print_exc()
+                    continue
+
+                pool.submit(execute, syscall)
+
+    def run_processor_async(self, fetch_syscall, address_syscall, max_workers):
+        """
+        Same as run_processor_pool, but ``address_syscall`` is a coroutine
+        function: up to ``max_workers`` syscalls are executed concurrently on
+        an event loop owned by this processor instead of one thread each.
+        """
+        loop = asyncio.new_event_loop()
+        loop_thread = Thread(target=loop.run_forever)
+        loop_thread.start()
+
+        slots = BoundedSemaphore(max_workers)
+
+        async def execute(syscall):
+            try:
+                await self.execute_syscall_async(syscall, address_syscall)
+            except Exception:
+                traceback.print_exc()
+            finally:
+                slots.release()
+
+        while self.active:
+            slots.acquire()
+            try:
+                syscall = fetch_syscall()
+            except Exception as e:
+                slots.release()
+                if not isinstance(e, Empty):
+                    traceback.print_exc()
+                continue
+
+            asyncio.run_coroutine_threadsafe(execute(syscall), loop)
+
+        # wait for the in-flight syscalls before closing the loop
+        for _ in range(max_workers):
+            slots.acquire()
+        loop.call_soon_threadsafe(loop.stop)
+        loop_thread.join()
+        # finalize the streams left open by the completions
+        loop.run_until_complete(loop.shutdown_asyncgens())
+        loop.close()
+
+    def collect_batch(self, fetch_syscall, max_batch_size):
+        """
+        Block until a syscall is available, then keep fetching the syscalls
+        that arrive within ``batch_window`` seconds, up to ``max_batch_size``.
+        ``fetch_syscall`` must accept the block and timeout arguments of
+        SyscallQueue.get.
+
+        A streamed syscall is dispatched alone, so that its chunks are
+        forwarded as they are generated: one fetched while a batch is
+        collected ends that batch and is dispatched next.
+        """
+        batch = [self.next_batch.pop() if self.next_batch else fetch_syscall()]
+        deadline = time.monotonic() + self.batch_window
+        while len(batch) < max_batch_size and not batch[0].is_streaming():
+            remaining = deadline - time.monotonic()
+            try:
+                if remaining > 0:
+                    syscall = fetch_syscall(timeout=remaining)
+                else:
+                    syscall = fetch_syscall(block=False)
+            except Empty:
+                break
+            if syscall.is_streaming():
+                self.next_batch.append(syscall)
+                break
+            batch.append(syscall)
+        return batch
+
+    def rate_limited(self, fetch_syscall):
+        """
+        Wrap the fetch function of the LLM syscalls so that the syscalls the
+        rate limiter of the LLM core cannot admit yet are set aside, and the
+        next admissible syscall is returned instead: an agent over its quota
+        does not hold up the syscalls queued behind it. The syscalls set
+        aside are returned, in order, as soon as they are admitted.
+        ``fetch_syscall`` must accept the block and timeout arguments of
+        SyscallQueue.get.
+        """
+        limiter = getattr(self.llm, "rate_limiter", None)
+        if limiter is None:
+            return fetch_syscall
+
+        endpoints = self.llm.llm_name
+        deferred = []
+
+        def fetch(block=True, timeout=None):
+            deadline = None if timeout is None else time.monotonic() + timeout
+            while True:
+                for idx, syscall in enumerate(deferred):
+                    if limiter.try_admit(syscall, endpoints):
+                        return deferred.pop(idx)
+
+                # wait for a new syscall, but not past the time a syscall set
+                # aside may be admitted
+                wait = None
+                if deferred:
+                    wait = max(limiter.wait_time(deferred, endpoints), 0.001)
+                if deadline is not None:
+                    remaining = deadline - time.monotonic()
+                    wait = remaining if wait is None else min(wait, remaining)
+
+                try:
+                    if not block or (wait is not None and wait <= 0):
+                        syscall = fetch_syscall(block=False)
+                    elif wait is None:
+                        syscall = fetch_syscall()
+                    else:
+                        syscall = fetch_syscall(timeout=wait)
+                except Empty:
+                    if (
+                        not block
+                        or not self.active
+                        or (deadline is not None and time.monotonic() >= deadline)
+                    ):
+                        raise
+                    continue
+
+                if limiter.try_admit(syscall, endpoints):
+                    return syscall
+
+                self.logger.log(
+                    f"{syscall.agent_name} is rate limited, its syscall is set aside. \n",
+                    "suspend",
+                )
+                deferred.append(syscall)
+
+        return fetch
+
+    def run_llm_processor(self, fetch_syscall):
+        """
+        Run the LLM processor. When the LLM endpoints generate in batches, the
+        syscalls are dispatched in batches; otherwise they are dispatched one
+        by one, on an event loop when the LLM core supports asynchronous
+        completion and on a worker pool otherwise.
+        """
+        fetch_syscall = self.rate_limited(fetch_syscall)
+        batch_size = self.llm.batch_size() if hasattr(self.llm, "batch_size") else 1
+
+        if batch_size > 1:
+            self.run_processor_pool(
+                lambda: self.collect_batch(fetch_syscall, batch_size),
+                self.llm.address_syscall_batch,
+                self.llm_workers,
+                self.execute_batch,
+            )
+        elif hasattr(self.llm, "address_syscall_async"):
+            self.run_processor_async(
+                fetch_syscall, self.llm.address_syscall_async, self.llm_workers
+            )
+        else:
+            self.run_processor_pool(
+                fetch_syscall, self.llm.address_syscall, self.llm_workers
+            )
+
+    def begin_syscall(self, syscall):
+        syscall.set_status("executing")
+        self.logger.log(
+            f"{syscall.agent_name} is executing. \n", "execute"
+        )
+        syscall.set_start_time(time.time())
+
+    def end_syscall(self, syscall, response):
+        syscall.set_response(response)
+
+        # the agent may resume as soon as the syscall is completed, so every
+        # field it reads must be filled in before
+        syscall.set_status("done")
+        syscall.set_end_time(time.time())
+        self.syscall_finished(syscall)
+        syscall.complete()
+
+    async def execute_syscall_async(self, syscall, address_syscall):
+        self.begin_syscall(syscall)
+        response = await address_syscall(syscall)
+        self.end_syscall(syscall, response)
+
+    def execute_syscall(self, syscall, address_syscall):
+        self.begin_syscall(syscall)
+        response = address_syscall(syscall)
+        self.end_syscall(syscall, response)
+
+    def execute_batch(self, syscalls, address_batch):
+        for syscall in syscalls:
+            self.begin_syscall(syscall)
+
+        responses = address_batch(syscalls)
+
+        for syscall, response in zip(syscalls, responses):
+            self.end_syscall(syscall, response)
+
+    def syscall_finished(self, syscall):
+        """
+        Called once a syscall has been executed, before the agent is woken
+        up. Schedulers override it to account for the service time.
+        """
+        pass
+
     @abstractmethod
     def run_llm_syscall(self):
         pass
@@ -1,4 +1,9 @@
 # 非抢占式优先级调度算法 (Non-preemptive Priority Scheduling Algorithm)
+# 基于多级反馈队列 (MLFQ) 实现：
+# - 新任务的优先级来自 syscall (set_priority) 或所属 agent 当前的级别
+# - agent 在某一级别累计的服务时间超过该级别的时间片后被降级
+# - 等待时间超过 aging_interval 的任务被逐级提升，避免饥饿
+# - 同一级别内按到达顺序 (FIFO) 调度
 
 from aios.hooks.types.llm import LLMRequestQueueGetMessage
 from aios.hooks.types.memory import MemoryRequestQueueGetMessage
@@ -12,21 +17,65 @@ from aios.tool.manager import ToolManager
 
 from .base import Scheduler
 
+from collections import deque
+from itertools import count
 from queue import Empty
+from threading import Lock
 
-import traceback
-import time
 import heapq
+import time
 
 class Process:
     # Syscall 的封装
-    def __init__(self, syscall, priority=0):
+    def __init__(self, syscall, priority=0, seq=0):
         self.syscall = syscall
         self.priority = priority
+        self.seq = seq
+        # 进入当前级别的时间，用于老化 (aging)
+        self.enqueue_time = time.time()
 
     def __lt__(self, other):
-        return self.priority < other.priority
-    
+        # 同一优先级内按到达顺序排列
+        return (self.priority, self.seq) < (other.priority, other.seq)
+
+class MultiLevelQueue:
+    """
+    多级队列，级别 0 的优先级最高。每一级是按进入该级的序号排列的最小堆，
+    等待超过 aging_interval 的任务会被提升到上一级。
+    """
+
+    def __init__(self, levels, aging_interval):
+        self.levels = [[] for _ in range(levels)]
+        self.aging_interval = aging_interval
+        self.seq = count()
+        self.size = 0
+
+    def __len__(self):
+        return self.size
+
+    def push(self, syscall, level):
+        heapq.heappush(self.levels[level], Process(syscall, level, next(self.seq)))
+        self.size += 1
+
+    def age(self, now):
+        # 每一级的堆顶是该级最早到达的任务，只需检查堆顶
+        for level in range(1, len(self.levels)):
+            queue = self.levels[level]
+            while queue and now - queue[0].enqueue_time >= self.aging_interval:
+                process = heapq.heappop(queue)
+                process.priority = level - 1
+                # 提升后排在上一级已有任务之后，保持每一级按进入该级的顺序排列
+                process.seq = next(self.seq)
+                process.enqueue_time = now
+                heapq.heappush(self.levels[level - 1], process)
+
+    def pop(self):
+        for queue in self.levels:
+            if queue:
+                self.size -= 1
+                return heapq.heappop(queue)
+        raise IndexError("pop from an empty MultiLevelQueue")
+
 class NPPScheduler(Scheduler):
     def __init__(
         self,
@@ -39,7 +88,8 @@ class NPPScheduler(Scheduler):
         get_memory_syscall: MemoryRequestQueueGetMessage,
         get_storage_syscall: StorageRequestQueueGetMessage,
         get_tool_syscall: ToolRequestQueueGetMessage,
-        scheduler_type: str
+        scheduler_type: str,
+        llm_workers: int | None = None,
     ):
         super().__init__(
             llm,
@@ -51,139 +101,123 @@ class NPPScheduler(Scheduler):
             get_memory_syscall,
             get_storage_syscall,
             get_tool_syscall,
+            llm_workers,
         )
 
         # 优先级设置
         self.max_priority_level = 5 # 最大优先级的级数
+        self.time_slice = 2.0 # 级别 0 的时间片 (秒)，每降一级翻倍
+        self.aging_interval = 10.0 # 任务提升一级前的最长等待时间 (秒)
 
-        # 优先级队列
-        self.llm_queues = []
-        self.mem_queues = []
-        self.storage_queues = []
-        self.tool_queues = []
+        # agent 所在级别及其在该级别累计的服务时间
+        self.agent_levels = {}
+        self.agent_usage = {}
+        self.agent_lock = Lock()
+
+        # 每一级的等待时间记录，用于统计 p50/p99
+        self.wait_times = [deque(maxlen=10000) for _ in range(self.max_priority_level)]
 
-    def update_priority_queue(self, p_queue, syscall_func):
+        # 优先级队列
+        self.llm_queues = MultiLevelQueue(self.max_priority_level, self.aging_interval)
+        self.mem_queues = MultiLevelQueue(self.max_priority_level, self.aging_interval)
+        self.storage_queues = MultiLevelQueue(self.max_priority_level, self.aging_interval)
+        self.tool_queues = MultiLevelQueue(self.max_priority_level, self.aging_interval)
+
+    def initial_level(self, syscall):
+        # syscall 显式指定的优先级优先，否则使用 agent 当前的级别
+        priority = syscall.get_priority()
+        if priority is None:
+            with self.agent_lock:
+                priority = self.agent_levels.get(syscall.agent_name, 0)
+        return min(max(int(priority), 0), self.max_priority_level - 1)
+
+    def syscall_finished(self, syscall):
+        # 累计 agent 的服务时间，超过当前级别的时间片则降级
+        service_time = syscall.get_end_time() - syscall.get_start_time()
+        with self.agent_lock:
+            level = self.agent_levels.get(syscall.agent_name, 0)
+            usage = self.agent_usage.get(syscall.agent_name, 0.0) + service_time
+            if usage >= self.time_slice * 2 ** level:
+                level = min(level + 1, self.max_priority_level - 1)
+                usage = 0.0
+            self.agent_levels[syscall.agent_name] = level
+            self.agent_usage[syscall.agent_name] = usage
+
+    def update_priority_queue(self, p_queue, syscall_func, block=True, timeout=None):
         """
         更新优先级队列，并重新按优先级排列
         :param p_queue: 优先级队列
         :param syscall_func: 获取新任务的函数
-        :param max_wait_time: 任务提升优先级之前的最大等待时间
+        :param block: 队列为空时是否等待新任务
+        :param timeout: 等待新任务的最长时间
         """
-        # 抓取新的任务并直接插入到优先级队列中的适当位置
+        # 优先级队列为空时阻塞等待新任务，避免轮询
+        if not p_queue:
+            task = syscall_func(block=block, timeout=timeout)
+            level = self.initial_level(task)
+            task.set_priority(level)
+            p_queue.push(task, level)
+
+        # 抓取已到达的新任务（非阻塞）并直接插入到优先级队列中的适当位置
         while True:
             try:
-                task = syscall_func()
-                task.set_priority(self.max_priority_level)
-                heapq.heappush(p_queue, Process(task, task.get_priority()))
+                task = syscall_func(block=False)
+                level = self.initial_level(task)
+                task.set_priority(level)
+                p_queue.push(task, level)
             except Empty:
                 break
 
-    def run_llm_syscall(self):
-        # self.activate: start/stop the scheduler
-        while self.active:
-            try:
-                # 更新任务队列
-                self.update_priority_queue(self.llm_queues, self.get_llm_syscall)
-                llm_syscall = heapq.heappop(self.llm_queues).syscall
-
-                llm_syscall.set_status("executing")
-                self.logger.log(
-                    f"{llm_syscall.agent_name} is executing. \n", "execute"
-                )
-                llm_syscall.set_start_time(time.time())
+    def next_syscall(self, p_queue, syscall_func, block=True, timeout=None):
+        # 更新任务队列，提升等待过久的任务并取出优先级最高的任务
+        self.update_priority_queue(p_queue, syscall_func, block, timeout)
+        now = time.time()
+        p_queue.age(now)
+        process = p_queue.pop()
 
-                response = self.llm.address_syscall(llm_syscall)
-                llm_syscall.set_response(response)
-
-                llm_syscall.event.set()
-                llm_syscall.set_status("done")
-                llm_syscall.set_end_time(time.time())
+        process.syscall.set_priority(process.priority)
+        self.wait_times[process.priority].append(
+            now - process.syscall.get_created_time()
+        )
+        return process.syscall
+
+    def wait_time_stats(self):
+        """每一级的任务数以及等待时间的 p50/p99 (秒)"""
+        stats = {}
+        for level, wait_times in enumerate(self.wait_times):
+            # 先复制再排序，调度线程可能同时在追加记录
+            samples = sorted(list(wait_times))
+            if not samples:
+                continue
+            stats[level] = {
+                "count": len(samples),
+                "p50": samples[int(len(samples) * 0.5)],
+                "p99": samples[min(len(samples) - 1, int(len(samples) * 0.99))],
+            }
+        return stats
 
-            except IndexError:
-                pass
-            except Empty:
-                pass
-            except Exception:
-                traceback.print_exc()
+    def run_llm_syscall(self):
+        # self.activate: start/stop the scheduler
+        self.run_llm_processor(
+            lambda block=True, timeout=None: self.next_syscall(
+                self.llm_queues, self.get_llm_syscall, block, timeout
+            )
+        )
 
     def run_memory_syscall(self):
-        while self.active:
-            try:
-                # wait at a fixed time interval, if there is nothing received in the time interval, it will raise Empty
-                self.update_priority_queue(self.mem_queues, self.get_memory_syscall)
-                memory_syscall = heapq.heappop(self.mem_queues).syscall
-
-                memory_syscall.set_status("executing")
-                self.logger.log(
-                    f"{memory_syscall.agent_name} is executing. \n", "execute"
-                )
-                memory_syscall.set_start_time(time.time())
-
-                response = self.memory_manager.address_request(memory_syscall)
-                memory_syscall.set_response(response)
-
-                memory_syscall.event.set()
-                memory_syscall.set_status("done")
-                memory_syscall.set_end_time(time.time())
-
-            except IndexError:
-                pass
-            except Empty:
-                pass
-            except Exception:
-                traceback.print_exc()
+        self.run_processor(
+            lambda: self.next_syscall(self.mem_queues, self.get_memory_syscall),
+            self.memory_manager.address_request,
+        )
 
     def run_storage_syscall(self):
-        while self.active:
-            try:
-                self.update_priority_queue(self.storage_queues, self.get_storage_syscall)
-                storage_syscall = heapq.heappop(self.storage_queues).syscall
-
-                storage_syscall.set_status("executing")
-                self.logger.log(
-                    f"{storage_syscall.agent_name} is executing. \n", "execute"
-                )
-                storage_syscall.set_start_time(time.time())
-
-                response = self.storage_manager.address_request(storage_syscall)
-                storage_syscall.set_response(response)
-
-                storage_syscall.event.set()
-                storage_syscall.set_status("done")
-                storage_syscall.set_end_time(time.time())
-
-                self.logger.log(
-                    f"Current request of {storage_syscall.agent_name} is done. Thread ID is {storage_syscall.get_pid()}\n",
-                    "done"
-                )
-
-            except IndexError:
-                pass
-            except Empty:
-                pass
-            except Exception:
-                traceback.print_exc()
+        self.run_processor(
+            lambda: self.next_syscall(self.storage_queues, self.get_storage_syscall),
+            self.storage_manager.address_request,
+        )
 
     def run_tool_syscall(self):
-        while self.active:
-            try:
-                self.update_priority_queue(self.tool_queues, self.get_tool_syscall)
-                tool_syscall = heapq.heappop(self.tool_queues).syscall
-
-                tool_syscall.set_status("executing")
-
-                tool_syscall.set_start_time(time.time())
-
-                response = self.tool_manager.address_request(tool_syscall)
-                tool_syscall.set_response(response)
-
-                tool_syscall.event.set()
-                tool_syscall.set_status("done")
-                tool_syscall.set_end_time(time.time())
-                
-            except IndexError:
-                pass
-            except Empty:
-                pass
-            except Exception:
-                traceback.print_exc()
+        self.run_processor(
+            lambda: self.next_syscall(self.tool_queues, self.get_tool_syscall),
+            self.tool_manager.address_request,
+        )
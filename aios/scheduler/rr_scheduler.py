@@ -1,44 +1,50 @@
-# Implementing a round robin scheduler using threads
-# Allows multiple agents to run at the same time, with each getting a fixed
-# chunk of processor time
+# Implementing a round robin scheduler for the LLM syscalls
+# Each LLM syscall gets a fixed time slice (time_limit) of generation. When the
+# slice is used up, the LLM core saves the partial response in the context
+# manager and the syscall goes back to the end of the ready queue; it resumes
+# from the saved context the next time it is dispatched. Long generations
+# therefore no longer block the short ones queued behind them.
+#
+# The memory, storage and tool syscalls are short and run in FIFO order.
 
-from .base import BaseScheduler
-
-
-# allows for memory to be shared safely between threads
-from queue import Queue, Empty
-
-
-from ..context.simple_context import SimpleContextManager
+from aios.context.simple_context import SimpleContextManager
 
 from aios.hooks.types.llm import LLMRequestQueueGetMessage
 from aios.hooks.types.memory import MemoryRequestQueueGetMessage
 from aios.hooks.types.tool import ToolRequestQueueGetMessage
 from aios.hooks.types.storage import StorageRequestQueueGetMessage
 
-from queue import Queue, Empty
+from aios.memory.manager import MemoryManager
+from aios.storage.storage import StorageManager
+from aios.llm_core.adapter import LLMAdapter
+from aios.tool.manager import ToolManager
 
-import traceback
-import time
-from aios.utils.logger import SchedulerLogger
-
-from threading import Thread
+from cerebrum.llm.communication import Response
 
 from .base import Scheduler
 
+from collections import deque
+from queue import Empty
+from threading import Condition, Thread
+
+import traceback
+import time
+
 
 class RRScheduler(Scheduler):
     def __init__(
         self,
-        llm,
-        memory_manager,
-        storage_manager,
-        tool_manager,
+        llm: LLMAdapter,
+        memory_manager: MemoryManager,
+        storage_manager: StorageManager,
+        tool_manager: ToolManager,
         log_mode,
         get_llm_syscall: LLMRequestQueueGetMessage,
         get_memory_syscall: MemoryRequestQueueGetMessage,
         get_storage_syscall: StorageRequestQueueGetMessage,
         get_tool_syscall: ToolRequestQueueGetMessage,
+        scheduler_type: str,
+        llm_workers: int | None = None,
     ):
         super().__init__(
             llm,
@@ -50,138 +56,102 @@ class RRScheduler(Scheduler):
             get_memory_syscall,
             get_storage_syscall,
             get_tool_syscall,
+            llm_workers,
         )
-        self.llm = llm
+        # seconds of generation an LLM syscall gets before being switched out
         self.time_limit = 0.5
-        self.simple_context_manager = SimpleContextManager()
 
-    def run_llm_request(self):
-        while self.active:
-            try:
-                llm_syscall = self.get_llm_request()
-
-                llm_syscall.set_status("executing")
-                self.logger.log(
-                    f"{llm_syscall.agent_name} is executing. \n", "execute"
-                )
-                llm_syscall.set_start_time(time.time())
-
-                response = self.llm.address_request(llm_syscall)
-                llm_syscall.set_response(response)
-
-                # self.llm.address_request(agent_request)
-
-                llm_syscall.event.set()
-                llm_syscall.set_status("done")
-                llm_syscall.set_end_time(time.time())
-
-                self.logger.log(
-                    f"Current request of {llm_syscall.agent_name} is done. Thread ID is {llm_syscall.get_pid()}\n",
-                    "done",
-                )
-                # wait at a fixed time interval, if there is nothing received in the time interval, it will raise Empty
-
-            except Empty:
-                pass
+        # the LLM core snapshots the preempted generations and restores them
+        # when they resume
+        if getattr(self.llm, "context_manager", None) is None:
+            self.llm.context_manager = SimpleContextManager()
+        self.context_manager = self.llm.context_manager
+
+        # LLM syscalls ready to run, both new and preempted ones
+        self.ready_queue = deque()
+        self.ready_condition = Condition()
+        self.request_processors["llm_syscall_admitter"] = Thread(
+            target=self.admit_llm_syscalls
+        )
 
-            except Exception:
-                traceback.print_exc()
+    def stop(self):
+        """stop the scheduler"""
+        with self.ready_condition:
+            self.active = False
+            self.ready_condition.notify_all()
+        super().stop()
 
-    def run_memory_request(self):
+    def admit_llm_syscalls(self):
+        """Move the incoming LLM syscalls to the end of the ready queue"""
         while self.active:
             try:
-                # wait at a fixed time interval, if there is nothing received in the time interval, it will raise Empty
-                agent_request = self.get_memory_request()
-
-                agent_request.set_status("executing")
-                self.logger.log(
-                    f"{agent_request.agent_name} is executing. \n", "execute"
-                )
-                agent_request.set_start_time(time.time())
-
-                response = self.memory_manager.address_request(agent_request)
-                agent_request.set_response(response)
-
-                # self.llm.address_request(agent_request)
-
-                agent_request.event.set()
-                agent_request.set_status("done")
-                agent_request.set_end_time(time.time())
-
-                self.logger.log(
-                    f"Current request of {agent_request.agent_name} is done. Thread ID is {agent_request.get_pid()}\n",
-                    "done",
-                )
-                # wait at a fixed time interval, if there is nothing received in the time interval, it will raise Empty
-
+                syscall = self.get_llm_syscall()
             except Empty:
-                pass
-
+                continue
             except Exception:
                 traceback.print_exc()
+                continue
 
-    def run_storage_request(self):
-        while self.active:
-            try:
-                # wait at a fixed time interval, if there is nothing received in the time interval, it will raise Empty
-                agent_request = self.get_memory_request()
+            self.requeue_llm_syscall(syscall)
 
-                agent_request.set_status("executing")
-                self.logger.log(
-                    f"{agent_request.agent_name} is executing. \n", "execute"
-                )
-                agent_request.set_start_time(time.time())
+    def requeue_llm_syscall(self, syscall):
+        with self.ready_condition:
+            self.ready_queue.append(syscall)
+            self.ready_condition.notify()
 
-                response = self.storage_manager.address_request(agent_request)
-                agent_request.set_response(response)
-
-                # self.llm.address_request(agent_request)
-
-                agent_request.event.set()
-                agent_request.set_status("done")
-                agent_request.set_end_time(time.time())
-
-                self.logger.log(
-                    f"Current request of {agent_request.agent_name} is done. Thread ID is {agent_request.get_pid()}\n",
-                    "done",
+    def next_llm_syscall(self, block=True, timeout=None):
+        with self.ready_condition:
+            if block:
+                self.ready_condition.wait_for(
+                    lambda: self.ready_queue or not self.active, timeout
                 )
-                # wait at a fixed time interval, if there is nothing received in the time interval, it will raise Empty
+            if not self.ready_queue:
+                raise Empty
 
-            except Empty:
-                pass
+            syscall = self.ready_queue.popleft()
 
-            except Exception:
-                traceback.print_exc()
+        syscall.set_time_limit(self.time_limit)
+        return syscall
 
-    def run_tool_request(self):
-        while self.active:
-            try:
-                # wait at a fixed time interval, if there is nothing received in the time interval, it will raise Empty
-                agent_request = self.get_memory_request()
-
-                agent_request.set_status("executing")
-                self.logger.log(
-                    f"{agent_request.agent_name} is executing. \n", "execute"
-                )
-                agent_request.set_start_time(time.time())
-
-                response = self.tool_manager.address_request(agent_request)
-                agent_request.set_response(response)
-
-                # self.llm.address_request(agent_request)
-
-                agent_request.event.set()
-                agent_request.set_status("done")
-                agent_request.set_end_time(time.time())
+    def execute_syscall(self, syscall, address_syscall):
+        syscall.set_status("executing")
+        self.logger.log(
+            f"{syscall.agent_name} is executing. \n", "execute"
+        )
+        # a resumed syscall keeps the time of its first dispatch
+        if syscall.get_start_time() is None:
+            syscall.set_start_time(time.time())
+
+        response = address_syscall(syscall)
+
+        if isinstance(response, Response) and not response.finished:
+            syscall.set_status("suspending")
+            self.logger.log(
+                f"{syscall.agent_name} is switched out after {self.time_limit}s. \n",
+                "suspend",
+            )
+            self.requeue_llm_syscall(syscall)
+            return
+
+        self.end_syscall(syscall, response)
+
+    def run_llm_syscall(self):
+        # preemption needs the streaming generation of the synchronous path
+        self.run_processor_pool(
+            self.rate_limited(self.next_llm_syscall),
+            self.llm.address_syscall,
+            self.llm_workers,
+        )
 
-                self.logger.log(
-                    f"Current request of {agent_request.agent_name} is done. Thread ID is {agent_request.get_pid()}\n",
-                    "done",
-                )
-                # wait at a fixed time interval, if there is nothing received in the time interval, it will raise Empty
+    def run_memory_syscall(self):
+        self.run_processor(
+            self.get_memory_syscall, self.memory_manager.address_request
+        )
 
-            except Empty:
-                pass
+    def run_storage_syscall(self):
+        self.run_processor(
+            self.get_storage_syscall, self.storage_manager.address_request
+        )
 
-            except Exception:
-                traceback.print_exc()
+    def run_tool_syscall(self):
+        self.run_processor(self.get_tool_syscall, self.tool_manager.address_request)
@@ -0,0 +1,130 @@
+# Shortest-expected-job-first scheduling. The cost of an LLM syscall is
+# estimated from the length of its prompt plus the number of tokens it may
+# generate, and the cheapest syscall is dispatched first. The other syscall
+# types are cheap and keep the FIFO order.
+#
+# To bound starvation, the cost of a waiting syscall decreases by
+# aging_rate tokens per second of waiting. Since every syscall ages at the
+# same rate, ordering by cost + aging_rate * arrival_time is equivalent and
+# does not change while the syscalls wait, so a plain heap can be used.
+
+from aios.hooks.types.llm import LLMRequestQueueGetMessage
+from aios.hooks.types.memory import MemoryRequestQueueGetMessage
+from aios.hooks.types.tool import ToolRequestQueueGetMessage
+from aios.hooks.types.storage import StorageRequestQueueGetMessage
+
+from aios.memory.manager import MemoryManager
+from aios.storage.storage import StorageManager
+from aios.llm_core.adapter import LLMAdapter
+from aios.tool.manager import ToolManager
+
+from .base import Scheduler
+
+from itertools import count
+from queue import Empty
+
+import heapq
+import json
+import time
+
+# average number of characters per token for English text
+CHARS_PER_TOKEN = 4
+
+def estimate_prompt_tokens(messages, tools=None) -> int:
+    """Cheap estimate of the number of prompt tokens, without a tokenizer"""
+    chars = 0
+    for message in messages or []:
+        content = message.get("content")
+        chars += len(content) if isinstance(content, str) else len(str(content))
+    if tools:
+        chars += len(json.dumps(tools))
+    return chars // CHARS_PER_TOKEN + 1
+
+class ShortestJobQueue:
+    def __init__(self, aging_rate: float):
+        self.aging_rate = aging_rate
+        self.heap = []
+        self.seq = count()
+
+    def __len__(self):
+        return len(self.heap)
+
+    def push(self, syscall, cost, arrival_time):
+        key = cost + self.aging_rate * arrival_time
+        heapq.heappush(self.heap, (key, next(self.seq), syscall))
+
+    def pop(self):
+        return heapq.heappop(self.heap)[2]
+
+class SJFScheduler(Scheduler):
+    def __init__(
+        self,
+        llm: LLMAdapter,
+        memory_manager: MemoryManager,
+        storage_manager: StorageManager,
+        tool_manager: ToolManager,
+        log_mode,
+        get_llm_syscall: LLMRequestQueueGetMessage,
+        get_memory_syscall: MemoryRequestQueueGetMessage,
+        get_storage_syscall: StorageRequestQueueGetMessage,
+        get_tool_syscall: ToolRequestQueueGetMessage,
+        scheduler_type: str,
+        llm_workers: int | None = None,
+    ):
+        super().__init__(
+            llm,
+            memory_manager,
+            storage_manager,
+            tool_manager,
+            log_mode,
+            get_llm_syscall,
+            get_memory_syscall,
+            get_storage_syscall,
+            get_tool_syscall,
+            llm_workers,
+        )
+        # tokens of cost forgiven per second of waiting
+        self.aging_rate = 100.0
+        self.llm_queue = ShortestJobQueue(self.aging_rate)
+
+    def estimate_cost(self, llm_syscall) -> int:
+        """Expected number of tokens processed for the syscall"""
+        query = llm_syscall.query
+        max_new_tokens = getattr(query, "max_new_tokens", None) or getattr(
+            self.llm, "max_new_tokens", 256
+        )
+        return estimate_prompt_tokens(query.messages, query.tools) + max_new_tokens
+
+    def push_llm_syscall(self, llm_syscall):
+        arrival_time = llm_syscall.get_created_time() or time.time()
+        self.llm_queue.push(llm_syscall, self.estimate_cost(llm_syscall), arrival_time)
+
+    def next_llm_syscall(self, block=True, timeout=None):
+        # block only when nothing is waiting, then take every syscall that
+        # has arrived so that the cheapest one can be picked
+        if not self.llm_queue:
+            self.push_llm_syscall(self.get_llm_syscall(block=block, timeout=timeout))
+
+        while True:
+            try:
+                self.push_llm_syscall(self.get_llm_syscall(block=False))
+            except Empty:
+                break
+
+        return self.llm_queue.pop()
+
+    def run_llm_syscall(self):
+        self.run_llm_processor(self.next_llm_syscall)
+
+    def run_memory_syscall(self):
+        self.run_processor(
+            self.get_memory_syscall, self.memory_manager.address_request
+        )
+
+    def run_storage_syscall(self):
+        self.run_processor(
+            self.get_storage_syscall, self.storage_manager.address_request
+        )
+
+    def run_tool_syscall(self):
+        self.run_processor(self.get_tool_syscall, self.tool_manager.address_request)
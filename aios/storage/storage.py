@@ -9,6 +9,8 @@ from .storage_classes.db_storage import ChromaDB
 class StorageManager:
     def __init__(self, root_dir, use_vector_db=False):
         self.root_dir = root_dir
+        self.storage_path = root_dir
+        self.use_vector_db = use_vector_db
         os.makedirs(self.root_dir, exist_ok=True)
         if use_vector_db:
             self.vector_db = ChromaDB()
@@ -28,21 +30,23 @@ class StorageManager:
                 agent_request.agent_name, query=agent_request.prompt
             )
 
+    def file_name(self, aname, aid=None, rid=None):
+        """ name of the file of a round (aid, rid), else of the agent aname """
+        if aid is not None and rid is not None:
+            return f"{aid}_{rid}"
+        return aname
+
     def sto_create(self, aname, aid=None, rid=None):
-        file_path = os.path.join(
-            self.storage_path, f"{aid}_{rid}.dat" if aid and rid else f"{aname}.dat"
-        )
+        file_path = os.path.join(self.storage_path, f"{self.file_name(aname, aid, rid)}.dat")
 
         if not os.path.exists(file_path):
             with open(file_path, "wb") as file:
                 file.write(b"")
         if self.use_vector_db:
-            self.vector_db.create_collection(f"{aid}_{rid}" if aid and rid else aname)
+            self.vector_db.create_collection(self.file_name(aname, aid, rid))
 
     def sto_read(self, aname, aid=None, rid=None):
-        file_path = os.path.join(
-            self.storage_path, f"{aid}_{rid}.dat" if aid and rid else f"{aname}.dat"
-        )
+        file_path = os.path.join(self.storage_path, f"{self.file_name(aname, aid, rid)}.dat")
 
         if os.path.exists(file_path):
             with open(file_path, "rb") as file:
@@ -56,29 +60,25 @@ class StorageManager:
 
     def sto_write(self, aname, s, aid=None, rid=None):
         """Writes compressed data to a storage file and adds it to the vector database"""
-        file_path = os.path.join(
-            self.storage_path, f"{aid}_{rid}.dat" if aid and rid else f"{aname}.dat"
-        )
+        file_path = os.path.join(self.storage_path, f"{self.file_name(aname, aid, rid)}.dat")
 
         with open(file_path, "ab") as file:
             compressed_data = zlib.compress(pickle.dumps(s))
             file.write(compressed_data)
         if self.use_vector_db:
-            self.vector_db.add(f"{aid}_{rid}" if aid and rid else aname, s)
+            self.vector_db.add(self.file_name(aname, aid, rid), s)
 
     def sto_clear(self, aname, aid=None, rid=None):
-        file_path = os.path.join(
-            self.storage_path, f"{aid}_{rid}.dat" if aid and rid else f"{aname}.dat"
-        )
+        file_path = os.path.join(self.storage_path, f"{self.file_name(aname, aid, rid)}.dat")
 
         if os.path.exists(file_path):
             os.remove(file_path)
         if self.use_vector_db:
-            self.vector_db.delete(f"{aid}_{rid}" if aid and rid else aname)
+            self.vector_db.delete(self.file_name(aname, aid, rid))
 
     def sto_retrieve(self, aname, query, aid=None, rid=None):
         if self.use_vector_db:
             return self.vector_db.retrieve(
-                f"{aid}_{rid}" if aid and rid else aname, query
+                self.file_name(aname, aid, rid), query
             )
         return None
@@ -1,7 +1,41 @@
-import random
+from itertools import count
+
+import secrets
+
+# Prefix of the string ids of this kernel process, so that the ids generated
+# by different kernels, or by the same kernel before a restart (e.g. the tool
+# call ids kept in stored conversations), do not collide
+NODE_ID = secrets.token_hex(4)
+
+
+class IdGenerator:
+    """
+    Monotonic ids, unique within the process. ``next`` on an
+    itertools.count is a single C call that the GIL makes atomic, so the
+    threads draw ids without a lock.
+    """
+
+    def __init__(self, prefix: str = "", start: int = 1):
+        self.prefix = prefix
+        self.counter = count(start)
+
+    def next_int(self) -> int:
+        return next(self.counter)
+
+    def __call__(self) -> str:
+        return f"{self.prefix}{next(self.counter)}"
+
+
+# ids of the tool calls parsed from the responses of the models without
+# native tool calling
+tool_call_ids = IdGenerator(prefix=f"call_{NODE_ID}_")
+# process ids of the syscalls
+syscall_ids = IdGenerator()
+# ids of the agent executions submitted to the agent factory
+execution_ids = IdGenerator()
 
 
 def generator_tool_call_id():
     """generate tool call id
     """
-    return str(random.randint(0, 1000))
+    return tool_call_ids()
@@ -0,0 +1,151 @@
+# Extraction of the JSON value (tool calls, JSON responses) from the text
+# generated by a model, which may wrap it in prose or code fences or follow it
+# with more text. The scanner balances the brackets of the text in one pass,
+# skipping the strings, and parses the first complete top-level array or
+# object. It can be fed the text of a stream chunk by chunk, so that a value
+# is found as soon as its last bracket is generated.
+
+import json
+import re
+
+
+class JSONScanner:
+    """
+    Incremental scanner of the first JSON array or object of a text.
+
+    Args:
+        accept (callable, optional) : Predicate on the parsed values, the
+                                      values it rejects are skipped, and the
+                                      values nested in them are tried.
+    """
+
+    closers = {"[": "]", "{": "}"}
+    opener = re.compile(r"[\[{]")
+    structural = re.compile(r'[\[\]{}"]')
+    string_end = re.compile(r'["\\]')
+    # an object starts with a key or is empty, which rules out most of the
+    # braces of the prose without parsing them
+    object_start = re.compile(r'\{\s*["}]')
+    # and an array with a value or nothing
+    array_start = re.compile(r'\[\s*[\[\]{"\-0-9tfn]')
+
+    # values nested in an invalid one that are tried, and rescans of the text
+    # after a value never closed, which bound the work to a few passes
+    max_fallbacks = 32
+    max_rescans = 8
+
+    def __init__(self, accept=None):
+        self.accept = accept
+        self.buffer = ""
+        self.pos = 0
+        self.stack = []  # positions of the open brackets
+        self.spans = []  # balanced values nested in the current value
+        self.in_string = False
+        self.found = False
+        self.value = None
+
+    def feed(self, text: str):
+        """Scan the next chunk of text, return the value once it is found"""
+        if not self.found:
+            self.buffer += text
+            self.scan()
+        return self.value
+
+    def finish(self):
+        """
+        End of the text: a value still open is not JSON, try the values
+        nested in it and the text after its first bracket
+        """
+        rescans = 0
+        while not self.found and self.stack and rescans < self.max_rescans:
+            start = self.stack[0]
+            self.settle(None)
+            if not self.found:
+                self.pos = start + 1
+                self.scan()
+                rescans += 1
+        return self.value
+
+    def scan(self):
+        buffer = self.buffer
+        while not self.found:
+            if not self.stack:
+                match = self.opener.search(buffer, self.pos)
+                if match is None:
+                    # only prose so far
+                    self.buffer = buffer = ""
+                    self.pos = 0
+                    return
+                start = match.start()
+                if start > len(buffer) // 2:
+                    # drop the prose scanned so far once it is most of the
+                    # buffer, copying at every opener would be quadratic
+                    self.buffer = buffer = buffer[start:]
+                    start = 0
+                self.stack.append(start)
+                self.pos = start + 1
+            elif self.in_string:
+                match = self.string_end.search(buffer, self.pos)
+                if match is None:
+                    self.pos = len(buffer)
+                    return
+                if match.group() == "\\":
+                    if match.end() >= len(buffer):
+                        # the escaped character is in the next chunk
+                        self.pos = match.start()
+                        return
+                    self.pos = match.end() + 1
+                else:
+                    self.in_string = False
+                    self.pos = match.end()
+            else:
+                match = self.structural.search(buffer, self.pos)
+                if match is None:
+                    self.pos = len(buffer)
+                    return
+                char = match.group()
+                self.pos = match.end()
+                if char == '"':
+                    self.in_string = True
+                elif char in self.closers:
+                    self.stack.append(match.start())
+                else:
+                    start = self.stack.pop()
+                    if self.closers[buffer[start]] != char:
+                        self.settle(None)
+                    elif self.stack:
+                        self.spans.append((start, self.pos))
+                    else:
+                        self.settle((start, self.pos))
+
+    def settle(self, span):
+        """Parse the value closed at span, or the values nested in it"""
+        candidates = sorted(self.spans, key=lambda span: (span[0], -span[1]))
+        candidates = ([span] if span else []) + candidates[: self.max_fallbacks]
+        for start, end in candidates:
+            start_pattern = self.object_start if self.buffer[start] == "{" else self.array_start
+            if not start_pattern.match(self.buffer, start):
+                continue
+            try:
+                value = json.loads(self.buffer[start:end])
+            except (ValueError, RecursionError):
+                # not JSON, or nested deeper than the parser recurses
+                continue
+            if self.accept is None or self.accept(value):
+                self.found = True
+                self.value = value
+                return
+
+        self.stack = []
+        self.spans = []
+        self.in_string = False
+
+
+def extract_json(text: str, accept=None):
+    """
+    The first JSON array or object of the text accepted by ``accept``, or
+    None if there is none
+    """
+    scanner = JSONScanner(accept)
+    scanner.feed(text)
+    return scanner.finish()
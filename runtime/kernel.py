@@ -1,5 +1,7 @@
 from typing_extensions import Literal
 from fastapi import FastAPI, HTTPException, Request
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from typing import Optional, Dict, Any
 from dotenv import load_dotenv
@@ -17,6 +19,8 @@ from aios.hooks.modules.agent import useFactory
 from aios.hooks.modules.scheduler import scheduler_nonblock as build_scheduler
 from aios.hooks.syscall import useSysCall
 from aios.config.config_manager import config
+from aios.llm_core.http_pool import http_clients
+from aios.llm_core.model_pool import model_pool
 
 from cerebrum.llm.communication import LLMQuery
 
@@ -47,9 +51,11 @@ active_components = {
     "tool": None
 }
 
-scheduler_type = "NPPS" # Support FIFO, and NPPS, set None for using FIFO(Default)
+scheduler_type = "NPPS" # Support FIFO, NPPS, SJF and RR, set None for using FIFO(Default)
 
 send_request, SysCallWrapper = useSysCall()
+send_request_async = SysCallWrapper.send_request_async
+send_request_stream = SysCallWrapper.send_request_stream
 
 # Configure the root logger
 logging.basicConfig(
@@ -70,6 +76,25 @@ class LLMConfig(BaseModel):
     log_mode: str = "INFO"
     llm_backend: str = "default"
     api_key: str | None = None
+    max_concurrency: int | list[int] | None = None
+    router_strategy: str = "simple"
+    max_batch_size: int = 8
+    cache_size: int = 1024
+    cache_ttl: Optional[float] = None
+    cache_path: Optional[str] = None
+    max_retries: int = 2
+    retry_backoff: float = 0.5
+    breaker_threshold: int = 5
+    breaker_reset_timeout: float = 30.0
+    rate_limits: Optional[Dict[str, Dict[str, float]]] = None
+    agent_rpm: Optional[float] = None
+    agent_tpm: Optional[float] = None
+    agent_quotas: Optional[Dict[str, Dict[str, float]]] = None
+    dtype: str = "auto"
+    model_pool_memory_gb: Optional[float] = None
+    decoding: str = "sample"
+    kv_cache_entries: int = 4
+    http_pool: Optional[Dict[str, Any]] = None
 
 
 class StorageConfig(BaseModel):
@@ -80,8 +105,8 @@ class StorageConfig(BaseModel):
 
 class MemoryConfig(BaseModel):
     memory_limit: int = 104857600  # 100MB in bytes
-    eviction_k: int = 10
-    custom_eviction_policy: Optional[str] = None
+    eviction_k: int = 2  # K of the LRU-K eviction policy, accesses before a round counts as reused
+    custom_eviction_policy: Optional[str] = None  # lru, lru_k (default), arc or w_tinylfu
 
 
 class ToolManagerConfig(BaseModel):
@@ -92,12 +117,14 @@ class ToolManagerConfig(BaseModel):
 class SchedulerConfig(BaseModel):
     log_mode: str = "INFO"
     max_workers: int = 64
+    llm_workers: Optional[int] = None
     custom_syscalls: Optional[Dict[str, Any]] = None
 
 
 class SchedulerConfig(BaseModel):
     log_mode: str = "INFO"
     max_workers: int = 64
+    llm_workers: Optional[int] = None
     custom_syscalls: Optional[Dict[str, Any]] = None
 
 
@@ -110,6 +137,8 @@ class QueryRequest(BaseModel):
     agent_name: str
     query_type: Literal["llm", "tool", "storage", "memory"]
     query_data: LLMQuery
+    # stream the chunks of a chat response as NDJSON lines
+    stream: bool = False
 
 
 def initialize_components():
@@ -127,6 +156,25 @@ def initialize_components():
                 eval_device=llm_config.get("eval_device", "cuda:0"),
                 max_new_tokens=llm_config.get("max_new_tokens", 256),
                 log_mode=llm_config.get("log_mode", "console"),
+                max_concurrency=llm_config.get("max_concurrency"),
+                strategy=llm_config.get("router_strategy", "simple"),
+                max_batch_size=llm_config.get("max_batch_size", 8),
+                cache_size=llm_config.get("cache_size", 1024),
+                cache_ttl=llm_config.get("cache_ttl"),
+                cache_path=llm_config.get("cache_path"),
+                max_retries=llm_config.get("max_retries", 2),
+                retry_backoff=llm_config.get("retry_backoff", 0.5),
+                breaker_threshold=llm_config.get("breaker_threshold", 5),
+                breaker_reset_timeout=llm_config.get("breaker_reset_timeout", 30.0),
+                rate_limits=llm_config.get("rate_limits"),
+                agent_rpm=llm_config.get("agent_rpm"),
+                agent_tpm=llm_config.get("agent_tpm"),
+                agent_quotas=llm_config.get("agent_quotas"),
+                dtype=llm_config.get("dtype", "auto"),
+                model_pool_memory_gb=llm_config.get("model_pool_memory_gb"),
+                decoding=llm_config.get("decoding", "sample"),
+                kv_cache_entries=llm_config.get("kv_cache_entries", 4),
+                http_pool=llm_config.get("http_pool"),
             )
             
             if llm:
@@ -201,6 +249,25 @@ async def setup_llm(config: LLMConfig):
             eval_device=config.eval_device,
             max_new_tokens=config.max_new_tokens,
             log_mode=config.log_mode,
+            max_concurrency=config.max_concurrency,
+            strategy=config.router_strategy,
+            max_batch_size=config.max_batch_size,
+            cache_size=config.cache_size,
+            cache_ttl=config.cache_ttl,
+            cache_path=config.cache_path,
+            max_retries=config.max_retries,
+            retry_backoff=config.retry_backoff,
+            breaker_threshold=config.breaker_threshold,
+            breaker_reset_timeout=config.breaker_reset_timeout,
+            rate_limits=config.rate_limits,
+            agent_rpm=config.agent_rpm,
+            agent_tpm=config.agent_tpm,
+            agent_quotas=config.agent_quotas,
+            dtype=config.dtype,
+            model_pool_memory_gb=config.model_pool_memory_gb,
+            decoding=config.decoding,
+            kv_cache_entries=config.kv_cache_entries,
+            http_pool=config.http_pool,
         )
         active_components["llm"] = llm
         return {"status": "success", "message": "LLM core initialized"}
@@ -243,6 +310,7 @@ async def setup_memory(config: MemoryConfig):
             memory_limit=config.memory_limit,
             eviction_k=config.eviction_k,
             storage_manager=active_components["storage"],
+            eviction_policy=config.custom_eviction_policy,
         )
         active_components["memory"] = memory_manager
         return {"status": "success", "message": "Memory manager initialized"}
@@ -336,7 +404,8 @@ async def setup_scheduler(config: SchedulerConfig):
             get_memory_syscall=None,
             get_storage_syscall=None,
             get_tool_syscall=None,
-            scheduler_type=scheduler_type
+            scheduler_type=scheduler_type,
+            llm_workers=config.llm_workers,
         )
 
         active_components["scheduler"] = scheduler
@@ -354,11 +423,42 @@ async def setup_scheduler(config: SchedulerConfig):
 @app.get("/core/status")
 async def get_status():
     """Get the status of all core components."""
-    return {
+    status = {
         component: "active" if instance else "inactive"
         for component, instance in active_components.items()
     }
 
+    llm = active_components["llm"]
+    if llm and getattr(llm, "cache", None):
+        status["llm_cache"] = llm.cache.stats()
+    if llm and hasattr(llm, "endpoint_health"):
+        status["llm_endpoints"] = llm.endpoint_health()
+    if llm and getattr(llm, "rate_limiter", None):
+        status["llm_rate_limits"] = llm.rate_limiter.stats()
+    if model_pool.models:
+        status["llm_model_pool"] = model_pool.stats()
+    if http_clients.clients:
+        status["llm_http_clients"] = http_clients.stats()
+    memory = active_components["memory"]
+    if memory and hasattr(memory, "stats"):
+        status["memory_usage"] = memory.stats()
+    scheduler = active_components.get("scheduler")
+    if scheduler and hasattr(scheduler, "wait_time_stats"):
+        status["scheduler_wait_times"] = scheduler.wait_time_stats()
+
+    return status
+
+
+@app.post("/core/llm/cache/clear")
+async def clear_llm_cache():
+    """Invalidate every cached LLM completion."""
+    llm = active_components["llm"]
+    if not llm or not getattr(llm, "cache", None):
+        raise HTTPException(status_code=400, detail="LLM completion cache not enabled")
+
+    llm.cache.clear()
+    return {"status": "success", "message": "LLM completion cache cleared"}
+
 
 @app.post("/agents/submit")
 async def submit_agent(config: AgentSubmit):
@@ -463,6 +563,18 @@ async def cleanup_components():
         )
 
 
+async def stream_query(agent_name, query):
+    """
+    One NDJSON line per chunk of the response, {"chunk": text}, then a last
+    line with the same result as a query that is not streamed.
+    """
+    async for item in send_request_stream(agent_name, query):
+        if isinstance(item, str):
+            yield json.dumps({"chunk": item}) + "\n"
+        else:
+            yield json.dumps(jsonable_encoder(item)) + "\n"
+
+
 @app.post("/query")
 async def handle_query(request: QueryRequest):
     try:
@@ -473,7 +585,14 @@ async def handle_query(request: QueryRequest):
                 action_type=request.query_data.action_type,
                 message_return_type=request.query_data.message_return_type,
             )
-            return send_request(request.agent_name, query)
+            if request.stream and query.action_type == "chat":
+                return StreamingResponse(
+                    stream_query(request.agent_name, query),
+                    media_type="application/x-ndjson",
+                )
+            # await the syscall so that a slow completion does not block the
+            # event loop serving the other requests
+            return await send_request_async(request.agent_name, query)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
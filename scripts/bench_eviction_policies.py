@@ -0,0 +1,135 @@
+# Benchmark of the eviction policies of the memory manager
+# (aios.memory.eviction) on traces of the memory accesses of agents. Replays
+# the same trace through SingleMemoryManager with each policy, the spilled
+# rounds kept in a dict instead of files so that the disk does not dominate,
+# and reports the hit ratio of the reads, the bytes spilled to storage and
+# the time per operation.
+#
+# The trace is either recorded, a JSON lines file of
+#   {"op": "write" | "read" | "clear", "agent": ..., "round": ..., "size": bytes}
+# or generated from a mix of agents: chat agents that write a round per turn
+# and read the last few, retrieval agents that write rarely and read a few
+# popular rounds again and again, and scanning agents that read all their
+# rounds in turn, a loop longer than the memory.
+#
+# Usage: python scripts/bench_eviction_policies.py --memory_mb 8 --operations 50000
+#        python scripts/bench_eviction_policies.py --trace memory_trace.jsonl --memory_mb 100
+
+import argparse
+import json
+import math
+import os
+import random
+import time
+
+from aios.memory.eviction import EvictionPolicy, WTinyLFUPolicy
+from aios.memory.memory_classes.single_memory import SingleMemoryManager
+
+class DictStorage:
+    """The storage manager, in memory"""
+
+    def __init__(self):
+        self.data = {}
+
+    def sto_create(self, aname, aid=None, rid=None):
+        pass
+
+    def sto_read(self, aname, aid=None, rid=None):
+        return self.data.get((aid, rid))
+
+    def sto_write(self, aname, s, aid=None, rid=None):
+        self.data[(aid, rid)] = s
+
+    def sto_clear(self, aname, aid=None, rid=None):
+        for key in [key for key in self.data if key[0] == aname]:
+            del self.data[key]
+
+def make_trace(args):
+    """(operation, agent, round, size) of a mix of agents"""
+    rng = random.Random(args.seed)
+    kinds = ["chat", "retrieval", "scan"]
+    agents = {}  # agent -> [kind, rounds written, scan cursor]
+    next_agent = 0
+    trace = []
+
+    def round_size():
+        return max(1, int(rng.lognormvariate(math.log(args.mean_round_kb * 1024), 0.8)))
+
+    for _ in range(args.operations):
+        if len(agents) < args.agents:
+            agents[next_agent] = [kinds[next_agent % len(kinds)], 0, 0]
+            next_agent += 1
+            continue
+        agent = rng.choice(list(agents))
+        kind, rounds, cursor = agents[agent]
+        if rng.random() < args.finish_rate:
+            trace.append(("clear", agent, 0, 0))
+            del agents[agent]
+            continue
+
+        write_rate = {"chat": 0.5, "retrieval": 0.1, "scan": 0.3}[kind]
+        if rounds == 0 or rng.random() < write_rate:
+            trace.append(("write", agent, rounds, round_size()))
+            agents[agent][1] += 1
+        elif kind == "chat":
+            trace.append(("read", agent, rng.randrange(max(0, rounds - 4), rounds), 0))
+        elif kind == "retrieval":
+            # Zipf-like popularity, the first rounds are the most read
+            trace.append(("read", agent, min(rounds - 1, int(rng.paretovariate(1.2)) - 1), 0))
+        else:
+            trace.append(("read", agent, cursor % rounds, 0))
+            agents[agent][2] += 1
+    return trace
+
+def load_trace(path):
+    with open(path) as file:
+        return [
+            (entry["op"], entry["agent"], entry.get("round", 0), entry.get("size", 0))
+            for entry in map(json.loads, file)
+        ]
+
+def replay(policy, trace, args, payload):
+    memory = SingleMemoryManager(
+        args.memory_mb * 2**20, args.k, DictStorage(), eviction_policy=policy
+    )
+    start = time.perf_counter()
+    for operation, agent, round_id, size in trace:
+        if operation == "write":
+            offset = random.randrange(len(payload) - size) if size < len(payload) else 0
+            memory.mem_write(agent, round_id, payload[offset:offset + size])
+        elif operation == "read":
+            memory.mem_read(agent, round_id)
+        else:
+            memory.mem_clear(agent)
+    elapsed = time.perf_counter() - start
+
+    stats = memory.stats()
+    hit_ratio = stats["read_hits"] / stats["reads"] if stats["reads"] else 0.0
+    print(
+        f"{policy:<10} hit ratio={hit_ratio:.3f}  spilled={stats['evicted_bytes'] / 2**20:8.1f}MB "
+        f"({stats['evicted_rounds']} rounds)  {elapsed / len(trace) * 1e6:7.1f}us/op"
+    )
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--trace", type=str, default=None, help="recorded trace, JSON lines")
+    parser.add_argument("--policies", nargs="+", default=[name.lower() for name in EvictionPolicy.__members__])
+    parser.add_argument("--memory_mb", type=int, default=8)
+    parser.add_argument("--k", type=int, default=2, help="eviction_k")
+    parser.add_argument("--window_share", type=float, default=WTinyLFUPolicy.window_share, help="window of W-TinyLFU")
+    parser.add_argument("--operations", type=int, default=50000)
+    parser.add_argument("--agents", type=int, default=24, help="agents running at once")
+    parser.add_argument("--finish_rate", type=float, default=0.001)
+    parser.add_argument("--mean_round_kb", type=float, default=4)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    WTinyLFUPolicy.window_share = args.window_share
+    trace = load_trace(args.trace) if args.trace else make_trace(args)
+    reads = sum(operation == "read" for operation, *_ in trace)
+    print(f"operations={len(trace)} reads={reads} memory={args.memory_mb}MB")
+
+    # random text, which zlib compresses about 2x like in memory
+    payload = os.urandom(2**20).hex()
+    for policy in args.policies:
+        replay(policy, trace, args, payload)
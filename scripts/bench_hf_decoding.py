@@ -0,0 +1,56 @@
+# Benchmark of the decoding of the models loaded in process, on CPU with a
+# tiny model from the Hugging Face hub. Runs the same multi-turn
+# conversation with each decoding profile, with and without the reuse of the
+# attention keys and values across the turns, and reports the time per turn.
+#
+# Usage: python scripts/bench_hf_decoding.py --model hf-internal-testing/tiny-random-LlamaForCausalLM --turns 8
+
+import argparse
+import os
+import statistics
+import time
+
+from aios.llm_core.local import HfLocalBackend
+from aios.llm_core.model_pool import model_pool
+
+def conversation(backend, args):
+    messages = [{"role": "system", "content": "You are a helpful assistant. " * args.system_repeats}]
+    latencies = []
+    for turn in range(args.turns):
+        messages.append({"role": "user", "content": f"Tell me about topic number {turn}."})
+        start = time.time()
+        response = backend(messages, temperature=0.0)
+        latencies.append(time.time() - start)
+        messages.append({"role": "assistant", "content": response})
+    return latencies
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--model", default="hf-internal-testing/tiny-random-LlamaForCausalLM")
+    parser.add_argument("--turns", type=int, default=8)
+    parser.add_argument("--max_new_tokens", type=int, default=32)
+    parser.add_argument("--system_repeats", type=int, default=50,
+                        help="length of the system prompt shared by the turns")
+    args = parser.parse_args()
+
+    os.environ.setdefault("HUGGING_FACE_API_KEY", "")
+
+    for decoding in ["beam", "sample", "greedy"]:
+        for kv_cache_entries in [0, 4]:
+            backend = HfLocalBackend(
+                args.model,
+                device="cpu",
+                max_new_tokens=args.max_new_tokens,
+                decoding=decoding,
+                kv_cache_entries=kv_cache_entries,
+            )
+            # load the model and warm up outside of the measure
+            backend([{"role": "user", "content": "hello"}], temperature=0.0)
+            latencies = conversation(backend, args)
+            print(
+                f"decoding={decoding:<7} kv_cache_entries={kv_cache_entries}  "
+                f"first turn={latencies[0] * 1e3:8.1f}ms  "
+                f"later turns mean={statistics.mean(latencies[1:]) * 1e3:8.1f}ms"
+            )
+
+    print(model_pool.stats()["models"][0]["caches"])
@@ -0,0 +1,71 @@
+# Benchmark of the generation of the ids (tool calls, syscalls, agent
+# executions) across threads. Each thread draws ids as fast as it can;
+# reports the ids per second and the ids drawn twice, for the random ids the
+# kernel used before, uuid4, a counter behind a lock, and the lock-free
+# counter of aios.utils.id_generator.
+#
+# Usage: python scripts/bench_id_generator.py --threads 1 4 16 --ids 100000
+
+import argparse
+import random
+import threading
+import time
+import uuid
+from itertools import count
+
+from aios.utils.id_generator import IdGenerator
+
+def random_ids():
+    return lambda: str(random.randint(0, 1000))
+
+def uuid_ids():
+    return lambda: str(uuid.uuid4())
+
+def locked_ids():
+    lock = threading.Lock()
+    counter = count(1)
+
+    def next_id():
+        with lock:
+            return f"call_{next(counter)}"
+
+    return next_id
+
+def run(name, make_generator, threads, ids_per_thread):
+    generator = make_generator()
+    results = [[] for _ in range(threads)]
+
+    def draw(out):
+        for _ in range(ids_per_thread):
+            out.append(generator())
+
+    workers = [threading.Thread(target=draw, args=(out,)) for out in results]
+    start = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - start
+
+    total = threads * ids_per_thread
+    unique = len({id_ for out in results for id_ in out})
+    print(
+        f"{name:<16} threads={threads:<3} {total / elapsed / 1e6:6.2f}M ids/s  "
+        f"duplicates={total - unique}"
+    )
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 4, 16])
+    parser.add_argument("--ids", type=int, default=100000, help="ids drawn per thread")
+    args = parser.parse_args()
+
+    generators = {
+        "randint": random_ids,
+        "uuid4": uuid_ids,
+        "locked counter": locked_ids,
+        "IdGenerator": lambda: IdGenerator(prefix="call_"),
+    }
+    for threads in args.threads:
+        for name, make_generator in generators.items():
+            run(name, make_generator, threads, args.ids)
@@ -0,0 +1,67 @@
+# Benchmark of the extraction of the JSON values (tool calls, JSON responses)
+# from the generated text. Compares the scanner with the regular expressions
+# it replaced on long and adversarial outputs, and times the scanner alone on
+# long prose full of brackets, where its time must grow linearly. The
+# correctness of the scanner is tested in tests/test_json_scanner.py.
+#
+# Usage: python scripts/bench_json_extract.py --sizes 1000 10000 30000 --prose_sizes 150000 1200000
+
+import argparse
+import json
+import re
+import time
+
+from aios.utils.json_scanner import extract_json
+
+def regex_extract(message):
+    """The extraction before the scanner, for comparison"""
+    match_array = re.search(r"\[\s*\{.*?\}\s*\]", message)
+    if match_array:
+        try:
+            return json.loads(match_array.group(0))
+        except json.JSONDecodeError:
+            pass
+    match_object = re.search(r"\{\s*.*?\s*\}", message)
+    if match_object:
+        try:
+            return json.loads(match_object.group(0))
+        except json.JSONDecodeError:
+            pass
+    return None
+
+def timed(extract, text):
+    start = time.perf_counter()
+    extract(text)
+    return time.perf_counter() - start
+
+def benchmark(args):
+    tool_call = json.dumps([{"name": "example__tool", "parameters": {"query": "weather"}}])
+    for size in args.sizes:
+        outputs = {
+            "prose then tool call": "word " * (size // 5) + tool_call,
+            "nested object": json.dumps({"data": [{"items": list(range(size // 8))}]}),
+            "unclosed braces": "{ " * (size // 2),
+            "braces without json": "{a} " * (size // 4),
+        }
+        for name, text in outputs.items():
+            print(
+                f"size={size:<8} {name:<22} regex={timed(regex_extract, text) * 1e3:9.2f}ms  "
+                f"scanner={timed(extract_json, text) * 1e3:9.2f}ms"
+            )
+
+def benchmark_prose(args):
+    for size in args.prose_sizes:
+        for name, text in {
+            "braces in prose": "x {a} " * (size // 6),
+            "brackets in prose": "x [a] " * (size // 6),
+        }.items():
+            print(f"size={size:<8} {name:<22} scanner={timed(extract_json, text) * 1e3:9.2f}ms")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 30000])
+    parser.add_argument("--prose_sizes", type=int, nargs="+", default=[150000, 300000, 600000, 1200000])
+    args = parser.parse_args()
+
+    benchmark(args)
+    benchmark_prose(args)
@@ -0,0 +1,115 @@
+# Load test of the kernel /query endpoint against a local stub LLM server.
+# The stub serves an OpenAI compatible chat completion endpoint that answers
+# after a fixed latency. Concurrent queries are sent to the kernel app while
+# /core/status is probed, to check that slow completions neither serialize
+# the queries nor stall the other endpoints.
+#
+# Usage: python scripts/bench_kernel_query.py --num_queries 200 --latency 0.2
+
+import argparse
+import asyncio
+import os
+import statistics
+import threading
+import time
+from types import SimpleNamespace
+
+import httpx
+import uvicorn
+from fastapi import FastAPI
+
+def start_stub_llm_server(port, latency):
+    stub = FastAPI()
+
+    @stub.post("/v1/chat/completions")
+    async def chat_completions():
+        await asyncio.sleep(latency)
+        return {
+            "id": "stub",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": "stub",
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": "stub response"},
+                "finish_reason": "stop",
+            }],
+            "usage": {"prompt_tokens": 1, "completion_tokens": 1, "total_tokens": 2},
+        }
+
+    server = uvicorn.Server(
+        uvicorn.Config(stub, host="127.0.0.1", port=port, log_level="error")
+    )
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return server
+
+async def load_test(app, num_queries, num_probes):
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://kernel", timeout=None) as client:
+        async def query(i):
+            response = await client.post("/query", json={
+                "agent_name": f"agent_{i}",
+                "query_type": "llm",
+                "query_data": {"messages": [{"role": "user", "content": f"hello {i}"}]},
+            })
+            response.raise_for_status()
+
+        async def probe():
+            latencies = []
+            for _ in range(num_probes):
+                start = time.time()
+                await client.get("/core/status")
+                latencies.append(time.time() - start)
+                await asyncio.sleep(0.01)
+            return latencies
+
+        start = time.time()
+        probe_task = asyncio.create_task(probe())
+        await asyncio.gather(*(query(i) for i in range(num_queries)))
+        elapsed = time.time() - start
+        return elapsed, await probe_task
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--num_queries", type=int, default=200)
+    parser.add_argument("--num_probes", type=int, default=50)
+    parser.add_argument("--latency", type=float, default=0.2)
+    parser.add_argument("--max_concurrency", type=int, default=256)
+    parser.add_argument("--port", type=int, default=8011)
+    args = parser.parse_args()
+
+    start_stub_llm_server(args.port, args.latency)
+    os.environ["OPENAI_API_BASE"] = f"http://127.0.0.1:{args.port}/v1"
+    os.environ.setdefault("OPENAI_API_KEY", "stub")
+
+    import runtime.kernel as kernel
+    from aios.llm_core.adapter import LLMAdapter
+
+    llm = LLMAdapter(llm_name="openai/stub", max_concurrency=args.max_concurrency)
+    noop_manager = SimpleNamespace(address_request=lambda syscall: None)
+    scheduler = kernel.build_scheduler(
+        llm=llm,
+        memory_manager=noop_manager,
+        storage_manager=noop_manager,
+        tool_manager=noop_manager,
+        log_mode="console",
+        get_llm_syscall=None,
+        get_memory_syscall=None,
+        get_storage_syscall=None,
+        get_tool_syscall=None,
+        scheduler_type="FIFO",
+    )
+    scheduler.logger.log = lambda content, level: None
+    kernel.active_components["llm"] = llm
+    scheduler.start()
+
+    elapsed, probes = asyncio.run(load_test(kernel.app, args.num_queries, args.num_probes))
+    scheduler.stop()
+
+    print(f"{args.num_queries} queries in {elapsed:.2f}s "
+          f"({args.num_queries / elapsed:.1f} queries/s, "
+          f"{args.num_queries * args.latency:.1f}s if served one at a time)")
+    print(f"/core/status under load: p50={statistics.median(probes) * 1e3:.1f}ms "
+          f"max={max(probes) * 1e3:.1f}ms")
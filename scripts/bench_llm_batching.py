@@ -0,0 +1,105 @@
+# Benchmark of batched LLM dispatch against a stub local backend. The stub
+# takes the place of HfLocalBackend: a generate call costs a fixed latency
+# plus a small cost per request in the batch, as a GPU does, and the batch
+# sizes it receives are recorded. Agents issue their syscalls concurrently;
+# reports the throughput and the batch sizes with and without batching.
+#
+# Usage: python scripts/bench_llm_batching.py --num_agents 64 --max_batch_size 8
+
+import argparse
+import os
+import threading
+import time
+from collections import Counter
+from types import SimpleNamespace
+
+from cerebrum.llm.communication import LLMQuery
+
+import aios.llm_core.adapter as adapter_module
+from aios.hooks.modules.scheduler import scheduler_nonblock
+from aios.hooks.syscall import useSysCall
+from aios.llm_core.adapter import LLMAdapter
+
+class StubLocalBackend:
+    latency = 0.05
+    latency_per_request = 0.005
+
+    def __init__(self, model_name, **kwargs):
+        self.model_name = model_name
+        self.supports_batching = True
+        self.batch_sizes = []
+
+    def __call__(self, messages, temperature, stream=False):
+        return self.batch_generate([messages], temperature)[0]
+
+    def batch_generate(self, messages_list, temperature):
+        self.batch_sizes.append(len(messages_list))
+        time.sleep(self.latency + self.latency_per_request * len(messages_list))
+        return [f"echo: {messages[-1]['content']}" for messages in messages_list]
+
+def run(scheduler_type, max_batch_size, num_agents, num_syscalls):
+    llm = LLMAdapter(
+        llm_name="stub", llm_backend="hflocal", max_batch_size=max_batch_size
+    )
+    backend = llm.llm_name[0]
+
+    noop_manager = SimpleNamespace(address_request=lambda syscall: None)
+    scheduler = scheduler_nonblock(
+        llm=llm,
+        memory_manager=noop_manager,
+        storage_manager=noop_manager,
+        tool_manager=noop_manager,
+        log_mode="console",
+        get_llm_syscall=None,
+        get_memory_syscall=None,
+        get_storage_syscall=None,
+        get_tool_syscall=None,
+        scheduler_type=scheduler_type,
+    )
+    scheduler.logger.log = lambda content, level: None
+    scheduler.start()
+
+    _, SysCallWrapper = useSysCall()
+    wrong = []
+
+    def agent(agent_id):
+        for i in range(num_syscalls):
+            content = f"agent {agent_id} step {i}"
+            query = LLMQuery(messages=[{"role": "user", "content": content}])
+            response = SysCallWrapper.llm(f"agent_{agent_id}", query)["response"]
+            if response.response_message != f"echo: {content}":
+                wrong.append(response.response_message)
+
+    agents = [threading.Thread(target=agent, args=(i,)) for i in range(num_agents)]
+    start = time.time()
+    for thread in agents:
+        thread.start()
+    for thread in agents:
+        thread.join()
+    elapsed = time.time() - start
+
+    scheduler.stop()
+
+    total = num_agents * num_syscalls
+    sizes = Counter(backend.batch_sizes)
+    print(
+        f"{scheduler_type:<5} max_batch_size={max_batch_size:<3} "
+        f"syscalls/s={total / elapsed:8.1f}  "
+        f"mean batch={total / len(backend.batch_sizes):5.2f}  "
+        f"batch sizes={dict(sorted(sizes.items()))}"
+    )
+    assert not wrong, f"responses routed to the wrong syscall: {wrong[:3]}"
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--num_agents", type=int, default=64)
+    parser.add_argument("--num_syscalls", type=int, default=5)
+    parser.add_argument("--max_batch_size", type=int, default=8)
+    args = parser.parse_args()
+
+    os.environ.setdefault("HUGGING_FACE_API_KEY", "stub")
+    adapter_module.HfLocalBackend = StubLocalBackend
+
+    for scheduler_type in ("FIFO", "NPPS", "SJF"):
+        for max_batch_size in (1, args.max_batch_size):
+            run(scheduler_type, max_batch_size, args.num_agents, args.num_syscalls)
@@ -0,0 +1,97 @@
+# Benchmark of the LLM syscall processor against a stub completion function
+# with an artificial latency. Compares a single LLM worker with the worker
+# pool sized from the per-endpoint in-flight limits.
+#
+# Usage: python scripts/bench_llm_dispatch.py --num_endpoints 2 --max_concurrency 4
+
+import argparse
+import asyncio
+import time
+from types import SimpleNamespace
+
+from cerebrum.llm.communication import LLMQuery
+
+import aios.llm_core.adapter as adapter_module
+from aios.core.syscall.llm import LLMSyscall
+from aios.hooks.modules.llm import useLLMRequestQueue
+from aios.hooks.modules.memory import useMemoryRequestQueue
+from aios.hooks.modules.storage import useStorageRequestQueue
+from aios.hooks.modules.tool import useToolRequestQueue
+from aios.llm_core.adapter import LLMAdapter
+from aios.scheduler.fifo_scheduler import FIFOScheduler
+
+def stub_response(model):
+    message = SimpleNamespace(content=f"response from {model}")
+    return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+def stub_completion(latency):
+    def completion(model, messages, temperature, **kwargs):
+        time.sleep(latency)
+        return stub_response(model)
+    return completion
+
+def stub_acompletion(latency):
+    async def acompletion(model, messages, temperature, **kwargs):
+        await asyncio.sleep(latency)
+        return stub_response(model)
+    return acompletion
+
+def run(llm, llm_workers, num_syscalls):
+    _, get_llm, add_llm, _ = useLLMRequestQueue()
+    _, get_memory, _, _ = useMemoryRequestQueue()
+    _, get_storage, _, _ = useStorageRequestQueue()
+    _, get_tool, _, _ = useToolRequestQueue()
+
+    noop_manager = SimpleNamespace(address_request=lambda syscall: None)
+    scheduler = FIFOScheduler(
+        llm=llm,
+        memory_manager=noop_manager,
+        storage_manager=noop_manager,
+        tool_manager=noop_manager,
+        log_mode="console",
+        get_llm_syscall=get_llm,
+        get_memory_syscall=get_memory,
+        get_storage_syscall=get_storage,
+        get_tool_syscall=get_tool,
+        scheduler_type=None,
+        llm_workers=llm_workers,
+    )
+    scheduler.logger.log = lambda content, level: None
+    scheduler.start()
+
+    syscalls = []
+    start = time.time()
+    for i in range(num_syscalls):
+        query = LLMQuery(messages=[{"role": "user", "content": f"hello {i}"}])
+        syscall = LLMSyscall(f"agent_{i}", query)
+        syscall.set_created_time(time.time())
+        add_llm(syscall)
+        syscalls.append(syscall)
+    for syscall in syscalls:
+        syscall.wait()
+    elapsed = time.time() - start
+
+    scheduler.stop()
+    return num_syscalls / elapsed
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--num_syscalls", type=int, default=200)
+    parser.add_argument("--num_endpoints", type=int, default=2)
+    parser.add_argument("--max_concurrency", type=int, default=4)
+    parser.add_argument("--latency", type=float, default=0.05)
+    args = parser.parse_args()
+
+    adapter_module.completion = stub_completion(args.latency)
+    adapter_module.acompletion = stub_acompletion(args.latency)
+    llm = LLMAdapter(
+        llm_name=[f"openai/stub-{i}" for i in range(args.num_endpoints)],
+        llm_backend=[None] * args.num_endpoints,
+        max_concurrency=args.max_concurrency,
+    )
+
+    baseline = run(llm, 1, args.num_syscalls)
+    pooled = run(llm, None, args.num_syscalls)
+    print(f"1 worker:   {baseline:8.1f} syscalls/s")
+    print(f"{llm.total_concurrency()} workers: {pooled:8.1f} syscalls/s "
+          f"({pooled / baseline:.1f}x)")
@@ -0,0 +1,101 @@
+# Benchmark of the HTTP connections of the backends served over HTTP. A stub
+# OpenAI-compatible server (as vLLM serves) answers the chat completions of a
+# vllm backend sent by concurrent threads. Reports the requests per second
+# and the TCP connections the server accepted, with a new client per request
+# (a handshake per request), with litellm's default client, and with the
+# pooled keep-alive clients.
+#
+# Usage: python scripts/bench_llm_http_pool.py --requests 400 --threads 8
+
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+
+from litellm.llms.custom_httpx.http_handler import HTTPHandler
+
+import aios.llm_core.local as local_module
+from aios.llm_core.http_pool import HttpClientPool
+from aios.llm_core.local import VLLMLocalBackend
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def setup(self):
+        super().setup()
+        with self.server.lock:
+            self.server.connections += 1
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers["Content-Length"]))
+        body = json.dumps({
+            "id": "stub",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": "stub",
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": "ok"},
+                "finish_reason": "stop",
+            }],
+            "usage": {"prompt_tokens": 1, "completion_tokens": 1, "total_tokens": 2},
+        }).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+def run(name, server, clients, args):
+    local_module.http_clients = clients
+    backend = VLLMLocalBackend(
+        "stub", hostname=f"http://127.0.0.1:{server.server_port}/v1"
+    )
+    server.connections = 0
+
+    def send(requests):
+        for _ in range(requests):
+            assert backend([{"role": "user", "content": "hello"}], temperature=0.0) == "ok"
+
+    threads = [
+        threading.Thread(target=send, args=(args.requests // args.threads,))
+        for _ in range(args.threads)
+    ]
+    start = time.time()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.time() - start
+
+    print(
+        f"{name:<24} {args.requests / elapsed:8.1f} req/s  "
+        f"connections={server.connections}"
+    )
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--threads", type=int, default=8)
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    server.daemon_threads = True
+    server.lock = threading.Lock()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    # warm up litellm (provider configs, cost map) outside of the measures
+    run("warm up", server, HttpClientPool(), SimpleNamespace(requests=args.threads, threads=args.threads))
+
+    run("client per request", server,
+        SimpleNamespace(get=lambda api_base, timeout: HTTPHandler(timeout=timeout)), args)
+    run("litellm default client", server,
+        SimpleNamespace(get=lambda api_base, timeout: None), args)
+    run("pooled keep-alive", server, HttpClientPool(), args)
+
+    server.shutdown()
@@ -0,0 +1,128 @@
+# Benchmark of prefix cache reuse across LLM replicas. Each replica is a stub
+# completion function with a prefix cache, as vLLM and Ollama have: the
+# messages at the start of the request that it has already seen are free,
+# every other message costs --prefill_latency, and the answer is cached with
+# the request. Agents hold multi-turn conversations, concurrently, that grow
+# by one round at a time with a random think time between rounds. Reports the
+# latency and the share of the messages served from the prefix caches for
+# each router strategy.
+#
+# Usage: python scripts/bench_llm_prefix_affinity.py --num_replicas 4 --num_agents 16 --rounds 8
+
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import time
+from collections import OrderedDict
+from types import SimpleNamespace
+
+from cerebrum.llm.communication import LLMQuery
+
+import aios.llm_core.adapter as adapter_module
+from aios.core.syscall.llm import LLMSyscall
+from aios.llm_core.adapter import LLMAdapter
+from aios.llm_core.strategy import RouterStrategy
+
+class StubReplicas:
+    def __init__(self, cache_entries, latency, prefill_latency):
+        self.cache_entries = cache_entries
+        self.latency = latency
+        self.prefill_latency = prefill_latency
+        self.caches = {}
+        self.cached_messages = 0
+        self.total_messages = 0
+
+    async def acompletion(self, model, messages, temperature, **kwargs):
+        cache = self.caches.setdefault(model, OrderedDict())
+        prefixes = [
+            json.dumps(messages[:length]) for length in range(1, len(messages) + 1)
+        ]
+
+        cached = 0
+        for length, prefix in enumerate(prefixes, start=1):
+            if prefix not in cache:
+                break
+            cached = length
+            cache.move_to_end(prefix)
+
+        self.cached_messages += cached
+        self.total_messages += len(messages)
+        await asyncio.sleep(
+            self.latency + self.prefill_latency * (len(messages) - cached)
+        )
+
+        content = f"answer {len(messages)} from {model}"
+        answered = messages + [{"role": "assistant", "content": content}]
+        for prefix in prefixes[cached:] + [json.dumps(answered)]:
+            cache[prefix] = True
+        while len(cache) > self.cache_entries:
+            cache.popitem(last=False)
+
+        message = SimpleNamespace(content=content)
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+async def conversations(llm, num_agents, rounds, think_time):
+    async def agent(agent_id):
+        messages = [
+            {"role": "system", "content": "You are a helpful assistant."},
+            {"role": "user", "content": f"agent {agent_id} task"},
+        ]
+        latencies = []
+        for i in range(rounds):
+            await asyncio.sleep(random.uniform(0, think_time))
+            syscall = LLMSyscall(f"agent_{agent_id}", LLMQuery(messages=list(messages)))
+            start = time.time()
+            response = await llm.address_syscall_async(syscall)
+            latencies.append(time.time() - start)
+            messages += [
+                {"role": "assistant", "content": response.response_message},
+                {"role": "user", "content": f"agent {agent_id} round {i}"},
+            ]
+        return latencies
+
+    results = await asyncio.gather(*(agent(i) for i in range(num_agents)))
+    return [latency for latencies in results for latency in latencies]
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--num_replicas", type=int, default=4)
+    parser.add_argument("--num_agents", type=int, default=16)
+    parser.add_argument("--rounds", type=int, default=8)
+    parser.add_argument("--max_concurrency", type=int, default=8)
+    parser.add_argument("--cache_entries", type=int, default=256)
+    parser.add_argument("--latency", type=float, default=0.01)
+    parser.add_argument("--prefill_latency", type=float, default=0.005)
+    parser.add_argument("--think_time", type=float, default=0.02)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    endpoints = [f"openai/replica-{i}" for i in range(args.num_replicas)]
+
+    for strategy in (
+        RouterStrategy.SIMPLE,
+        RouterStrategy.LEAST_OUTSTANDING,
+        RouterStrategy.PREFIX_AFFINITY,
+    ):
+        random.seed(args.seed)
+        replicas = StubReplicas(args.cache_entries, args.latency, args.prefill_latency)
+        adapter_module.acompletion = replicas.acompletion
+
+        llm = LLMAdapter(
+            llm_name=endpoints,
+            llm_backend=[None] * len(endpoints),
+            strategy=strategy,
+            max_concurrency=args.max_concurrency,
+        )
+        latencies = asyncio.run(conversations(llm, args.num_agents, args.rounds, args.think_time))
+
+        print(
+            f"{strategy.name:<17} mean={statistics.mean(latencies) * 1e3:6.1f}ms  "
+            f"max={max(latencies) * 1e3:6.1f}ms  "
+            f"prefix hit rate={replicas.cached_messages / replicas.total_messages:5.1%}"
+            + (
+                f"  sent to first choice={llm.strategy.affinity_hits / (llm.strategy.affinity_hits + llm.strategy.affinity_misses):5.1%}"
+                if strategy == RouterStrategy.PREFIX_AFFINITY else ""
+            )
+        )
@@ -0,0 +1,136 @@
+# Benchmark of the rate limiting of the LLM syscalls. A stub provider enforces
+# a request rate limit and answers 429 above it, as hosted providers do. A
+# noisy agent sends a burst of concurrent syscalls while quiet agents send a
+# few syscalls each, through the scheduler. Reports the 429s received
+# from the provider, the errors returned to the agents and the latency of the
+# quiet agents, without rate limits, with the provider limit, and with the
+# provider limit and a per-agent quota.
+#
+# Usage: python scripts/bench_llm_rate_limits.py --provider_rps 40 --noisy_requests 100
+
+import argparse
+import asyncio
+import statistics
+import threading
+import time
+from types import SimpleNamespace
+
+from cerebrum.llm.communication import LLMQuery
+from litellm.exceptions import RateLimitError
+
+import aios.llm_core.adapter as adapter_module
+from aios.hooks.modules.scheduler import scheduler_nonblock
+from aios.hooks.syscall import useSysCall
+from aios.llm_core.adapter import LLMAdapter
+from aios.llm_core.rate_limiter import TokenBucket
+
+class StubProvider:
+    def __init__(self, rps, latency):
+        # the provider enforces its limit over one second windows
+        self.bucket = TokenBucket(rps, rps)
+        self.lock = threading.Lock()
+        self.latency = latency
+        self.rejected = 0
+
+    async def acompletion(self, model, messages, temperature, **kwargs):
+        with self.lock:
+            now = time.monotonic()
+            if not self.bucket.available(1, now):
+                self.rejected += 1
+                raise RateLimitError("rate limit exceeded", llm_provider="openai", model=model)
+            self.bucket.charge(1, now)
+
+        await asyncio.sleep(self.latency)
+        message = SimpleNamespace(content="ok")
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+def run(name, args, **limits):
+    provider = StubProvider(args.provider_rps, args.latency)
+    adapter_module.acompletion = provider.acompletion
+    llm = LLMAdapter(llm_name="openai/stub", retry_backoff=0.1, **limits)
+
+    noop_manager = SimpleNamespace(address_request=lambda syscall: None)
+    scheduler = scheduler_nonblock(
+        llm=llm,
+        memory_manager=noop_manager,
+        storage_manager=noop_manager,
+        tool_manager=noop_manager,
+        log_mode="console",
+        get_llm_syscall=None,
+        get_memory_syscall=None,
+        get_storage_syscall=None,
+        get_tool_syscall=None,
+        scheduler_type=args.scheduler_type,
+    )
+    scheduler.logger.log = lambda content, level: None
+    scheduler.start()
+
+    _, SysCallWrapper = useSysCall()
+    errors = []
+    quiet_latencies = []
+
+    def call(agent_name):
+        query = LLMQuery(messages=[{"role": "user", "content": "hello"}])
+        start = time.time()
+        response = SysCallWrapper.llm(agent_name, query)["response"]
+        if response.response_message != "ok":
+            errors.append(response.response_message)
+        return time.time() - start
+
+    def noisy(requests):
+        for _ in range(requests):
+            call("noisy_agent")
+
+    def quiet(agent_id):
+        # the quiet agents start once the noisy agent has filled the queue
+        time.sleep(0.2)
+        for _ in range(args.quiet_requests):
+            quiet_latencies.append(call(f"quiet_agent_{agent_id}"))
+            time.sleep(args.think_time)
+
+    threads = [
+        threading.Thread(target=noisy, args=(args.noisy_requests // args.noisy_threads,))
+        for _ in range(args.noisy_threads)
+    ] + [threading.Thread(target=quiet, args=(i,)) for i in range(args.quiet_agents)]
+
+    start = time.time()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.time() - start
+
+    scheduler.stop()
+
+    print(
+        f"{name:<24} 429s={provider.rejected:<4} errors={len(errors):<4} "
+        f"quiet p50={statistics.median(quiet_latencies) * 1e3:7.1f}ms  "
+        f"quiet max={max(quiet_latencies) * 1e3:7.1f}ms  total={elapsed:5.2f}s"
+    )
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--scheduler_type", default="FIFO")
+    parser.add_argument("--provider_rps", type=float, default=40)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--noisy_requests", type=int, default=128)
+    parser.add_argument("--noisy_threads", type=int, default=32)
+    parser.add_argument("--quiet_agents", type=int, default=4)
+    parser.add_argument("--quiet_requests", type=int, default=5)
+    parser.add_argument("--think_time", type=float, default=0.1)
+    parser.add_argument("--agent_share", type=float, default=0.5,
+                        help="share of the provider limit the noisy agent may use")
+    args = parser.parse_args()
+
+    provider_limits = {"openai": {"rpm": args.provider_rps * 60, "burst": 1}}
+
+    run("no rate limits", args)
+    run("provider limit", args, rate_limits=provider_limits)
+    run(
+        "provider + agent quota",
+        args,
+        rate_limits=provider_limits,
+        agent_quotas={
+            "noisy_agent": {"rpm": args.provider_rps * 60 * args.agent_share, "burst": 1}
+        },
+    )
@@ -0,0 +1,97 @@
+# Benchmark of the router strategies of LLMAdapter over a mix of fast and
+# slow endpoints. Each endpoint is a stub completion function with its own
+# latency (and an optional error rate); concurrent clients send requests to
+# the adapter and the latency percentiles of each strategy are reported,
+# together with the share of requests served by the slow endpoint. Dead
+# endpoints, failing every request, can be added to measure the failover to
+# the healthy endpoints.
+#
+# Usage: python scripts/bench_llm_router.py --num_fast 3 --slow_factor 10 --clients 16
+#        python scripts/bench_llm_router.py --num_dead 1
+
+import argparse
+import asyncio
+import random
+import statistics
+import time
+from collections import Counter
+from types import SimpleNamespace
+
+from cerebrum.llm.communication import LLMQuery
+
+import aios.llm_core.adapter as adapter_module
+from aios.core.syscall.llm import LLMSyscall
+from aios.llm_core.adapter import LLMAdapter
+from aios.llm_core.strategy import RouterStrategy
+
+def stub_acompletion(latencies, error_rates, served):
+    async def acompletion(model, messages, temperature, **kwargs):
+        served[model] += 1
+        # latencies of a real endpoint vary from call to call
+        await asyncio.sleep(random.expovariate(1.0 / latencies[model]))
+        if random.random() < error_rates[model]:
+            raise RuntimeError(f"{model} failed")
+        message = SimpleNamespace(content=f"response from {model}")
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+    return acompletion
+
+async def load_test(llm, num_requests, clients):
+    semaphore = asyncio.Semaphore(clients)
+
+    async def request(i):
+        async with semaphore:
+            query = LLMQuery(messages=[{"role": "user", "content": f"hello {i}"}])
+            syscall = LLMSyscall(f"agent_{i % clients}", query)
+            start = time.time()
+            response = await llm.address_syscall_async(syscall)
+            return time.time() - start, not response.response_message.startswith("LLM Error")
+
+    return await asyncio.gather(*(request(i) for i in range(num_requests)))
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(p / 100 * len(values)))]
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--num_fast", type=int, default=3)
+    parser.add_argument("--latency", type=float, default=0.01)
+    parser.add_argument("--slow_factor", type=float, default=10)
+    parser.add_argument("--slow_error_rate", type=float, default=0.0)
+    parser.add_argument("--num_dead", type=int, default=0)
+    parser.add_argument("--retry_backoff", type=float, default=0.05)
+    parser.add_argument("--num_requests", type=int, default=2000)
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    dead = [f"openai/dead-{i}" for i in range(args.num_dead)]
+    endpoints = [f"openai/fast-{i}" for i in range(args.num_fast)] + ["openai/slow"] + dead
+    latencies = {endpoint: args.latency for endpoint in endpoints}
+    latencies["openai/slow"] = args.latency * args.slow_factor
+    error_rates = {endpoint: 0.0 for endpoint in endpoints}
+    error_rates["openai/slow"] = args.slow_error_rate
+    error_rates.update({endpoint: 1.0 for endpoint in dead})
+
+    for strategy in RouterStrategy:
+        random.seed(args.seed)
+        served = Counter()
+        adapter_module.acompletion = stub_acompletion(latencies, error_rates, served)
+
+        llm = LLMAdapter(
+            llm_name=endpoints,
+            llm_backend=[None] * len(endpoints),
+            strategy=strategy,
+            max_concurrency=args.clients,
+            retry_backoff=args.retry_backoff,
+        )
+        results = asyncio.run(load_test(llm, args.num_requests, args.clients))
+        elapsed = [latency for latency, _ in results]
+        errors = sum(1 for _, ok in results if not ok)
+
+        print(
+            f"{strategy.name:<17} p50={statistics.median(elapsed) * 1e3:7.1f}ms  "
+            f"p99={percentile(elapsed, 99) * 1e3:7.1f}ms  errors={errors:<4} "
+            f"slow share={served['openai/slow'] / sum(served.values()):5.1%}  "
+            f"dead calls={sum(served[endpoint] for endpoint in dead)}"
+        )
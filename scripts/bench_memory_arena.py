@@ -0,0 +1,61 @@
+# Benchmark of the byte arena of aios.memory.base.Memory. Writes and reads
+# payloads of several sizes and reports the throughput in MB/s, for the
+# ctypes array written byte by byte that Memory used before and for the
+# bytearray arena (zero-copy reads, and reads copied out with bytes()).
+#
+# Usage: python scripts/bench_memory_arena.py --sizes 1024 102400 1048576
+
+import argparse
+import ctypes
+import os
+import time
+
+from aios.memory.base import Memory
+
+class CtypesMemory:
+    """The arena before the bytearray, for comparison"""
+
+    def __init__(self, size):
+        self.size = size
+        self.memory = (ctypes.c_ubyte * size)()
+
+    def mem_write(self, address, data):
+        for i in range(len(data)):
+            self.memory[address + i] = data[i]
+
+    def mem_read(self, address, size):
+        return self.memory[address:address + size]
+
+def throughput(operation, size, min_time=0.2):
+    """MB/s of the operation on size bytes, repeated for at least min_time"""
+    repeats = 0
+    start = time.perf_counter()
+    while True:
+        operation()
+        repeats += 1
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time:
+            return size * repeats / elapsed / 1e6
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1024, 10240, 102400, 1048576])
+    args = parser.parse_args()
+
+    for size in args.sizes:
+        data = os.urandom(size)
+        old = CtypesMemory(size)
+        new = Memory(size)
+
+        results = {
+            "ctypes write": throughput(lambda: old.mem_write(0, data), size),
+            "ctypes read": throughput(lambda: old.mem_read(0, size), size),
+            "bytearray write": throughput(lambda: new.mem_write(0, data), size),
+            "view read": throughput(lambda: new.mem_read(0, size), size),
+            "copied read": throughput(lambda: bytes(new.mem_read(0, size)), size),
+        }
+        assert bytes(new.mem_read(0, size)) == data
+
+        print(f"size={size:<8} " + "  ".join(
+            f"{name}={value:10.1f}MB/s" for name, value in results.items()
+        ))
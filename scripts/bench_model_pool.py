@@ -0,0 +1,56 @@
+# Benchmark of the process-wide model pool of the local backends, on CPU with
+# tiny models from the Hugging Face hub. Reports the time until the first
+# response for a cold LLM core, which loads the weights, and for an LLM core
+# set up again with the same model, which finds it in the pool. Then loads
+# the models one after the other under a memory budget that only holds one
+# of them and reports the pool.
+#
+# Usage: python scripts/bench_model_pool.py --models hf-internal-testing/tiny-random-gpt2 hf-internal-testing/tiny-random-LlamaForCausalLM
+
+import argparse
+import os
+import time
+
+from aios.llm_core.adapter import LLMAdapter
+from aios.llm_core.model_pool import model_pool
+
+def first_response(model_name, **kwargs):
+    start = time.time()
+    llm = LLMAdapter(
+        llm_name=model_name, llm_backend="hflocal", **kwargs
+    )
+    llm.llm_name[0]([{"role": "user", "content": "hello"}], temperature=0.0)
+    return time.time() - start
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--models",
+        nargs="+",
+        default=[
+            "hf-internal-testing/tiny-random-gpt2",
+            "hf-internal-testing/tiny-random-LlamaForCausalLM",
+        ],
+    )
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    os.environ.setdefault("HUGGING_FACE_API_KEY", "")
+
+    for model_name in args.models:
+        cold = first_response(model_name)
+        warm = min(first_response(model_name) for _ in range(args.repeats))
+        print(f"{model_name:<50} cold={cold * 1e3:8.1f}ms  warm={warm * 1e3:8.1f}ms")
+
+    # a budget that only holds the largest model: every new model unloads
+    # the least recently used one
+    budget = max(entry["size"] for entry in model_pool.stats()["models"])
+    model_pool.set_max_memory(budget)
+    for model_name in args.models + args.models[:1]:
+        first_response(model_name)
+
+    stats = model_pool.stats()
+    print(
+        f"budget={budget / 2**20:.1f}MiB loaded={[entry['name'] for entry in stats['models']]} "
+        f"loads={stats['loads']} hits={stats['hits']} evictions={stats['evictions']}"
+    )
@@ -0,0 +1,157 @@
+# Time to first token of the kernel /query endpoint, with and without
+# streaming, against a local stub LLM server. The stub serves an OpenAI
+# compatible chat completion endpoint that generates a token every
+# --token_latency seconds, as server-sent events when streaming is asked.
+#
+# Usage: python scripts/bench_query_streaming.py --num_queries 20 --num_tokens 50
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import statistics
+import threading
+import time
+from types import SimpleNamespace
+
+import httpx
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import StreamingResponse
+
+def serve(app, port):
+    server = uvicorn.Server(
+        uvicorn.Config(app, host="127.0.0.1", port=port, log_level="error")
+    )
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return server
+
+def start_stub_llm_server(port, num_tokens, token_latency):
+    stub = FastAPI()
+
+    def chunk(delta, finish_reason=None):
+        return {
+            "id": "stub",
+            "object": "chat.completion.chunk",
+            "created": int(time.time()),
+            "model": "stub",
+            "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+        }
+
+    @stub.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        if body.get("stream"):
+            async def events():
+                yield f"data: {json.dumps(chunk({'role': 'assistant', 'content': ''}))}\n\n"
+                for i in range(num_tokens):
+                    await asyncio.sleep(token_latency)
+                    yield f"data: {json.dumps(chunk({'content': f'tok{i} '}))}\n\n"
+                yield f"data: {json.dumps(chunk({}, 'stop'))}\n\n"
+                yield "data: [DONE]\n\n"
+            return StreamingResponse(events(), media_type="text/event-stream")
+
+        await asyncio.sleep(token_latency * num_tokens)
+        return {
+            "id": "stub",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": "stub",
+            "choices": [{
+                "index": 0,
+                "message": {
+                    "role": "assistant",
+                    "content": "".join(f"tok{i} " for i in range(num_tokens)),
+                },
+                "finish_reason": "stop",
+            }],
+            "usage": {"prompt_tokens": 1, "completion_tokens": num_tokens,
+                      "total_tokens": num_tokens + 1},
+        }
+
+    return serve(stub, port)
+
+async def load_test(kernel_url, num_queries, stream):
+    # the kernel is served over HTTP, an ASGI transport would buffer the
+    # streamed response
+    async with httpx.AsyncClient(base_url=kernel_url, timeout=None) as client:
+        async def query(i):
+            body = {
+                "agent_name": f"agent_{i}",
+                "query_type": "llm",
+                "query_data": {"messages": [{"role": "user", "content": f"hello {i}"}]},
+                "stream": stream,
+            }
+            start = time.time()
+            first_token = None
+            async with client.stream("POST", "/query", json=body) as response:
+                response.raise_for_status()
+                lines = []
+                async for line in response.aiter_lines():
+                    if not line:
+                        continue
+                    if first_token is None:
+                        first_token = time.time() - start
+                    lines.append(json.loads(line))
+            total = time.time() - start
+
+            text = lines[-1]["response"]["response_message"]
+            if stream:
+                assert "".join(line["chunk"] for line in lines[:-1]) == text
+            return first_token, total
+
+        return await asyncio.gather(*(query(i) for i in range(num_queries)))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--num_queries", type=int, default=20)
+    parser.add_argument("--num_tokens", type=int, default=50)
+    parser.add_argument("--token_latency", type=float, default=0.02)
+    parser.add_argument("--port", type=int, default=8012)
+    parser.add_argument("--kernel_port", type=int, default=8013)
+    args = parser.parse_args()
+
+    start_stub_llm_server(args.port, args.num_tokens, args.token_latency)
+    os.environ["OPENAI_API_BASE"] = f"http://127.0.0.1:{args.port}/v1"
+    os.environ.setdefault("OPENAI_API_KEY", "stub")
+
+    import runtime.kernel as kernel
+    from aios.llm_core.adapter import LLMAdapter
+
+    # the kernel logs at DEBUG level, which makes litellm log every chunk
+    logging.getLogger().setLevel(logging.WARNING)
+
+    llm = LLMAdapter(llm_name="openai/stub")
+    noop_manager = SimpleNamespace(address_request=lambda syscall: None)
+    scheduler = kernel.build_scheduler(
+        llm=llm,
+        memory_manager=noop_manager,
+        storage_manager=noop_manager,
+        tool_manager=noop_manager,
+        log_mode="console",
+        get_llm_syscall=None,
+        get_memory_syscall=None,
+        get_storage_syscall=None,
+        get_tool_syscall=None,
+        scheduler_type="FIFO",
+    )
+    scheduler.logger.log = lambda content, level: None
+    kernel.active_components["llm"] = llm
+    scheduler.start()
+    serve(kernel.app, args.kernel_port)
+
+    kernel_url = f"http://127.0.0.1:{args.kernel_port}"
+    for stream in (False, True):
+        # the first litellm call of each kind is slow, keep it out of the
+        # measurement
+        asyncio.run(load_test(kernel_url, 1, stream))
+        results = asyncio.run(load_test(kernel_url, args.num_queries, stream))
+        first_tokens = [first_token for first_token, _ in results]
+        totals = [total for _, total in results]
+        print(f"stream={str(stream):<5} time to first token p50={statistics.median(first_tokens) * 1e3:7.1f}ms  "
+              f"total p50={statistics.median(totals) * 1e3:7.1f}ms")
+
+    scheduler.stop()
@@ -0,0 +1,79 @@
+# Microbenchmark of the scheduler dispatch core: submits no-op syscalls one at
+# a time and measures the latency between enqueueing a syscall and the
+# scheduler starting to execute it.
+#
+# Usage: python scripts/bench_scheduler_latency.py --num_syscalls 5000
+
+import argparse
+import statistics
+import time
+
+from aios.core.syscall import Syscall
+from aios.hooks.modules.llm import useLLMRequestQueue
+from aios.hooks.modules.memory import useMemoryRequestQueue
+from aios.hooks.modules.storage import useStorageRequestQueue
+from aios.hooks.modules.tool import useToolRequestQueue
+from aios.scheduler.fifo_scheduler import FIFOScheduler
+from aios.scheduler.npp_scheduler import NPPScheduler
+
+class NoopManager:
+    def address_syscall(self, syscall):
+        return None
+
+    def address_request(self, syscall):
+        return None
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p / 100))]
+
+def run(scheduler_class, num_syscalls):
+    _, get_llm, add_llm, _ = useLLMRequestQueue()
+    _, get_memory, _, _ = useMemoryRequestQueue()
+    _, get_storage, _, _ = useStorageRequestQueue()
+    _, get_tool, _, _ = useToolRequestQueue()
+
+    manager = NoopManager()
+    scheduler = scheduler_class(
+        llm=manager,
+        memory_manager=manager,
+        storage_manager=manager,
+        tool_manager=manager,
+        log_mode="console",
+        get_llm_syscall=get_llm,
+        get_memory_syscall=get_memory,
+        get_storage_syscall=get_storage,
+        get_tool_syscall=get_tool,
+        scheduler_type=None,
+    )
+    # drop the per-syscall log lines from the measurement
+    scheduler.logger.log = lambda content, level: None
+    scheduler.start()
+
+    latencies = []
+    start = time.time()
+    for i in range(num_syscalls):
+        syscall = Syscall(f"agent_{i}", None)
+        syscall.set_created_time(time.time())
+        add_llm(syscall)
+        syscall.wait()
+        latencies.append(syscall.get_start_time() - syscall.get_created_time())
+    elapsed = time.time() - start
+
+    scheduler.stop()
+
+    print(
+        f"{scheduler_class.__name__:<14} "
+        f"syscalls/s={num_syscalls / elapsed:10.1f}  "
+        f"mean={statistics.mean(latencies) * 1e6:8.1f}us  "
+        f"p50={percentile(latencies, 50) * 1e6:8.1f}us  "
+        f"p99={percentile(latencies, 99) * 1e6:8.1f}us"
+    )
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--num_syscalls", type=int, default=2000)
+    args = parser.parse_args()
+
+    for scheduler_class in (FIFOScheduler, NPPScheduler):
+        run(scheduler_class, args.num_syscalls)
@@ -0,0 +1,110 @@
+# Discrete-event simulation comparing FIFO and shortest-expected-job-first
+# dispatch of LLM syscalls. The service time of a request is proportional to
+# its estimated token count, so the simulation runs instantly.
+#
+# The trace is a JSONL file with one request per line:
+#   {"agent_name": "...", "messages": [...], "max_new_tokens": 256, "arrival": 0.5}
+# "max_new_tokens" and "arrival" (seconds from the start) are optional. When
+# no trace is given, a mix of tiny classification prompts and long
+# summarization prompts is generated.
+#
+# Usage: python scripts/bench_sjf_simulation.py --trace requests.jsonl --workers 4
+
+import argparse
+import heapq
+import json
+import random
+import statistics
+
+from aios.scheduler.sjf_scheduler import ShortestJobQueue, estimate_prompt_tokens
+
+def synthetic_trace(num_requests, seed=0):
+    rng = random.Random(seed)
+    trace = []
+    arrival = 0.0
+    for i in range(num_requests):
+        arrival += rng.expovariate(4.0)
+        if rng.random() < 0.8:
+            text = "Classify the sentiment of this review: " + "good " * rng.randint(5, 30)
+            trace.append({"agent_name": f"classifier_{i}", "max_new_tokens": 8,
+                          "messages": [{"role": "user", "content": text}], "arrival": arrival})
+        else:
+            text = "Summarize the following document: " + "lorem ipsum " * rng.randint(500, 3000)
+            trace.append({"agent_name": f"summarizer_{i}", "max_new_tokens": 512,
+                          "messages": [{"role": "user", "content": text}], "arrival": arrival})
+    return trace
+
+def load_trace(path, default_max_new_tokens):
+    trace = []
+    with open(path) as f:
+        for i, line in enumerate(f):
+            if not line.strip():
+                continue
+            request = json.loads(line)
+            request.setdefault("arrival", 0.0)
+            request.setdefault("max_new_tokens", default_max_new_tokens)
+            trace.append(request)
+    return trace
+
+def simulate(trace, policy, workers, tokens_per_second, aging_rate):
+    requests = sorted(trace, key=lambda r: r["arrival"])
+    costs = [
+        estimate_prompt_tokens(r["messages"], r.get("tools")) + r["max_new_tokens"]
+        for r in requests
+    ]
+    # prompt tokens are processed much faster than generated tokens
+    service_times = [
+        (cost - r["max_new_tokens"]) / (10 * tokens_per_second)
+        + r["max_new_tokens"] / tokens_per_second
+        for r, cost in zip(requests, costs)
+    ]
+
+    queue = ShortestJobQueue(aging_rate if policy == "SJF" else 0.0)
+    free_at = [0.0] * workers
+    turnaround_times = []
+    next_request = 0
+
+    while next_request < len(requests) or queue:
+        now = heapq.heappop(free_at)
+        # admit the requests that arrived before the worker became free, or
+        # the next one if nothing is waiting
+        if not queue and next_request < len(requests):
+            now = max(now, requests[next_request]["arrival"])
+        while next_request < len(requests) and requests[next_request]["arrival"] <= now:
+            arrival = requests[next_request]["arrival"]
+            cost = costs[next_request] if policy == "SJF" else 0
+            queue.push(next_request, cost, arrival)
+            next_request += 1
+
+        i = queue.pop()
+        end = now + service_times[i]
+        turnaround_times.append(end - requests[i]["arrival"])
+        heapq.heappush(free_at, end)
+
+    turnaround_times.sort()
+    return (
+        statistics.mean(turnaround_times),
+        turnaround_times[int(len(turnaround_times) * 0.5)],
+        turnaround_times[min(len(turnaround_times) - 1, int(len(turnaround_times) * 0.99))],
+    )
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--trace", type=str, default=None)
+    parser.add_argument("--num_requests", type=int, default=2000)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--tokens_per_second", type=float, default=200.0)
+    parser.add_argument("--aging_rate", type=float, default=100.0)
+    parser.add_argument("--max_new_tokens", type=int, default=256)
+    args = parser.parse_args()
+
+    if args.trace:
+        trace = load_trace(args.trace, args.max_new_tokens)
+    else:
+        trace = synthetic_trace(args.num_requests)
+
+    for policy in ("FIFO", "SJF"):
+        mean, p50, p99 = simulate(
+            trace, policy, args.workers, args.tokens_per_second, args.aging_rate
+        )
+        print(f"{policy:<5} turnaround mean={mean:8.2f}s  p50={p50:8.2f}s  p99={p99:8.2f}s")
@@ -0,0 +1,89 @@
+# Benchmark of the syscall round trip between agents and the scheduler.
+# Many agent threads issue no-op memory syscalls; reports syscalls per second
+# and the peak number of threads, either with the syscalls waited on directly
+# ("future", the current behavior) or with a thread spawned per syscall just
+# to wait for it ("thread", the former Syscall(Thread) behavior).
+#
+# Usage: python scripts/bench_syscall_overhead.py --num_agents 200 --num_syscalls 50
+
+import argparse
+import threading
+import time
+from types import SimpleNamespace
+
+from aios.core.syscall.memory import MemorySyscall
+from aios.hooks.stores._global import (
+    global_llm_req_queue_get_message,
+    global_memory_req_queue_add_message,
+    global_memory_req_queue_get_message,
+    global_storage_req_queue_get_message,
+    global_tool_req_queue_get_message,
+)
+from aios.hooks.syscall import useSysCall
+from aios.scheduler.fifo_scheduler import FIFOScheduler
+
+def thread_per_syscall_exec(agent_name, query):
+    syscall = MemorySyscall(agent_name, query)
+    syscall.set_status("active")
+    syscall.set_created_time(time.time())
+    global_memory_req_queue_add_message(syscall)
+
+    waiter = threading.Thread(target=syscall.wait)
+    waiter.start()
+    waiter.join()
+    return syscall.get_response()
+
+def run(mode, num_agents, num_syscalls):
+    noop_manager = SimpleNamespace(
+        address_syscall=lambda syscall: None,
+        address_request=lambda syscall: None,
+    )
+    scheduler = FIFOScheduler(
+        llm=noop_manager,
+        memory_manager=noop_manager,
+        storage_manager=noop_manager,
+        tool_manager=noop_manager,
+        log_mode="console",
+        get_llm_syscall=global_llm_req_queue_get_message,
+        get_memory_syscall=global_memory_req_queue_get_message,
+        get_storage_syscall=global_storage_req_queue_get_message,
+        get_tool_syscall=global_tool_req_queue_get_message,
+        scheduler_type=None,
+        llm_workers=1,
+    )
+    scheduler.logger.log = lambda content, level: None
+    scheduler.start()
+
+    _, SysCallWrapper = useSysCall()
+    exec_syscall = SysCallWrapper.memory if mode == "future" else thread_per_syscall_exec
+
+    def agent(agent_id):
+        for _ in range(num_syscalls):
+            exec_syscall(f"agent_{agent_id}", None)
+
+    peak_threads = threading.active_count()
+    agents = [threading.Thread(target=agent, args=(i,)) for i in range(num_agents)]
+    start = time.time()
+    for thread in agents:
+        thread.start()
+    while any(thread.is_alive() for thread in agents):
+        peak_threads = max(peak_threads, threading.active_count())
+        time.sleep(0.001)
+    elapsed = time.time() - start
+
+    scheduler.stop()
+
+    total = num_agents * num_syscalls
+    print(
+        f"{mode:<7} syscalls/s={total / elapsed:10.1f}  "
+        f"peak_threads={peak_threads}"
+    )
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--num_agents", type=int, default=200)
+    parser.add_argument("--num_syscalls", type=int, default=50)
+    args = parser.parse_args()
+
+    for mode in ("thread", "future"):
+        run(mode, args.num_agents, args.num_syscalls)
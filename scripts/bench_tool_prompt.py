@@ -0,0 +1,68 @@
+# Benchmark of the construction of the tool prompt of the models without
+# native tool calling. Agents send the same tool set on every round, as a new
+# list each time (the syscalls are deserialized from the requests). Reports
+# the time to prepare the messages of a syscall with the tool sets compiled
+# for every syscall and compiled once in the registry, and checks that the
+# tools of the agent are left unchanged.
+#
+# Usage: python scripts/bench_tool_prompt.py --num_tools 30 --rounds 2000
+
+import argparse
+import copy
+import time
+
+from cerebrum.llm.communication import LLMQuery
+
+from aios.core.syscall.llm import LLMSyscall
+from aios.llm_core.adapter import LLMAdapter
+from aios.llm_core.tool_schema import ToolSchemaRegistry
+
+def make_tools(num_tools):
+    return [
+        {
+            "type": "function",
+            "function": {
+                "name": f"example/tool_{i}",
+                "description": f"Tool number {i}, which looks something up. " * 3,
+                "parameters": {
+                    "type": "object",
+                    "properties": {
+                        f"param_{j}": {"type": "string", "description": f"Parameter {j}"}
+                        for j in range(5)
+                    },
+                    "required": ["param_0"],
+                },
+            },
+        }
+        for i in range(num_tools)
+    ]
+
+def run(name, llm, tools, args):
+    elapsed = 0.0
+    for _ in range(args.rounds):
+        query = LLMQuery(
+            messages=[{"role": "user", "content": "Look up the weather."}],
+            tools=copy.deepcopy(tools),
+        )
+        syscall = LLMSyscall("example/agent", query)
+        start = time.perf_counter()
+        llm.prepare_messages(syscall)
+        elapsed += time.perf_counter() - start
+        assert query.tools == tools, "the tools of the agent were modified"
+
+    print(f"{name:<24} {elapsed / args.rounds * 1e6:8.1f}us per syscall")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--num_tools", type=int, default=30)
+    parser.add_argument("--rounds", type=int, default=2000)
+    args = parser.parse_args()
+
+    llm = LLMAdapter(llm_name="openai/stub")
+    tools = make_tools(args.num_tools)
+
+    llm.tool_schemas = ToolSchemaRegistry(max_entries=0)
+    run("compiled every syscall", llm, tools, args)
+    llm.tool_schemas = ToolSchemaRegistry()
+    run("compiled once", llm, tools, args)
+    print(llm.tool_schemas.stats())
@@ -0,0 +1,141 @@
+# Stress test of the allocator of the memory arenas (aios.memory.base.Memory)
+# with randomized traces that mimic the memory rounds of agents: agents start,
+# write rounds of compressed conversations of lognormal sizes, rewrite some
+# of them, drop their oldest rounds beyond a few dozen, and finish, freeing
+# all their rounds. Replays the same trace on the
+# first-fit list that Memory used before and on the segregated free lists,
+# checks the invariants of the latter (no overlap, every byte free or
+# allocated once, free neighbours merged), and reports the time per operation,
+# the failed allocations and the fragmentation at the end.
+#
+# Usage: python scripts/stress_memory_allocator.py --arena_mb 16 --operations 30000
+
+import argparse
+import math
+import random
+import time
+
+from aios.memory.allocator import SegregatedFreeLists
+
+class FirstFit:
+    """The allocator before the free lists, for comparison"""
+
+    def __init__(self, size):
+        self.free_blocks = [(0, size - 1)]
+
+    def alloc(self, size):
+        for i, (start, end) in enumerate(self.free_blocks):
+            if end - start + 1 >= size:
+                if start + size - 1 == end:
+                    self.free_blocks.pop(i)
+                else:
+                    self.free_blocks[i] = (start + size, end)
+                return start
+        raise MemoryError("No sufficient memory available.")
+
+    def free(self, start, size):
+        self.free_blocks.append((start, start + size - 1))
+        self.free_blocks.sort()
+
+    def stats(self, size, used):
+        free = size - used
+        largest = max((end - start + 1 for start, end in self.free_blocks), default=0)
+        return {
+            "free_blocks": len(self.free_blocks),
+            "largest_free_block": largest,
+            "external_fragmentation": 1 - largest / free if free else 0.0,
+        }
+
+def make_trace(args):
+    """(operation, agent, round, size) of the agents over time"""
+    rng = random.Random(args.seed)
+    agents = {}  # agent -> {round: size}
+    next_agent = 0
+    trace = []
+    for _ in range(args.operations):
+        action = rng.random()
+        if not agents or (action < 0.02 and len(agents) < args.max_agents):
+            agents[next_agent] = {}
+            next_agent += 1
+        elif action < 0.04 and len(agents) > 1:
+            agent = rng.choice(list(agents))
+            for round_id, size in agents.pop(agent).items():
+                trace.append(("free", agent, round_id, size))
+        else:
+            agent = rng.choice(list(agents))
+            rounds = agents[agent]
+            size = max(1, int(rng.lognormvariate(math.log(args.mean_round_kb * 1024), 1.0)))
+            if rounds and rng.random() < 0.3:
+                # a round rewritten with new content
+                round_id = rng.choice(list(rounds))
+                trace.append(("free", agent, round_id, rounds.pop(round_id)))
+            else:
+                round_id = len(rounds) and max(rounds) + 1
+                if len(rounds) >= args.max_rounds:
+                    oldest = min(rounds)
+                    trace.append(("free", agent, oldest, rounds.pop(oldest)))
+            rounds[round_id] = size
+            trace.append(("alloc", agent, round_id, size))
+    return trace
+
+def check_invariants(allocator, size):
+    ranges = sorted(
+        [(start, length, "free") for start, length in allocator.free_starts.items()]
+        + [(start, length, "used") for start, length in allocator.allocated.items()]
+    )
+    position = 0
+    previous = None
+    for start, length, kind in ranges:
+        assert start == position, f"gap or overlap at {position}"
+        assert not (kind == "free" and previous == "free"), f"free ranges not merged at {start}"
+        position += length
+        previous = kind
+    assert position == size, "ranges do not cover the arena"
+
+def replay(name, allocator, trace, args, check):
+    size = args.arena_mb * 2**20
+    addresses = {}
+    used = 0
+    failures = 0
+    start = time.perf_counter()
+    for i, (operation, agent, round_id, length) in enumerate(trace):
+        key = (agent, round_id)
+        if operation == "alloc":
+            try:
+                addresses[key] = allocator.alloc(length)
+                used += length
+            except MemoryError:
+                failures += 1
+        elif key in addresses:
+            allocator.free(addresses.pop(key), length)
+            used -= length
+        if check and i % args.check_every == 0:
+            check_invariants(allocator, size)
+    elapsed = time.perf_counter() - start
+
+    if check:
+        check_invariants(allocator, size)
+        stats = allocator.stats()
+    else:
+        stats = allocator.stats(size, used)
+    print(
+        f"{name:<22} {elapsed / len(trace) * 1e6:8.2f}us/op  failed allocations={failures:<6} "
+        f"free blocks={stats['free_blocks']:<6} largest free={stats['largest_free_block'] / 2**20:6.2f}MB  "
+        f"external fragmentation={stats['external_fragmentation']:.3f}"
+    )
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--arena_mb", type=int, default=16)
+    parser.add_argument("--operations", type=int, default=30000)
+    parser.add_argument("--mean_round_kb", type=float, default=4)
+    parser.add_argument("--max_agents", type=int, default=64)
+    parser.add_argument("--max_rounds", type=int, default=32, help="rounds kept per agent")
+    parser.add_argument("--check_every", type=int, default=5000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    trace = make_trace(args)
+    size = args.arena_mb * 2**20
+    replay("first fit", FirstFit(size), trace, args, check=False)
+    replay("segregated free lists", SegregatedFreeLists(size), trace, args, check=True)
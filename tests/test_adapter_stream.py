@@ -0,0 +1,59 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from cerebrum.llm.communication import LLMQuery
+
+import aios.llm_core.adapter as adapter_module
+from aios.core.syscall.llm import LLMSyscall
+from aios.llm_core.adapter import LLMAdapter
+
+class Stream:
+    """Streamed completion of litellm, failing after ``fail_after`` chunks"""
+
+    def __init__(self, texts, fail_after=None):
+        self.texts = texts
+        self.fail_after = fail_after
+        self.closed = False
+
+    async def __aiter__(self):
+        for i, text in enumerate(self.texts):
+            if i == self.fail_after:
+                raise ConnectionError("stream reset")
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=text))])
+
+    async def aclose(self):
+        self.closed = True
+
+@pytest.fixture
+def stream_of(monkeypatch):
+    def stream_of(stream):
+        async def acompletion(**kwargs):
+            return stream
+
+        monkeypatch.setattr(adapter_module, "acompletion", acompletion)
+        return stream
+
+    return stream_of
+
+def stream_syscall(syscall):
+    adapter = LLMAdapter.__new__(LLMAdapter)
+    return asyncio.run(adapter.astream_to_syscall(syscall, "openai/gpt-4o-mini", [], 0.0))
+
+def test_stream_is_closed_when_tool_calls_are_complete(stream_of):
+    stream = stream_of(Stream(['[{"name": "t", ', '"parameters": {}}]', " and more"]))
+    syscall = LLMSyscall(
+        "agent",
+        LLMQuery(messages=[{"role": "user", "content": "hi"}], tools=[{"type": "function"}]),
+        stream=True,
+    )
+    assert stream_syscall(syscall) == '[{"name": "t", "parameters": {}}]'
+    assert stream.closed
+
+def test_stream_is_closed_on_error(stream_of):
+    stream = stream_of(Stream(["a", "b", "c"], fail_after=2))
+    syscall = LLMSyscall("agent", LLMQuery(messages=[{"role": "user", "content": "hi"}]))
+    with pytest.raises(ConnectionError):
+        stream_syscall(syscall)
+    assert stream.closed
@@ -0,0 +1,98 @@
+import random
+
+import pytest
+
+from aios.memory.allocator import SegregatedFreeLists
+
+def free_ranges(allocator):
+    return sorted(allocator.free_starts.items())
+
+def check_invariants(allocator):
+    """The free and allocated ranges tile the arena, free ranges never touch"""
+    ranges = sorted(
+        [(start, size, "free") for start, size in allocator.free_starts.items()]
+        + [(start, size, "used") for start, size in allocator.allocated.items()]
+    )
+    position = 0
+    previous = None
+    for start, size, kind in ranges:
+        assert start == position
+        assert not (kind == previous == "free")
+        position += size
+        previous = kind
+    assert position == allocator.size
+    assert allocator.used == sum(allocator.allocated.values())
+    for size_class, entries in enumerate(allocator.classes):
+        assert bool(allocator.bitmap >> size_class & 1) == bool(entries)
+        assert entries == sorted(entries)
+
+def test_alloc_splits_a_free_range():
+    allocator = SegregatedFreeLists(100)
+    assert allocator.alloc(30) == 0
+    assert allocator.alloc(20) == 30
+    assert free_ranges(allocator) == [(50, 50)]
+    assert allocator.stats()["used"] == 50
+
+def test_free_coalesces_with_both_neighbours():
+    allocator = SegregatedFreeLists(100)
+    a, b, c, d = (allocator.alloc(25) for _ in range(4))
+    allocator.free(a, 25)
+    allocator.free(c, 25)
+    assert free_ranges(allocator) == [(0, 25), (50, 25)]
+    assert allocator.stats()["external_fragmentation"] == 0.5
+
+    # b merges with the ranges before and after it
+    allocator.free(b, 25)
+    assert free_ranges(allocator) == [(0, 75)]
+    allocator.free(d, 25)
+    assert free_ranges(allocator) == [(0, 100)]
+    check_invariants(allocator)
+
+def test_best_fit_takes_the_smallest_range_that_fits():
+    allocator = SegregatedFreeLists(1000)
+    starts = [allocator.alloc(size) for size in (100, 10, 40, 10, 200, 10)]
+    for start, size in zip(starts[::2], (100, 40, 200)):
+        allocator.free(start, size)
+    # free ranges of 100, 40, 200 and the 630 left at the end, separated by
+    # the allocated ranges of 10
+    assert allocator.alloc(30) == starts[2]
+    assert allocator.alloc(90) == starts[0]
+    assert allocator.alloc(150) == starts[4]
+    # no free range in its size class, the smallest of a larger class
+    assert allocator.alloc(300) == 370
+    check_invariants(allocator)
+
+def test_errors():
+    allocator = SegregatedFreeLists(64)
+    with pytest.raises(ValueError):
+        allocator.alloc(0)
+    start = allocator.alloc(64)
+    with pytest.raises(MemoryError):
+        allocator.alloc(1)
+    with pytest.raises(MemoryError):
+        allocator.free(start, 32)
+    allocator.free(start, 64)
+    with pytest.raises(MemoryError):
+        allocator.free(start, 64)
+    with pytest.raises(MemoryError):
+        allocator.alloc(65)
+
+def test_random_churn_keeps_the_arena_consistent():
+    rng = random.Random(0)
+    allocator = SegregatedFreeLists(1 << 16)
+    allocated = []
+    for _ in range(5000):
+        if allocated and rng.random() < 0.45:
+            allocator.free(*allocated.pop(rng.randrange(len(allocated))))
+        else:
+            size = rng.randint(1, 512)
+            try:
+                allocated.append((allocator.alloc(size), size))
+            except MemoryError:
+                assert allocator.largest_free_block() < size
+    check_invariants(allocator)
+
+    for start, size in allocated:
+        allocator.free(start, size)
+    assert free_ranges(allocator) == [(0, 1 << 16)]
+    assert allocator.stats()["free_blocks"] == 1
@@ -0,0 +1,53 @@
+from aios.llm_core.breaker import CircuitBreaker, CircuitState
+
+def expire(breaker):
+    # as if reset_timeout seconds had passed since the circuit opened
+    breaker.opened_at -= breaker.reset_timeout
+
+def test_opens_after_consecutive_failures():
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=30)
+    for _ in range(2):
+        breaker.acquire()
+        breaker.record(error=True)
+    # a success resets the count
+    breaker.acquire()
+    breaker.record(error=False)
+    for _ in range(2):
+        breaker.acquire()
+        breaker.record(error=True)
+    assert breaker.state == CircuitState.CLOSED and breaker.available()
+
+    breaker.acquire()
+    breaker.record(error=True)
+    assert breaker.state == CircuitState.OPEN
+    assert not breaker.available()
+    assert breaker.to_dict()["retry_in"] > 29
+
+def test_half_open_lets_one_probe_through():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=30)
+    breaker.acquire()
+    breaker.record(error=True)
+    expire(breaker)
+    assert breaker.available()
+
+    breaker.acquire()
+    assert breaker.state == CircuitState.HALF_OPEN
+    # the probe is in flight, no other request is sent
+    assert not breaker.available()
+
+    breaker.record(error=False)
+    assert breaker.state == CircuitState.CLOSED
+    assert breaker.available()
+    assert breaker.to_dict() == {"state": "closed", "consecutive_failures": 0}
+
+def test_failed_probe_reopens_the_circuit():
+    breaker = CircuitBreaker(failure_threshold=5, reset_timeout=30)
+    for _ in range(5):
+        breaker.acquire()
+        breaker.record(error=True)
+    expire(breaker)
+
+    breaker.acquire()
+    breaker.record(error=True)
+    assert breaker.state == CircuitState.OPEN
+    assert not breaker.available()
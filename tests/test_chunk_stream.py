@@ -0,0 +1,73 @@
+import asyncio
+import threading
+import time
+
+from cerebrum.llm.communication import LLMQuery
+
+from aios.core.syscall.llm import ChunkStream, LLMSyscall
+
+def produce(stream, chunks, delay=0.01):
+    """Put the chunks from another thread, as the scheduler does"""
+    def run():
+        for chunk in chunks:
+            time.sleep(delay)
+            stream.put(chunk)
+        time.sleep(delay)
+        stream.close()
+
+    thread = threading.Thread(target=run)
+    thread.start()
+    return thread
+
+def test_iteration_blocks_until_the_stream_is_closed():
+    stream = ChunkStream()
+    stream.put("already ")
+    thread = produce(stream, ["generated ", "text"])
+    assert list(stream) == ["already ", "generated ", "text"]
+    thread.join()
+
+def test_async_iteration():
+    stream = ChunkStream()
+    thread = produce(stream, ["a", "b", "c"])
+
+    async def consume():
+        return [chunk async for chunk in stream]
+
+    assert asyncio.run(consume()) == ["a", "b", "c"]
+    thread.join()
+    assert not stream.waiters
+
+def test_close_wakes_waiting_consumers():
+    stream = ChunkStream()
+    result = []
+    consumer = threading.Thread(target=lambda: result.extend(stream))
+    consumer.start()
+
+    async def consume():
+        task = asyncio.ensure_future(stream.__aiter__().__anext__())
+        await asyncio.sleep(0.05)
+        stream.close()
+        try:
+            await asyncio.wait_for(task, 1)
+        except StopAsyncIteration:
+            return "stopped"
+
+    assert asyncio.run(consume()) == "stopped"
+    consumer.join(timeout=1)
+    assert not consumer.is_alive() and result == []
+    # a closed stream ends right away
+    assert list(stream) == []
+
+def test_syscall_forwards_chunks_and_closes_its_stream():
+    syscall = LLMSyscall("agent", LLMQuery(messages=[]), stream=True)
+    assert syscall.is_streaming() and not syscall.streamed
+    syscall.put_chunk("")
+    assert not syscall.streamed
+    syscall.put_chunk("hello")
+    assert syscall.streamed
+    syscall.complete()
+    assert list(syscall.stream) == ["hello"]
+
+    plain = LLMSyscall("agent", LLMQuery(messages=[]))
+    plain.put_chunk("ignored")
+    assert not plain.is_streaming() and not plain.streamed
@@ -0,0 +1,101 @@
+import os
+import tempfile
+from types import SimpleNamespace
+
+import pytest
+
+from cerebrum.llm.communication import LLMQuery
+
+import aios.llm_core.adapter as adapter_module
+import aios.llm_core.cache as cache_module
+from aios.core.syscall.llm import LLMSyscall
+from aios.llm_core.adapter import LLMAdapter
+from aios.llm_core.cache import CompletionCache
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(cache_module, "time", SimpleNamespace(time=lambda: now[0]))
+    return now
+
+@pytest.fixture
+def db_path():
+    return os.path.join(tempfile.mkdtemp(), "completions.db")
+
+def test_memory_tier_evicts_least_recently_used():
+    cache = CompletionCache(max_entries=2)
+    cache.put("a", "A")
+    cache.put("b", "B")
+    assert cache.get("a") == "A"
+    cache.put("c", "C")
+    assert cache.get("b") is None
+    assert cache.get("a") == "A" and cache.get("c") == "C"
+    assert cache.stats()["hits"] == 3 and cache.stats()["misses"] == 1
+
+def test_disk_tier_keeps_evicted_entries_and_survives_restarts(db_path):
+    cache = CompletionCache(max_entries=1, db_path=db_path)
+    cache.put("a", "A")
+    cache.put("b", "B")
+    assert list(cache.entries) == ["b"]
+    # promoted back into memory from disk
+    assert cache.get("a") == "A"
+    assert list(cache.entries) == ["a"]
+    assert cache.stats()["disk_hits"] == 1
+    cache.close()
+
+    restarted = CompletionCache(max_entries=1, db_path=db_path)
+    assert restarted.get("b") == "B"
+    restarted.invalidate("b")
+    assert restarted.get("b") is None
+    restarted.clear()
+    assert restarted.get("a") is None
+    restarted.close()
+
+def test_entries_expire_after_ttl(clock, db_path):
+    cache = CompletionCache(max_entries=1, ttl=60, db_path=db_path)
+    cache.put("a", "A")
+    cache.put("b", "B")
+    clock[0] += 59
+    assert cache.get("b") == "B"
+    clock[0] += 1
+    # expired in memory and on disk
+    assert cache.get("b") is None
+    assert cache.get("a") is None
+    assert cache.db.execute("SELECT COUNT(*) FROM completions").fetchone()[0] == 0
+    cache.close()
+
+def test_get_any_is_one_lookup():
+    cache = CompletionCache()
+    cache.put("b", "B")
+    assert cache.get_any(["a", "b"]) == "B"
+    assert cache.get_any(["a", "c"]) is None
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+
+def test_key_covers_the_whole_request():
+    messages = [{"role": "user", "content": "hi"}]
+    key = CompletionCache.make_key("openai/a", messages, None, None, 0.0)
+    assert key == CompletionCache.make_key("openai/a", [dict(messages[0])], [], None, 0.0)
+    assert key != CompletionCache.make_key("openai/b", messages, None, None, 0.0)
+    assert key != CompletionCache.make_key("openai/a", messages, None, "json", 0.0)
+
+def test_cached_completion_of_any_endpoint_is_found(monkeypatch):
+    served = []
+
+    def completion(model, messages, temperature, **kwargs):
+        served.append(model)
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=model))])
+
+    monkeypatch.setattr(adapter_module, "completion", completion)
+    # round robin: the next request goes to the other model
+    llm = LLMAdapter(
+        llm_name=["openai/model-a", "openai/model-b"], llm_backend=[None, None], cache_size=8
+    )
+
+    def syscall():
+        return LLMSyscall("agent", LLMQuery(messages=[{"role": "user", "content": "hi"}]))
+
+    responses = [llm.address_syscall(syscall()).response_message for _ in range(4)]
+    assert responses == ["openai/model-a"] * 4
+    assert served == ["openai/model-a"]
+    assert llm.cache.stats()["hits"] == 3
+    assert llm.cache.stats()["misses"] == 1
@@ -0,0 +1,96 @@
+import pytest
+
+from aios.memory.eviction import (
+    ARCPolicy,
+    EvictionPolicy,
+    LRUPolicy,
+    WTinyLFUPolicy,
+    get_eviction_policy,
+)
+from aios.memory.lru_k_replacer import LRU_K_Replacer
+
+def access(policy, blocks):
+    for block_id in blocks:
+        policy.update_access_history(block_id)
+
+def drain(policy):
+    evicted = []
+    while (block_id := policy.evict()) is not None:
+        evicted.append(block_id)
+    return evicted
+
+@pytest.mark.parametrize("policy", ["lru", "lru_k", "arc", "w_tinylfu"])
+def test_pinned_blocks_are_not_evicted(policy):
+    policy = get_eviction_policy(policy)
+    access(policy, "abcd")
+    policy.set_evictable("a", False)
+    policy.set_evictable("c", False)
+    assert policy.size() == 2
+    with pytest.raises(ValueError):
+        policy.remove("a")
+
+    assert sorted(drain(policy)) == ["b", "d"]
+    policy.set_evictable("a", True)
+    policy.set_evictable("c", True)
+    assert sorted(drain(policy)) == ["a", "c"]
+
+@pytest.mark.parametrize("policy", ["lru", "lru_k", "arc", "w_tinylfu"])
+def test_capacity_and_remove(policy):
+    policy = get_eviction_policy(policy, capacity=2)
+    access(policy, "ab")
+    with pytest.raises(ValueError):
+        policy.update_access_history("c")
+    policy.remove("a")
+    assert policy.size() == 1
+    policy.update_access_history("c")
+    assert sorted(drain(policy)) == ["b", "c"]
+
+def test_lru_evicts_least_recently_used():
+    policy = LRUPolicy()
+    access(policy, "abcab")
+    assert drain(policy) == ["c", "a", "b"]
+
+def test_arc_adapts_to_ghost_hits():
+    policy = ARCPolicy()
+    access(policy, "abc")
+    access(policy, "b")  # used twice, moves to t2
+    assert policy.evict() == "a"  # the oldest block used once
+    assert list(policy.b1) == ["a"]
+
+    # a comes back: blocks used once were evicted too early, t1 grows
+    access(policy, "a")
+    assert policy.p == 1
+    assert list(policy.t2) == ["b", "a"]
+    assert policy.evict() == "b"  # c is kept in t1
+
+    # b comes back: now t2 was evicted too early
+    access(policy, "b")
+    assert policy.p == 0
+    assert drain(policy) == ["c", "a", "b"]
+
+def test_w_tinylfu_keeps_the_more_frequent_block():
+    policy = WTinyLFUPolicy()
+    access(policy, "pq")  # q pushes p out of the window
+    access(policy, "p")  # used again while waiting, admitted to protected
+    assert list(policy.protected) == ["p"]
+    access(policy, "r")  # pushes q out of the window
+    # q, used once, is not admitted in place of p, used twice
+    assert policy.evict() == "q"
+    assert list(policy.protected) == ["p"]
+
+def test_w_tinylfu_admits_a_frequent_candidate():
+    policy = WTinyLFUPolicy()
+    access(policy, "mccc")  # c is used three times in the window
+    access(policy, "n")
+    assert list(policy.admission) == ["m", "c"]
+    # m goes to probation, then c displaces it
+    assert policy.evict() == "m"
+    assert list(policy.probation) == ["c"]
+
+def test_get_eviction_policy():
+    assert isinstance(get_eviction_policy(None), LRU_K_Replacer)
+    assert isinstance(get_eviction_policy("W-TinyLFU"), WTinyLFUPolicy)
+    assert isinstance(get_eviction_policy(EvictionPolicy.ARC), ARCPolicy)
+    assert get_eviction_policy("lru_k", k=3).k == 3
+    with pytest.raises(ValueError):
+        get_eviction_policy("fifo")
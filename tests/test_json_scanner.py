@@ -0,0 +1,87 @@
+import json
+import random
+import string
+
+import pytest
+
+from aios.llm_core.tool_schema import is_tool_call
+from aios.utils.json_scanner import JSONScanner, extract_json
+
+TOOL_CALL = [{"name": "example__tool", "parameters": {"query": "weather"}}]
+
+def random_string(rng):
+    alphabet = string.ascii_letters + ' []{}\\"\n\t:,'
+    return "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 12)))
+
+def random_json(rng, depth=0):
+    kind = rng.random()
+    if depth < 4 and kind < 0.3:
+        return [random_json(rng, depth + 1) for _ in range(rng.randint(0, 4))]
+    if depth < 4 and kind < 0.6:
+        return {random_string(rng): random_json(rng, depth + 1) for _ in range(rng.randint(0, 4))}
+    return rng.choice([random_string(rng), rng.randint(-100, 100), 1.5, True, None])
+
+def random_prose(rng):
+    words = ["the", "tool", "call", "is", "here", "```", "```json", "\n", "it's", "ok.",
+             "{", "}", "[", "]", "{not json}", "[1, 2", "\"quoted\""]
+    return " ".join(rng.choice(words) for _ in range(rng.randint(0, 12)))
+
+def stream(text, rng):
+    """The value found by a scanner fed the text in random chunks"""
+    scanner = JSONScanner()
+    position = 0
+    while position < len(text) and not scanner.found:
+        size = rng.randint(1, 8)
+        scanner.feed(text[position:position + size])
+        position += size
+    return scanner.finish()
+
+@pytest.mark.parametrize("seed", range(4))
+def test_fuzz_value_embedded_in_prose(seed):
+    rng = random.Random(seed)
+    for _ in range(500):
+        value = random_json(rng)
+        if not isinstance(value, (list, dict)):
+            value = [value]
+        text = json.dumps(value, indent=rng.choice([None, 2]))
+        # the prose has no complete JSON value of its own, and the brackets
+        # it leaves open before the value are not closed after it
+        prefix = random_prose(rng).replace("]", "").replace("}", "")
+        suffix = random_prose(rng).replace("]", "").replace("}", "")
+        text = (prefix + " " + rng.choice(["", "```json\n"]) + text
+                + rng.choice(["", "\n```"]) + " " + suffix)
+
+        assert extract_json(text) == value, text
+        assert stream(text, rng) == value, text
+
+@pytest.mark.parametrize("depth", [100, 1000, 10000])
+def test_deeply_nested_brackets(depth):
+    # nested deeper than json.loads recurses: no exception, and the tool
+    # call after it is still found
+    nested = "[" * depth + "]" * depth
+    extract_json(nested)
+    assert extract_json("[" * depth) is None
+    found = extract_json(nested + " then " + json.dumps(TOOL_CALL), accept=is_tool_call)
+    assert found == TOOL_CALL
+
+def test_first_accepted_value_is_returned():
+    text = 'Let me think {"thought": "search"} then [1, 2] and ' + json.dumps(TOOL_CALL)
+    assert extract_json(text) == {"thought": "search"}
+    assert extract_json(text, accept=is_tool_call) == TOOL_CALL
+
+def test_prose_without_json():
+    assert extract_json("no value {here} or [there], {a: 1} [1, 2") is None
+    assert extract_json("") is None
+
+def test_brackets_in_strings_are_skipped():
+    value = {"text": 'a } ] \\" [ {', "list": ["]"]}
+    assert extract_json("prefix " + json.dumps(value) + " suffix") == value
+
+def test_stream_finds_the_value_once_it_is_complete():
+    scanner = JSONScanner(accept=is_tool_call)
+    text = "Calling " + json.dumps(TOOL_CALL) + " and more text"
+    end = text.index("]") + 1
+    for position in range(end - 1):
+        assert scanner.feed(text[position]) is None
+    assert scanner.feed(text[end - 1]) == TOOL_CALL
+    assert scanner.found
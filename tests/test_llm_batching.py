@@ -0,0 +1,165 @@
+from contextlib import contextmanager
+from queue import Empty
+from types import SimpleNamespace
+
+import pytest
+
+from cerebrum.llm.communication import LLMQuery
+
+from aios.hooks.modules.scheduler import scheduler_nonblock
+from aios.core.syscall.llm import LLMSyscall
+from aios.hooks.syscall import useSysCall
+from aios.llm_core.adapter import LLMAdapter
+from aios.llm_core.local import HfLocalBackend
+from aios.scheduler.base import Scheduler
+
+def run_syscalls(llm, queries, scheduler_type="NPPS", stream=False):
+    noop_manager = SimpleNamespace(address_request=lambda syscall: None)
+    scheduler = scheduler_nonblock(
+        llm=llm,
+        memory_manager=noop_manager,
+        storage_manager=noop_manager,
+        tool_manager=noop_manager,
+        log_mode="console",
+        get_llm_syscall=None,
+        get_memory_syscall=None,
+        get_storage_syscall=None,
+        get_tool_syscall=None,
+        scheduler_type=scheduler_type,
+    )
+    scheduler.logger.log = lambda content, level: None
+    scheduler.start()
+    try:
+        _, SysCallWrapper = useSysCall()
+        if stream:
+            return [list(SysCallWrapper.llm_stream("agent", query)) for query in queries]
+        return [SysCallWrapper.llm("agent", query)["response"] for query in queries]
+    finally:
+        scheduler.stop()
+
+@pytest.fixture
+def hflocal_calls(monkeypatch):
+    """HfLocalBackend with its model replaced, the calls it receives"""
+    monkeypatch.setenv("HUGGING_FACE_API_KEY", "test")
+    calls = []
+
+    @contextmanager
+    def loaded(self):
+        yield SimpleNamespace(caches={})
+
+    def generate(self, pooled, input_ids, temperature):
+        calls.append(("generate", self.kv_cache(pooled) is not None))
+        return "generated"
+
+    def generate_stream(self, input_ids, temperature):
+        calls.append(("generate_stream",))
+        yield from ["gen", "er", "ated"]
+
+    def batch_generate(self, messages_list, temperature):
+        calls.append(("batch_generate", len(messages_list)))
+        return ["batched"] * len(messages_list)
+
+    monkeypatch.setattr(HfLocalBackend, "loaded", loaded)
+    monkeypatch.setattr(HfLocalBackend, "encode", lambda self, pooled, messages: [1, 2, 3])
+    monkeypatch.setattr(HfLocalBackend, "generate", generate)
+    monkeypatch.setattr(HfLocalBackend, "generate_stream", generate_stream)
+    monkeypatch.setattr(HfLocalBackend, "batch_generate", batch_generate)
+    return calls
+
+def test_default_scheduler_generates_single_syscall_with_kv_cache(hflocal_calls):
+    llm = LLMAdapter(llm_name="test-model", llm_backend="hflocal")
+    assert llm.batch_size() > 1
+
+    query = LLMQuery(messages=[{"role": "user", "content": "hello"}])
+    responses = run_syscalls(llm, [query, query])
+    assert [response.response_message for response in responses] == ["generated"] * 2
+    assert hflocal_calls == [("generate", True)] * 2
+
+def test_default_scheduler_streams_chunk_by_chunk(hflocal_calls):
+    llm = LLMAdapter(llm_name="test-model", llm_backend="hflocal")
+    query = LLMQuery(messages=[{"role": "user", "content": "hello"}])
+    *chunks, result = run_syscalls(llm, [query], stream=True)[0]
+    assert chunks == ["gen", "er", "ated"]
+    assert result["response"].response_message == "generated"
+    assert hflocal_calls == [("generate_stream",)]
+
+def test_streamed_syscall_is_batched_alone():
+    scheduler = Scheduler.__new__(Scheduler)
+    scheduler.batch_window = 0.01
+    scheduler.next_batch = []
+
+    def syscall(name, stream=False):
+        return SimpleNamespace(name=name, is_streaming=lambda: stream)
+
+    queue = [syscall("a"), syscall("b"), syscall("s", stream=True), syscall("c"),
+             syscall("t", stream=True), syscall("d")]
+
+    def fetch(block=True, timeout=None):
+        if not queue:
+            raise Empty
+        return queue.pop(0)
+
+    batches = []
+    while queue or scheduler.next_batch:
+        batches.append([s.name for s in scheduler.collect_batch(fetch, 8)])
+    assert batches == [["a", "b"], ["s"], ["c"], ["t"], ["d"]]
+
+def test_batch_generate_leaves_shared_tokenizer_unchanged(monkeypatch):
+    torch = pytest.importorskip("torch")
+
+    class Tokenizer:
+        eos_token_id = 0
+        pad_token_id = None
+        padding_side = "right"
+
+        def apply_chat_template(self, messages, tokenize, add_generation_prompt):
+            return messages[-1]["content"]
+
+        def __call__(self, text, add_special_tokens, return_offsets_mapping):
+            ids = [ord(char) for char in text]
+            return {"input_ids": ids, "offset_mapping": [(i, i + 1) for i in range(len(ids))]}
+
+        def decode(self, ids, skip_special_tokens):
+            return "".join(chr(i) for i in ids.tolist())
+
+    class Model:
+        device = "cpu"
+
+        def generate(self, input_ids, attention_mask, **kwargs):
+            # the prompts are padded on the left
+            assert attention_mask.tolist() == [[1, 1, 1], [0, 0, 1]]
+            return torch.cat([input_ids, torch.tensor([[ord("!")]] * 2)], dim=1)
+
+    tokenizer = Tokenizer()
+    pooled = SimpleNamespace(model=Model(), tokenizer=tokenizer, caches={})
+
+    @contextmanager
+    def loaded(self):
+        yield pooled
+
+    monkeypatch.setattr(HfLocalBackend, "loaded", loaded)
+    backend = HfLocalBackend("test-model")
+    results = backend.batch_generate(
+        [[{"role": "user", "content": "abc"}], [{"role": "user", "content": "d"}]], 0.0
+    )
+    assert results == ["!", "!"]
+    assert tokenizer.padding_side == "right"
+    assert tokenizer.pad_token_id is None
+
+def test_batch_is_charged_to_provider_rate_limits(hflocal_calls):
+    llm = LLMAdapter(
+        llm_name="test-model",
+        llm_backend="hflocal",
+        rate_limits={"HfLocalBackend": {"rpm": 60, "tpm": 6000}},
+    )
+    syscalls = [
+        LLMSyscall("agent", LLMQuery(messages=[{"role": "user", "content": "x" * 400}]))
+        for _ in range(2)
+    ]
+    responses = llm.address_syscall_batch(syscalls)
+    assert [response.response_message for response in responses] == ["batched"] * 2
+
+    quota = llm.rate_limiter.provider_quota(llm.llm_name[0])
+    # one request, the prompt tokens of both syscalls and the generated tokens
+    assert quota.requests.level == pytest.approx(59, abs=0.1)
+    assert quota.tokens.level == pytest.approx(6000 - 2 * 104 - 2 * 1, abs=1)
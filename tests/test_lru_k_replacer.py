@@ -0,0 +1,28 @@
+import pytest
+
+from aios.memory.lru_k_replacer import LRU_K_Replacer
+
+def test_evicts_blocks_used_fewer_than_k_times_first():
+    replacer = LRU_K_Replacer(None, 2)
+    for block_id in [1, 2, 3, 4]:
+        replacer.update_access_history(block_id)
+    replacer.update_access_history(1)
+    replacer.set_evictable(2, False)
+
+    assert [replacer.evict() for _ in range(4)] == [3, 4, 1, None]
+    replacer.set_evictable(2, True)
+    assert replacer.evict() == 2
+
+@pytest.mark.parametrize("k", [1, 2, 3])
+def test_pin_after_any_number_of_accesses(k):
+    replacer = LRU_K_Replacer(None, k)
+    for accesses in range(1, 5):
+        replacer.update_access_history("block")
+        replacer.set_evictable("block", False)
+        assert replacer.evict() is None
+        replacer.set_evictable("block", True)
+    assert replacer.evict() == "block"
+
+def test_rejects_k_below_one():
+    with pytest.raises(ValueError):
+        LRU_K_Replacer(None, 0)
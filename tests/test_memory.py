@@ -0,0 +1,72 @@
+import os
+import tempfile
+
+import pytest
+
+from aios.memory.memory_classes.single_memory import SingleMemoryManager
+from aios.memory.single_memory import UniformedMemoryManager
+from aios.storage.storage import StorageManager
+
+POLICIES = ["lru", "lru_k", "arc", "w_tinylfu"]
+
+def make_memory(policy, memory_limit=60):
+    storage = StorageManager(tempfile.mkdtemp())
+    return SingleMemoryManager(memory_limit, 2, storage, eviction_policy=policy), storage
+
+@pytest.mark.parametrize("policy", POLICIES)
+def test_round_spilled_again_reads_latest_content(policy):
+    memory, _ = make_memory(policy)
+    memory.mem_write(1, 1, "A" * 10)
+    memory.mem_write(1, 2, os.urandom(15).hex())  # spills round 1
+    assert 1 not in memory.memory_blocks[1]
+
+    assert memory.mem_read(1, 1) == "A" * 10  # promoted back into memory
+    memory.mem_write(1, 1, "B" * 10)
+    memory.mem_write(1, 3, os.urandom(15).hex())  # spills round 1 again
+    assert 1 not in memory.memory_blocks[1]
+    assert memory.mem_read(1, 1) == "B" * 10
+
+@pytest.mark.parametrize("policy", POLICIES)
+def test_promoted_round_leaves_storage(policy):
+    memory, storage = make_memory(policy, memory_limit=1000)
+    memory.mem_write(1, 0, "A" * 10)
+    memory.mem_write(1, 1, os.urandom(1000).hex())
+    assert storage.sto_read(1, aid=1, rid=0) == "A" * 10
+
+    memory.mem_read(1, 0)
+    assert 0 in memory.memory_blocks[1]
+    assert storage.sto_read(1, aid=1, rid=0) is None
+
+def test_clear_removes_spilled_rounds():
+    memory, storage = make_memory("lru")
+    for rid in range(5):
+        memory.mem_write(7, rid, str(rid) * 20)
+    assert memory.spilled[7]
+
+    memory.mem_clear(7)
+    assert os.listdir(storage.storage_path) == []
+    memory.mem_write(7, 9, "new agent")
+    assert all(memory.mem_read(7, rid) is None for rid in range(5))
+
+@pytest.mark.parametrize("policy", POLICIES)
+def test_bytes_accounted_within_limit(policy):
+    memory, _ = make_memory(policy, memory_limit=4000)
+    for aid in range(3):
+        for rid in range(30):
+            memory.mem_write(aid, rid, os.urandom(300).hex())
+            assert memory.total_bytes <= 4000
+            for agent, blocks in memory.memory_blocks.items():
+                assert memory.agent_bytes[agent] == sum(len(block) for block in blocks.values())
+    assert memory.total_bytes == sum(memory.agent_bytes.values())
+
+def test_rewritten_round_keeps_content_when_it_does_not_fit():
+    memory = UniformedMemoryManager(max_memory_block_size=128, memory_block_num=1)
+    memory.mem_write(1, 0, "A" * 50)
+    memory.mem_write(1, 0, "B" * 50)
+    assert memory.mem_read(1, 0) == "B" * 50
+    # the previous content was freed once replaced
+    assert memory.memory_blocks[0].stats()["used"] == memory.aid_to_memory[1]["rounds"][0]["size"]
+
+    with pytest.raises(MemoryError):
+        memory.mem_write(1, 0, os.urandom(100).hex())
+    assert memory.mem_read(1, 0) == "B" * 50
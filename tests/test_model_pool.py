@@ -0,0 +1,51 @@
+from threading import Lock
+
+from aios.llm_core.model_pool import ModelPool
+
+class Model:
+    def __init__(self, size):
+        self.size = size
+
+    def get_memory_footprint(self):
+        return self.size
+
+def loader(size):
+    return lambda: (Model(size), None)
+
+def test_leased_model_is_not_evicted():
+    pool = ModelPool(max_memory=10)
+    with pool.lease("a", "auto", loader(6)) as a:
+        pool.get("b", "auto", loader(6))
+        assert ("a", "auto") in pool.models
+        assert a.leases == 1
+    assert a.leases == 0
+
+    pool.set_max_memory(6)
+    assert ("a", "auto") not in pool.models
+    assert ("b", "auto") in pool.models
+
+def test_lease_is_taken_with_the_model():
+    pool = ModelPool(max_memory=10)
+    pool.get("a", "auto", loader(6))
+
+    class LoadOnRelease:
+        """Loads another model as soon as the lease has taken the lock once"""
+
+        def __init__(self):
+            self.lock = Lock()
+            self.loaded = False
+
+        def __enter__(self):
+            self.lock.acquire()
+
+        def __exit__(self, *exc):
+            self.lock.release()
+            if not self.loaded:
+                self.loaded = True
+                pool.get("b", "auto", loader(6))
+
+    pool.lock = LoadOnRelease()
+    with pool.lease("a", "auto", loader(6)):
+        # b was loaded between taking a and using it, but a stayed loaded
+        assert ("a", "auto") in pool.models
+        assert ("b", "auto") in pool.models
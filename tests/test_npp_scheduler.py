@@ -0,0 +1,29 @@
+from collections import deque
+
+from aios.scheduler.npp_scheduler import MultiLevelQueue, NPPScheduler
+
+def test_promoted_process_does_not_block_older_ones():
+    queues = MultiLevelQueue(levels=3, aging_interval=10.0)
+    queues.push("old", 2)
+    queues.levels[2][0].enqueue_time = 0.0
+    queues.push("waiting", 1)
+    queues.levels[1][0].enqueue_time = 5.0
+
+    # "old" is promoted to level 1, behind "waiting"
+    queues.age(10.0)
+    assert [process.syscall for process in queues.levels[1]] == ["waiting", "old"]
+
+    # "waiting" has waited aging_interval at level 1 and reaches level 0
+    queues.age(15.0)
+    assert queues.pop().syscall == "waiting"
+    assert queues.pop().syscall == "old"
+    assert len(queues) == 0
+
+def test_wait_time_stats():
+    scheduler = NPPScheduler.__new__(NPPScheduler)
+    scheduler.wait_times = [deque(maxlen=100) for _ in range(2)]
+    scheduler.wait_times[0].extend(i / 100 for i in range(100))
+
+    stats = scheduler.wait_time_stats()
+    assert list(stats) == [0]
+    assert stats[0] == {"count": 100, "p50": 0.5, "p99": 0.99}
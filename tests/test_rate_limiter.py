@@ -0,0 +1,60 @@
+import time
+from types import SimpleNamespace
+
+from aios.llm_core.rate_limiter import Quota, RateLimiter, TokenBucket
+
+def test_bucket_refills_and_goes_into_debt():
+    bucket = TokenBucket(capacity=10, rate=1)
+    now = bucket.updated
+    bucket.charge(15, now)
+    assert bucket.level == -5
+    assert not bucket.available(1, now)
+    assert bucket.wait_time(1, now) == 6
+
+    assert bucket.available(1, now + 6)
+    bucket.refill(now + 100)
+    assert bucket.level == 10
+    # a time read before the last refill changes nothing
+    bucket.refill(now)
+    assert bucket.level == 10
+
+def test_charge_takes_a_request_and_the_tokens():
+    quota = Quota(rpm=60, tpm=6000)
+    now = time.monotonic()
+    quota.charge(100, now)
+    assert quota.to_dict(now) == {"requests_available": 59, "tokens_available": 5900}
+
+def test_charge_request_of_the_provider():
+    limiter = RateLimiter(provider_limits={"openai": {"rpm": 60, "tpm": 6000}})
+    quota = limiter.provider_quota("openai/gpt-4o-mini")
+    assert limiter.provider_quota("anthropic/claude") is None
+
+    limiter.charge_request("openai/gpt-4o-mini", 100)
+    status = quota.to_dict(quota.requests.updated)
+    assert status["requests_available"] == 59
+    assert status["tokens_available"] == 5900
+
+def test_agent_over_its_quota_is_not_admitted():
+    limiter = RateLimiter(agent_rpm=1, agent_quotas={"vip": {"rpm": 100}})
+
+    def syscall(agent_name):
+        return SimpleNamespace(
+            agent_name=agent_name,
+            query=SimpleNamespace(messages=[{"role": "user", "content": "hi"}]),
+            admitted=False,
+        )
+
+    first = syscall("agent")
+    assert limiter.try_admit(first, ["openai/gpt-4o-mini"])
+    # an admitted syscall fetched again is not charged again
+    assert limiter.try_admit(first, ["openai/gpt-4o-mini"])
+    assert not limiter.try_admit(syscall("agent"), ["openai/gpt-4o-mini"])
+    assert limiter.try_admit(syscall("vip"), ["openai/gpt-4o-mini"])
+    assert limiter.stats()["admitted"] == 2
+
+def test_exhausted_provider_has_no_budget():
+    limiter = RateLimiter(provider_limits={"openai": {"rpm": 60}})
+    assert limiter.has_budget("openai/gpt-4o-mini", 10)
+    limiter.exhaust("openai/gpt-4o-mini")
+    assert not limiter.has_budget("openai/gpt-4o-mini", 10)
+    assert limiter.provider_wait_time(["openai/gpt-4o-mini"], 10) > 0
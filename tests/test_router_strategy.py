@@ -0,0 +1,92 @@
+from aios.llm_core.adapter import LLMAdapter
+from aios.llm_core.breaker import CircuitState
+from aios.llm_core.strategy import (
+    LatencyWeightedStrategy,
+    LeastOutstandingStrategy,
+    PowerOfTwoStrategy,
+    PrefixAffinityStrategy,
+    SimpleStrategy,
+)
+
+ENDPOINTS = ["openai/a", "openai/b", "openai/c"]
+
+def conversation(topic, turns=1):
+    messages = [{"role": "system", "content": "You are helpful."}]
+    for turn in range(turns):
+        messages.append({"role": "user", "content": f"{topic} {turn}"})
+        messages.append({"role": "assistant", "content": "..."})
+    return messages
+
+def test_round_robin_skips_endpoints_that_are_not_candidates():
+    strategy = SimpleStrategy(ENDPOINTS)
+    assert [strategy() for _ in range(4)] == ["openai/a", "openai/b", "openai/c", "openai/a"]
+    assert strategy(["openai/a", "openai/c"]) == "openai/c"
+    # peek does not move the round robin
+    assert strategy.peek() == strategy.peek() == strategy() == "openai/a"
+
+def test_least_outstanding_breaks_ties_in_round_robin_order():
+    strategy = LeastOutstandingStrategy(ENDPOINTS)
+    strategy.on_start("openai/a")
+    assert strategy.peek() == "openai/b"
+    assert strategy() == "openai/b"
+    strategy.on_start("openai/b")
+    assert strategy() == "openai/c"
+
+    strategy.on_finish("openai/a", latency=0.1)
+    strategy.on_finish("openai/b", latency=0.1)
+    assert sorted(strategy() for _ in range(3)) == sorted(ENDPOINTS)
+
+def test_power_of_two_takes_the_less_loaded_of_the_sample():
+    strategy = PowerOfTwoStrategy(ENDPOINTS)
+    strategy.on_start("openai/a")
+    assert strategy(["openai/a"]) == "openai/a"
+    assert all(strategy(["openai/a", "openai/b"]) == "openai/b" for _ in range(10))
+    assert strategy.peek() in ("openai/b", "openai/c")
+
+def test_latency_weighted_probes_new_endpoints_then_takes_the_fastest():
+    strategy = LatencyWeightedStrategy(ENDPOINTS)
+    for endpoint, latency in zip(ENDPOINTS, [0.5, 0.1, 0.3]):
+        assert strategy() == endpoint
+        strategy.on_start(endpoint)
+        strategy.on_finish(endpoint, latency=latency)
+    assert strategy() == "openai/b"
+
+    # three requests in flight make it slower than the others
+    for _ in range(3):
+        strategy.on_start("openai/b")
+    assert strategy() == "openai/c"
+
+def test_prefix_affinity_keeps_a_conversation_on_its_endpoint():
+    strategy = PrefixAffinityStrategy(ENDPOINTS)
+    first = strategy(messages=conversation("weather"))
+    # later rounds of the conversation go to the same endpoint
+    assert strategy(messages=conversation("weather", turns=3)) == first
+    assert strategy.peek(messages=conversation("weather", turns=5)) == first
+    assert strategy.affinity_hits == 2
+
+    # an overloaded endpoint spills over to the next in the ranking
+    for _ in range(10):
+        strategy.on_start(first)
+    spilled = strategy(messages=conversation("weather"))
+    assert spilled != first
+    assert strategy(messages=conversation("weather", turns=2)) == spilled
+
+def test_router_overflows_to_the_least_loaded_endpoint():
+    llm = LLMAdapter(llm_name=ENDPOINTS[:2], llm_backend=[None, None], max_concurrency=1)
+    assert llm.acquire_endpoint() == "openai/a"
+    assert llm.acquire_endpoint() == "openai/b"
+    # both endpoints are saturated
+    assert llm.acquire_endpoint() == "openai/a"
+    llm.release_endpoint("openai/b", 0.1)
+    assert llm.acquire_endpoint() == "openai/b"
+
+def test_router_skips_endpoints_with_an_open_circuit():
+    llm = LLMAdapter(llm_name=ENDPOINTS[:2], llm_backend=[None, None])
+    breaker = llm.breakers["openai/a"]
+    breaker.state = CircuitState.OPEN
+    breaker.opened_at = float("inf")
+    assert [llm.acquire_endpoint() for _ in range(3)] == ["openai/b"] * 3
+
+    llm.breakers["openai/b"].state = CircuitState.OPEN
+    llm.breakers["openai/b"].opened_at = float("inf")
+    assert llm.acquire_endpoint() is None
@@ -0,0 +1,70 @@
+import threading
+import time
+from queue import Empty
+
+import pytest
+
+from aios.hooks.stores.queue import SyscallQueue
+
+def blocked_get(queue, **kwargs):
+    """Start a consumer blocked on the queue, its result once it returns"""
+    result = {}
+
+    def consume():
+        try:
+            result["item"] = queue.get(**kwargs)
+        except Empty:
+            result["empty"] = True
+
+    thread = threading.Thread(target=consume)
+    thread.start()
+    time.sleep(0.05)
+    assert thread.is_alive()
+    return thread, result
+
+def test_put_wakes_a_blocked_getter():
+    queue = SyscallQueue()
+    thread, result = blocked_get(queue)
+    queue.put("syscall")
+    thread.join(timeout=1)
+    assert result == {"item": "syscall"}
+
+def test_close_wakes_every_blocked_getter_with_empty():
+    queue = SyscallQueue()
+    consumers = [blocked_get(queue) for _ in range(3)]
+    consumers.append(blocked_get(queue, timeout=10))
+    queue.close()
+    for thread, result in consumers:
+        thread.join(timeout=1)
+        assert not thread.is_alive()
+        assert result == {"empty": True}
+
+    # a closed queue does not block
+    with pytest.raises(Empty):
+        queue.get()
+
+def test_closed_queue_still_hands_out_its_items():
+    queue = SyscallQueue()
+    queue.put("syscall")
+    queue.close()
+    assert queue.get() == "syscall"
+    with pytest.raises(Empty):
+        queue.get()
+
+def test_reopened_queue_blocks_again():
+    queue = SyscallQueue()
+    queue.close()
+    queue.reopen()
+    thread, result = blocked_get(queue)
+    queue.put("syscall")
+    thread.join(timeout=1)
+    assert result == {"item": "syscall"}
+
+def test_get_with_timeout():
+    queue = SyscallQueue()
+    start = time.monotonic()
+    with pytest.raises(Empty):
+        queue.get(timeout=0.05)
+    assert time.monotonic() - start >= 0.05
+    with pytest.raises(Empty):
+        queue.get(block=False)
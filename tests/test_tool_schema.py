@@ -0,0 +1,81 @@
+import copy
+
+from aios.llm_core.tool_schema import (
+    TOOL_PREFIX_PROMPT,
+    CompiledTools,
+    ToolSchemaRegistry,
+    is_tool_call,
+)
+
+def tool(name, description="a tool"):
+    return {
+        "type": "function",
+        "function": {
+            "name": name,
+            "description": description,
+            "parameters": {"type": "object", "properties": {"query": {"type": "string"}}},
+        },
+    }
+
+TOOLS = [tool("example/arxiv"), tool("wikipedia")]
+
+def test_same_tool_set_is_compiled_once():
+    registry = ToolSchemaRegistry()
+    compiled = registry.compile(TOOLS)
+    # a copy sent by the next round of the conversation
+    assert registry.compile(copy.deepcopy(TOOLS)) is compiled
+    assert registry.stats() == {"entries": 1, "hits": 1, "misses": 1}
+
+    other = registry.compile([tool("example/arxiv", "another description")])
+    assert other is not compiled
+    assert registry.stats()["entries"] == 2
+
+def test_least_recently_used_tool_set_is_evicted():
+    registry = ToolSchemaRegistry(max_entries=2)
+    first = registry.compile([tool("a")])
+    registry.compile([tool("b")])
+    registry.compile([tool("a")])
+    registry.compile([tool("c")])
+    assert registry.compile([tool("a")]) is first
+    assert registry.stats()["entries"] == 2
+    # b was evicted
+    misses = registry.stats()["misses"]
+    registry.compile([tool("b")])
+    assert registry.stats()["misses"] == misses + 1
+
+def test_registry_without_entries_compiles_every_time():
+    registry = ToolSchemaRegistry(max_entries=0)
+    assert registry.compile(TOOLS) is not registry.compile(TOOLS)
+    assert registry.stats()["entries"] == 0
+
+def test_compiled_tools_rename_without_modifying_the_agent_tools():
+    tools = copy.deepcopy(TOOLS)
+    compiled = CompiledTools(tools)
+    assert tools == TOOLS
+    assert [t["function"]["name"] for t in compiled.tools] == ["example__arxiv", "wikipedia"]
+    assert compiled.prompt.startswith(TOOL_PREFIX_PROMPT)
+    assert "example__arxiv" in compiled.prompt
+    assert compiled.original_name("example__arxiv") == "example/arxiv"
+    assert compiled.original_name("other__tool") == "other/tool"
+    assert len(compiled) == 2
+
+def test_is_tool_call():
+    assert is_tool_call({"name": "wikipedia", "parameters": {}})
+    assert is_tool_call([{"name": "a"}, {"name": "b"}])
+    assert not is_tool_call([])
+    assert not is_tool_call([{"name": "a"}, {"query": "b"}])
+    assert not is_tool_call({"query": "b"})
+
+def test_adapter_reuses_the_compiled_tools_and_maps_calls_back():
+    from aios.llm_core.adapter import LLMAdapter
+
+    llm = LLMAdapter(llm_name="openai/a")
+    compiled = llm.pre_process_tools(TOOLS)
+    assert llm.pre_process_tools(copy.deepcopy(TOOLS)) is compiled
+
+    calls = llm.parse_tool_calls(
+        'I will search. [{"name": "example__arxiv", "parameters": {"query": "llm"}}]',
+        compiled,
+    )
+    assert [call["name"] for call in calls] == ["example/arxiv"]
+    assert calls[0]["parameters"] == {"query": "llm"}